@@ -1,35 +1,253 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import List, Dict, Any, Optional
-import json
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request, Response
+from typing import List, Dict, Any, Optional, Iterable, Iterator, BinaryIO, Callable
+from collections import OrderedDict
+import sqlite3
 import os
 from datetime import datetime
 import io
 import sys
 import traceback
 import csv
-import math
+import itertools
+import hashlib
+import json
+# De indicator kernel (pure Python; NumPy optioneel en pas geladen bij de eerste berekening)
+# wordt gedeeld met backend/; vercel.json neemt hem mee in de bundle van deze functie
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+import kernel
+try:
+    import orjson
+except ImportError:  # optioneel; de stdlib encoder geeft hetzelfde document
+    orjson = None
 
-print("Booting api/index.py (pure python, no pandas/numpy)", sys.version, file=sys.stderr)
+# Koude start (meten: python benchmarks/bench_startup.py --target api): de import van
+# fastapi zelf domineert en laadt de stdlib modules hierboven al, dus die lazy maken
+# levert niets op. Wat wel telt: geen CORS-middleware als die niet nodig is, geen DDL
+# bij een warme /tmp database en SQL die één keer per module wordt opgebouwd
 app = FastAPI(title="S&P500 Analysis API")
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-DAILY_DATA_PATH = "/tmp/daily_data.json"
-MONTHLY_DATA_PATH = "/tmp/monthly_data.json"
-def load_data(path: str) -> List[Dict]:
-    if os.path.exists(path):
-        with open(path, 'r') as f:
-            return json.load(f)
-    return []
-def save_data(path: str, data: List[Dict]):
-    with open(path, 'w') as f:
-        json.dump(data, f)
+# Op Vercel serveren frontend en API dezelfde origin, dus CORS staat daar standaard uit;
+# lokaal (frontend op :3000) blijft "*" de default. CORS_ORIGINS="" zet het altijd uit
+CORS_ORIGINS = [origin.strip() for origin in
+                os.environ.get("CORS_ORIGINS", "" if "VERCEL" in os.environ else "*").split(",")
+                if origin.strip()]
+if CORS_ORIGINS:
+    from fastapi.middleware.cors import CORSMiddleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "Link"],
+    )
+DATA_DIR = "/tmp"
+DB_PATH = os.path.join(DATA_DIR, "tradingview_data.db")
+TIMEFRAMES = {"daily": "1D", "monthly": "1M"}
+DAILY_FIELDS = ['date', 'open', 'high', 'low', 'close', 'volume', 'high_prev_close_diff',
+                'rsi', 'macd_line', 'macd_signal', 'macd_hist']
+MONTHLY_FIELDS = DAILY_FIELDS[:6]
+FIELDS = {"daily": DAILY_FIELDS, "monthly": MONTHLY_FIELDS}
+# Eén keer opgebouwd per instantie: dezelfde SQL-string per aanroep laat sqlite3 zijn
+# statement cache hergebruiken in plaats van elke keer opnieuw te parsen. Een datum die
+# meermaals voorkomt (bv. een intraday export) overschrijft de vorige rij, zoals in backend/
+INSERT_SQL = {
+    kind: f"INSERT INTO bars (symbol, timeframe, ts, {', '.join(fields[1:])}) "
+          f"VALUES ({', '.join('?' * (len(fields) + 2))}) "
+          f"ON CONFLICT(symbol, timeframe, ts) DO UPDATE SET {', '.join(f'{f} = excluded.{f}' for f in fields[1:])}"
+    for kind, fields in FIELDS.items()
+}
+# Per projectie (kolommen, sorteerrichting) wordt de SELECT ook maar één keer opgebouwd
+_select_sql: Dict[tuple, str] = {}
+def select_sql(columns: tuple, order: str) -> str:
+    sql = _select_sql.get((columns, order))
+    if sql is None:
+        sql = _select_sql[(columns, order)] = (
+            f"SELECT ts, {', '.join(columns)} FROM bars "
+            f"WHERE symbol = ? AND timeframe = ? AND ts >= ? AND ts < ? ORDER BY ts {order} LIMIT ?"
+        )
+    return sql
+# Responsveld -> opgeslagen kolommen; 'date' zit er altijd bij
+FIELD_COLUMNS = {field: (field,) for field in DAILY_FIELDS[1:8]}
+FIELD_COLUMNS['macd'] = ('macd_line', 'macd_signal', 'macd_hist')
+RESPONSE_FIELDS = {"daily": list(FIELD_COLUMNS), "monthly": MONTHLY_FIELDS[1:]}
+DEFAULT_SYMBOL = os.environ.get("DEFAULT_SYMBOL", "SPX")
+SYMBOL_PATTERN = r"^[A-Za-z0-9._:!^=-]{1,32}$"
+DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+def symbol_query() -> Any:
+    return Query(DEFAULT_SYMBOL, pattern=SYMBOL_PATTERN, description="Ticker, e.g. SPX or ES1!")
+def date_query(description: str) -> Any:
+    return Query(None, pattern=DATE_PATTERN, description=description)
+def parse_fields(kind: str, fields: Optional[str]) -> List[str]:
+    # Canonieke volgorde, zodat dezelfde projectie dezelfde SQL en cachesleutel krijgt
+    available = RESPONSE_FIELDS[kind]
+    if not fields:
+        return available
+    names = {name.strip().lower() for name in fields.split(",") if name.strip()}
+    unknown = sorted(names - set(available) - {'date'})
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Onbekende velden: {', '.join(unknown)}. "
+                                                    f"Beschikbaar: date, {', '.join(available)}")
+    return [name for name in available if name in names]
+def page_links(request: Request, rows: List[Dict[str, Any]], limit: Optional[int], after: Optional[str]) -> Dict[str, str]:
+    # Een volle pagina kan nog vervolg hebben: met after=... vooruit in de tijd, anders
+    # de pagina vóór de oudste teruggegeven bar
+    if not limit or len(rows) < limit:
+        return {}
+    if after:
+        url = request.url.remove_query_params("before").include_query_params(after=rows[-1]['date'])
+    else:
+        url = request.url.remove_query_params("after").include_query_params(before=rows[0]['date'])
+    return {"Link": f'<{url}>; rel="next"'}
+RESPONSE_CACHE_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", "128"))
+# De datasetversie leeft enkel in deze instantie; de epoch zorgt dat ETags van een
+# vorige (koude) start nooit meer matchen
+_epoch = os.urandom(4).hex()
+_versions: Dict[str, int] = {}
+_response_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+def encode_json(payload: Any) -> bytes:
+    # Zelfde uitvoer als JSONResponse.render, zonder de omweg via jsonable_encoder
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+def bump_version(symbol: str):
+    symbol = symbol.upper()
+    _versions[symbol] = _versions.get(symbol, 0) + 1
+def cached_response(request: Request, endpoint: str, symbol: str, build: Callable[[], Any],
+                    links: Optional[Callable[[Any], Dict[str, str]]] = None, **params: Any) -> Response:
+    # Cache per (endpoint, parameters, datasetversie); de ETag volgt uit die sleutel,
+    # dus een 304 raakt de database niet eens. `links` leidt extra headers (paginering)
+    # af uit de payload; die worden mee gecachet met de body
+    symbol = symbol.upper()
+    key = (endpoint, symbol, _versions.get(symbol, 0)) + tuple(sorted(params.items()))
+    etag = f'"{_epoch}-{key[2]}-{hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match") or ""
+    if any(tag.strip() in (etag, "*") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    entry = _response_cache.get(key)
+    if entry is None:
+        payload = build()
+        entry = _response_cache[key] = (encode_json(payload), links(payload) if links else {})
+        if len(_response_cache) > RESPONSE_CACHE_ENTRIES:
+            _response_cache.popitem(last=False)
+    else:
+        _response_cache.move_to_end(key)
+    body, extra = entry
+    return Response(body, media_type="application/json", headers={**headers, **extra})
+SCHEMA_VERSION = 1
+_conn: Optional[sqlite3.Connection] = None
+# Uploads worden per blok van zoveel bars verwerkt en geschreven, zodat het geheugen niet
+# met de grootte van het bestand meegroeit
+CSV_CHUNK_ROWS = int(os.environ.get("CSV_CHUNK_ROWS", "50000"))
+# Een bar die vroeger valt dan de vorige; zo'n bestand wordt alsnog in het geheugen gesorteerd
+class UnsortedRows(ValueError):
+    pass
+def get_conn() -> sqlite3.Connection:
+    # Eén verbinding per (serverless) instantie, pas geopend bij het eerste request
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        # Een warme instantie vindt de database van een vorige aanroep nog in /tmp terug;
+        # user_version markeert dat het schema er al staat, zodat de DDL wordt overgeslagen
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            create_schema(conn)
+        _conn = conn
+    return _conn
+def create_schema(conn: sqlite3.Connection):
+    with conn:
+        # Geclusterd op (symbol, timeframe, ts): de laatste N rijen of een datumbereik
+        # lezen is een indexbereik van k rijen, onafhankelijk van de totale historiek
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bars (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                high_prev_close_diff REAL,
+                rsi REAL,
+                macd_line REAL,
+                macd_signal REAL,
+                macd_hist REAL,
+                PRIMARY KEY (symbol, timeframe, ts)
+            ) WITHOUT ROWID
+        """)
+        # Samenvatting per dataset, zodat de stats endpoints niet over alle rijen tellen
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS datasets (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                total_records INTEGER NOT NULL,
+                start TEXT,
+                end TEXT,
+                latest_close REAL,
+                latest_rsi REAL,
+                PRIMARY KEY (symbol, timeframe)
+            )
+        """)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+def save_data(kind: str, symbol: str, data: List[Dict]) -> Dict[str, Any]:
+    return save_batches(kind, symbol, [data])
+def save_batches(kind: str, symbol: str, batches: Iterable[List[Dict]]) -> Dict[str, Any]:
+    # Vervangt de bars van het symbool blok per blok binnen één transactie: een mislukte
+    # upload laat de vorige data staan
+    symbol, timeframe = symbol.upper(), TIMEFRAMES[kind]
+    fields = FIELDS[kind]
+    conn = get_conn()
+    count, first, last = 0, {}, {}
+    with conn:
+        conn.execute("DELETE FROM bars WHERE symbol = ? AND timeframe = ?", (symbol, timeframe))
+        for data in batches:
+            if not data:
+                continue
+            conn.executemany(
+                INSERT_SQL[kind],
+                ((symbol, timeframe) + tuple(row.get(f) for f in fields) for row in data)
+            )
+            count += len(data)
+            first, last = first or data[0], data[-1]
+        # dubbele datums tellen één keer
+        total = conn.execute("SELECT COUNT(*) FROM bars WHERE symbol = ? AND timeframe = ?",
+                             (symbol, timeframe)).fetchone()[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (symbol, timeframe, total, first.get('date'), last.get('date'),
+             last.get('close'), last.get('rsi'))
+        )
+    return {"records_processed": count, "start": first.get('date'), "end": last.get('date')}
+def load_data(kind: str, symbol: str, limit: Optional[int] = None,
+              start: Optional[str] = None, end: Optional[str] = None,
+              after: Optional[str] = None, before: Optional[str] = None,
+              columns: Optional[List[str]] = None) -> List[Dict]:
+    # Leest enkel de gevraagde rijen: de laatste `limit` (vóór `before`), of met `after` de
+    # eerste `limit` erna, telkens binnen [start, end]. Alle filters worden één halfopen
+    # bereik [lo, hi) op de primaire sleutel, dus een pagina is een indexbereik zonder
+    # OFFSET; "ts > after" staat er als "ts >= after + NUL", de kleinste string erna
+    columns = tuple(columns or FIELDS[kind][1:])
+    lo = max(start or "", after + "\0" if after else "")
+    hi = min(end + "\0" if end else "~", before or "~")
+    order = "ASC" if after else "DESC"
+    rows = get_conn().execute(
+        select_sql(columns, order),
+        (symbol.upper(), TIMEFRAMES[kind], lo, hi, limit or -1)
+    ).fetchall()
+    if order == "DESC":
+        rows.reverse()
+    fields = ('date',) + columns
+    return [dict(zip(fields, row)) for row in rows]
+def load_summary(kind: str, symbol: str) -> Optional[Dict]:
+    row = get_conn().execute(
+        "SELECT total_records, start, end, latest_close, latest_rsi FROM datasets WHERE symbol = ? AND timeframe = ?",
+        (symbol.upper(), TIMEFRAMES[kind])
+    ).fetchone()
+    if row is None:
+        return None
+    return dict(zip(['total_records', 'start', 'end', 'latest_close', 'latest_rsi'], row))
 def parse_time(value: str) -> datetime:
     # Supports epoch seconds or ISO date string
     try:
@@ -45,8 +263,52 @@ def parse_time(value: str) -> datetime:
         if isinstance(value, str) and value.endswith("Z"):
             return datetime.fromisoformat(value.rstrip("Z"))
         raise
-
-
+def time_parser(sample: str) -> Callable[[str], datetime]:
+    # Het tijdformaat wordt één keer uit de eerste rij afgeleid in plaats van per rij elk
+    # formaat te proberen; wat die parser weigert, gaat alsnog door parse_time
+    try:
+        float(sample)
+        parse = lambda value: datetime.fromtimestamp(float(value))
+    except ValueError:
+        parse = datetime.fromisoformat
+    def parse_row(value: str) -> datetime:
+        try:
+            return parse(value)
+        except ValueError:
+            return parse_time(value)
+    return parse_row
+def parse_bars(rows: Iterable[Dict[str, Any]]) -> List[tuple]:
+    # (time, open, high, low, close, volume) tuples, gesorteerd op tijd
+    return sorted(iter_bars(rows), key=lambda x: x[0])
+def iter_bars(rows: Iterable[Dict[str, Any]]) -> Iterator[tuple]:
+    # Bars in bestandsvolgorde; rijen met een onleesbare tijd of een ontbrekende waarde vallen weg
+    parse = None
+    for r in rows:
+        value = str(r.get("time", "")).strip()
+        if parse is None:
+            parse = time_parser(value)
+        try:
+            t = parse(value)
+        except Exception:
+            continue
+        bar = (t, to_float(r.get("open")), to_float(r.get("high")), to_float(r.get("low")),
+               to_float(r.get("close")), to_float(r.get("volume")))
+        if None not in bar:
+            yield bar
+def iter_batches(bars: Iterable[tuple], size: Optional[int] = None) -> Iterator[List[tuple]]:
+    # Blokken van `size` bars; TradingView exports zijn oplopend, al het andere geeft UnsortedRows
+    size = size or CSV_CHUNK_ROWS
+    batch, last = [], None
+    for bar in bars:
+        if last is not None and bar[0] < last:
+            raise UnsortedRows(f"CSV rijen staan niet in oplopende tijdsvolgorde na {last}")
+        last = bar[0]
+        batch.append(bar)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 def sniff_delimiter(text: str) -> str:
     try:
         sample = text[:2048]
@@ -56,16 +318,24 @@ def sniff_delimiter(text: str) -> str:
         return ","
 
 
+def iter_csv_rows(fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+    # Leest de CSV rij per rij uit het (naar schijf gespoolde) uploadbestand,
+    # zodat de volledige inhoud nooit als bytes/str/list in het geheugen staat
+    sample = fileobj.read(2048)
+    fileobj.seek(0)
+    delimiter = sniff_delimiter(sample.decode('utf-8', errors='replace'))
+    text = io.TextIOWrapper(fileobj, encoding='utf-8', errors='replace', newline='')
+    try:
+        reader = csv.DictReader(text, delimiter=delimiter)
+        for row in reader:
+            # normaliseer headers: lower + strip
+            yield { (k or "").strip().lower(): v for k, v in row.items() }
+    finally:
+        text.detach()
+
+
 def read_csv_rows(contents: bytes) -> List[Dict[str, Any]]:
-    text = contents.decode('utf-8', errors='replace')
-    delimiter = sniff_delimiter(text)
-    reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
-    rows = []
-    for row in reader:
-        # normaliseer headers: lower + strip
-        normalized = { (k or "").strip().lower(): v for k, v in row.items() }
-        rows.append(normalized)
-    return rows
+    return list(iter_csv_rows(io.BytesIO(contents)))
 
 
 def to_float(val: Any) -> Optional[float]:
@@ -75,130 +345,84 @@ def to_float(val: Any) -> Optional[float]:
         return None
 
 
-def process_daily_data(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    # Parse and sort by time
-    parsed = []
-    for r in rows:
-        try:
-            t = parse_time(str(r.get("time", "")).strip())
-        except Exception:
+def process_daily_data(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return daily_records(parse_bars(rows))[0]
+def daily_batches(batches: Iterable[List[tuple]]) -> Iterator[List[Dict[str, Any]]]:
+    # Elk blok gaat verder vanaf de indicator state van het vorige; zolang de RSI nog niet
+    # geseed is, worden de bars samen met het volgende blok opnieuw berekend
+    state, pending = None, []
+    for parsed in batches:
+        result, state = daily_records(pending + parsed, state)
+        if state['avg_loss'] is None:
+            state, pending = None, pending + parsed
             continue
-        parsed.append({
-            "time": t,
-            "open": to_float(r.get("open")),
-            "high": to_float(r.get("high")),
-            "low": to_float(r.get("low")),
-            "close": to_float(r.get("close")),
-            "volume": to_float(r.get("volume")),
-        })
-    parsed = [p for p in parsed if None not in (p["open"], p["high"], p["low"], p["close"], p["volume"])]
-    parsed.sort(key=lambda x: x["time"])
-
-    closes = [p["close"] for p in parsed]
-
-    def calculate_rsi(values: List[float], period: int = 14) -> List[Optional[float]]:
-        if len(values) < period + 1:
-            return [None] * len(values)
-        deltas = [values[i] - values[i - 1] for i in range(1, len(values))]
-        gains = [max(d, 0) for d in deltas]
-        losses = [-min(d, 0) for d in deltas]
-
-        avg_gain = sum(gains[:period]) / period
-        avg_loss = sum(losses[:period]) / period
-        rsi_values = [None] * period
-
-        for i in range(period, len(values)):
-            gain = gains[i - 1]
-            loss = losses[i - 1]
-            avg_gain = (avg_gain * (period - 1) + gain) / period
-            avg_loss = (avg_loss * (period - 1) + loss) / period
-            if avg_loss == 0:
-                rsi = 100.0
-            else:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-            rsi_values.append(rsi)
-        return rsi_values
-
-    def ema(values: List[float], period: int) -> List[float]:
-        if not values:
-            return []
-        k = 2 / (period + 1)
-        ema_vals = [values[0]]
-        for v in values[1:]:
-            ema_vals.append(v * k + ema_vals[-1] * (1 - k))
-        return ema_vals
-
-    def calculate_macd(values: List[float], fast: int = 12, slow: int = 26, signal: int = 9):
-        if not values:
-            return {"line": [], "signal": [], "hist": []}
-        ema_fast = ema(values, fast)
-        ema_slow = ema(values, slow)
-        # align lengths
-        min_len = min(len(ema_fast), len(ema_slow))
-        ema_fast = ema_fast[-min_len:]
-        ema_slow = ema_slow[-min_len:]
-        macd_line = [f - s for f, s in zip(ema_fast, ema_slow)]
-        signal_line = ema(macd_line, signal)
-        hist = [m - s for m, s in zip(macd_line[-len(signal_line):], signal_line)]
-        # pad to original length with None at start
-        pad_len = len(values) - len(macd_line)
-        macd_line = [None] * pad_len + macd_line
-        signal_line = [None] * (len(values) - len(signal_line)) + signal_line
-        hist = [None] * (len(values) - len(hist)) + hist
-        return {"line": macd_line, "signal": signal_line, "hist": hist}
-
-    rsi_vals = calculate_rsi(closes)
-    macd_vals = calculate_macd(closes)
-
+        pending = []
+        yield result
+    if pending:
+        yield daily_records(pending)[0]
+def daily_records(parsed: List[tuple], state: Optional[Dict[str, float]] = None) -> tuple:
+    # (rijen, state na de laatste bar)
+    if not parsed:
+        return [], state
+    # Eén pass over de bars voor RSI, MACD en high - vorige close, met dezelfde kernel als de backend
+    values = kernel.compute([p[4] for p in parsed], [p[2] for p in parsed], state)
     result = []
-    for idx, row in enumerate(parsed):
-        prev_close = parsed[idx - 1]["close"] if idx > 0 else None
+    for idx, (t, open_, high, low, close, volume) in enumerate(parsed):
         result.append({
-            "date": row["time"].strftime("%Y-%m-%d"),
-            "open": row["open"],
-            "high": row["high"],
-            "low": row["low"],
-            "close": row["close"],
-            "volume": row["volume"],
-            "high_prev_close_diff": row["high"] - prev_close if prev_close is not None else None,
-            "rsi": rsi_vals[idx] if idx < len(rsi_vals) else None,
-            "macd_line": macd_vals["line"][idx] if idx < len(macd_vals["line"]) else None,
-            "macd_signal": macd_vals["signal"][idx] if idx < len(macd_vals["signal"]) else None,
-            "macd_hist": macd_vals["hist"][idx] if idx < len(macd_vals["hist"]) else None,
+            "date": t.date().isoformat(),
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "high_prev_close_diff": values["high_prev_close_diff"][idx],
+            "rsi": values["rsi"][idx],
+            "macd_line": values["macd_line"][idx],
+            "macd_signal": values["macd_signal"][idx],
+            "macd_hist": values["macd_hist"][idx],
         })
-    return result
+    state = {name: values[name][-1] for name in ['avg_gain', 'avg_loss', 'ema_fast', 'ema_slow', 'ema_signal']}
+    return result, {'close': parsed[-1][4], **state}
 
 
-def process_monthly_data(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    parsed = []
-    for r in rows:
-        try:
-            t = parse_time(str(r.get("time", "")).strip())
-        except Exception:
-            continue
-        parsed.append({
-            "time": t,
-            "open": to_float(r.get("open")),
-            "high": to_float(r.get("high")),
-            "low": to_float(r.get("low")),
-            "close": to_float(r.get("close")),
-            "volume": to_float(r.get("volume")),
-        })
-    parsed = [p for p in parsed if None not in (p["open"], p["high"], p["low"], p["close"], p["volume"])]
-    parsed.sort(key=lambda x: x["time"])
-
+def process_monthly_data(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return monthly_records(parse_bars(rows))
+def monthly_records(parsed: List[tuple]) -> List[Dict[str, Any]]:
     result = []
-    for row in parsed:
+    for t, open_, high, low, close, volume in parsed:
         result.append({
-            "date": row["time"].strftime("%Y-%m-%d"),
-            "open": row["open"],
-            "high": row["high"],
-            "low": row["low"],
-            "close": row["close"],
-            "volume": row["volume"],
+            "date": t.date().isoformat(),
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
         })
     return result
+def store_upload(kind: str, symbol: str, fileobj: BinaryIO) -> Dict[str, Any]:
+    # Controleert de headers op de eerste rij en streamt het bestand daarna blok per blok naar
+    # de database; een bestand dat niet oplopend in de tijd is, wordt alsnog in het geheugen gesorteerd
+    rows = iter_csv_rows(fileobj)
+    try:
+        first = next(rows, None)
+        if first is None:
+            raise HTTPException(status_code=400, detail="CSV bevat geen rijen")
+        headers = list(first.keys())
+        missing = [col for col in ['time', 'open', 'high', 'low', 'close', 'volume'] if col not in headers]
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"CSV mist kolommen: {', '.join(missing)}. Gevonden headers: {', '.join(headers)}"
+            )
+        records = daily_batches if kind == "daily" else (lambda batches: map(monthly_records, batches))
+        return save_batches(kind, symbol, records(iter_batches(iter_bars(itertools.chain([first], rows)))))
+    except UnsortedRows as e:
+        print(f"{e}; verwerking in het geheugen", file=sys.stderr)
+    finally:
+        rows.close()
+    fileobj.seek(0)
+    process = process_daily_data if kind == "daily" else process_monthly_data
+    return save_data(kind, symbol, process(iter_csv_rows(fileobj)))
 @app.get("/")
 async def root():
     return {"message": "S&P500 Analysis API", "status": "running"}
@@ -208,7 +432,7 @@ async def health_check():
         "status": "healthy",
         "python_version": sys.version,
         "pandas_used": False,
-        "numpy_used": False,
+        "numpy_used": kernel.np is not None,
     }
 
 
@@ -219,32 +443,21 @@ async def debug_env():
         "cwd": os.getcwd(),
         "files": os.listdir("."),
         "pandas_used": False,
-        "numpy_used": False,
+        "numpy_used": kernel.np is not None,
     }
 @app.post("/api/upload")
-async def upload_daily_data(file: UploadFile = File(...)):
+async def upload_daily_data(file: UploadFile = File(...), symbol: str = symbol_query()):
     try:
-        contents = await file.read()
-        rows = read_csv_rows(contents)
-        required_columns = ['time', 'open', 'high', 'low', 'close', 'volume']
-        if not rows:
-            raise HTTPException(status_code=400, detail="CSV bevat geen rijen")
-
-        headers = list(rows[0].keys())
-        missing = [col for col in required_columns if col not in headers]
-        if missing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"CSV mist kolommen: {', '.join(missing)}. Gevonden headers: {', '.join(headers)}"
-            )
-        data = process_daily_data(rows)
-        save_data(DAILY_DATA_PATH, data)
+        await file.seek(0)
+        summary = store_upload("daily", symbol, file.file)
+        bump_version(symbol)
         return {
             "message": "Daily data uploaded and processed successfully",
-            "records_processed": len(data),
+            "symbol": symbol.upper(),
+            "records_processed": summary["records_processed"],
             "date_range": {
-                "start": data[0]['date'] if data else None,
-                "end": data[-1]['date'] if data else None
+                "start": summary["start"],
+                "end": summary["end"]
             }
         }
     except HTTPException:
@@ -256,29 +469,18 @@ async def upload_daily_data(file: UploadFile = File(...)):
         sys.stderr.flush()
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 @app.post("/api/upload-monthly")
-async def upload_monthly_data(file: UploadFile = File(...)):
+async def upload_monthly_data(file: UploadFile = File(...), symbol: str = symbol_query()):
     try:
-        contents = await file.read()
-        rows = read_csv_rows(contents)
-        required_columns = ['time', 'open', 'high', 'low', 'close', 'volume']
-        if not rows:
-            raise HTTPException(status_code=400, detail="CSV bevat geen rijen")
-
-        headers = list(rows[0].keys())
-        missing = [col for col in required_columns if col not in headers]
-        if missing:
-            raise HTTPException(
-                status_code=400,
-                detail=f"CSV mist kolommen: {', '.join(missing)}. Gevonden headers: {', '.join(headers)}"
-            )
-        data = process_monthly_data(rows)
-        save_data(MONTHLY_DATA_PATH, data)
+        await file.seek(0)
+        summary = store_upload("monthly", symbol, file.file)
+        bump_version(symbol)
         return {
             "message": "Monthly data uploaded successfully",
-            "records_processed": len(data),
+            "symbol": symbol.upper(),
+            "records_processed": summary["records_processed"],
             "date_range": {
-                "start": data[0]['date'] if data else None,
-                "end": data[-1]['date'] if data else None
+                "start": summary["start"],
+                "end": summary["end"]
             }
         }
     except HTTPException:
@@ -289,83 +491,105 @@ async def upload_monthly_data(file: UploadFile = File(...)):
         sys.stderr.flush()
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 @app.get("/api/daily-data")
-async def get_daily_data(limit: int = 60):
+async def get_daily_data(request: Request, limit: int = Query(60, ge=1), symbol: str = symbol_query(),
+                         start: Optional[str] = date_query("Eerste datum (inclusief)"),
+                         end: Optional[str] = date_query("Laatste datum (inclusief)"),
+                         after: Optional[str] = date_query("Cursor: de `limit` bars na deze datum, oudste eerst"),
+                         before: Optional[str] = date_query("Cursor: de `limit` bars vóór deze datum"),
+                         fields: Optional[str] = Query(None, description="Kommagescheiden velden, bv. close,rsi")):
+    selected = parse_fields("daily", fields)
+    bounds = {"start": start, "end": end, "after": after, "before": before}
     try:
-        data = load_data(DAILY_DATA_PATH)
-        limited_data = data[-limit:] if len(data) > limit else data
-        return [{
-            'date': row['date'],
-            'open': row['open'],
-            'high': row['high'],
-            'low': row['low'],
-            'close': row['close'],
-            'volume': row['volume'],
-            'high_prev_close_diff': row.get('high_prev_close_diff'),
-            'rsi': row.get('rsi'),
-            'macd': {
-                'line': row.get('macd_line'),
-                'signal': row.get('macd_signal'),
-                'hist': row.get('macd_hist')
-            }
-        } for row in limited_data]
+        return cached_response(request, "daily-data", symbol,
+                               lambda: daily_rows(symbol, limit, selected, **bounds),
+                               links=lambda rows: page_links(request, rows, limit, after),
+                               limit=limit, fields=tuple(selected), **bounds)
     except Exception as e:
         print("Error in get_daily_data:", e, file=sys.stderr)
         traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
         sys.stderr.flush()
         raise HTTPException(status_code=500, detail=f"Error fetching data: {str(e)}")
+def daily_rows(symbol: str, limit: int, fields: List[str], **bounds: Optional[str]) -> List[Dict[str, Any]]:
+    columns = [column for field in fields for column in FIELD_COLUMNS[field]]
+    limited_data = load_data("daily", symbol, limit=limit, columns=columns, **bounds)
+    if 'macd' in fields:
+        for row in limited_data:
+            row['macd'] = {
+                'line': row.pop('macd_line'),
+                'signal': row.pop('macd_signal'),
+                'hist': row.pop('macd_hist')
+            }
+    return limited_data
 @app.get("/api/monthly-data")
-async def get_monthly_data():
+async def get_monthly_data(request: Request, limit: Optional[int] = Query(None, ge=1), symbol: str = symbol_query(),
+                           start: Optional[str] = date_query("Eerste datum (inclusief)"),
+                           end: Optional[str] = date_query("Laatste datum (inclusief)"),
+                           after: Optional[str] = date_query("Cursor: de `limit` bars na deze datum, oudste eerst"),
+                           before: Optional[str] = date_query("Cursor: de `limit` bars vóór deze datum"),
+                           fields: Optional[str] = Query(None, description="Kommagescheiden velden, bv. close,volume")):
+    selected = parse_fields("monthly", fields)
+    bounds = {"start": start, "end": end, "after": after, "before": before}
     try:
-        data = load_data(MONTHLY_DATA_PATH)
-        return data
+        return cached_response(request, "monthly-data", symbol,
+                               lambda: load_data("monthly", symbol, limit, columns=selected, **bounds),
+                               links=lambda rows: page_links(request, rows, limit, after),
+                               limit=limit, fields=tuple(selected), **bounds)
     except Exception as e:
         print("Error in get_monthly_data:", e, file=sys.stderr)
         traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
         sys.stderr.flush()
         raise HTTPException(status_code=500, detail=f"Error fetching data: {str(e)}")
 @app.get("/api/stats")
-async def get_daily_stats():
+async def get_daily_stats(request: Request, symbol: str = symbol_query()):
     try:
-        data = load_data(DAILY_DATA_PATH)
-        if not data:
-            return {
-                "total_records": 0,
-                "date_range": {"start": None, "end": None},
-                "latest_close": None,
-                "latest_rsi": None
-            }
-        return {
-            "total_records": len(data),
-            "date_range": {
-                "start": data[0]['date'],
-                "end": data[-1]['date']
-            },
-            "latest_close": data[-1].get('close'),
-            "latest_rsi": data[-1].get('rsi')
-        }
+        return cached_response(request, "stats", symbol, lambda: daily_stats(symbol))
     except Exception as e:
         print("Error in get_daily_stats:", e, file=sys.stderr)
         traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
         sys.stderr.flush()
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
-@app.get("/api/monthly-stats")
-async def get_monthly_stats():
-    try:
-        data = load_data(MONTHLY_DATA_PATH)
-        if not data:
-            return {
-                "total_records": 0,
-                "date_range": {"start": None, "end": None}
-            }
+def daily_stats(symbol: str) -> Dict[str, Any]:
+    summary = load_summary("daily", symbol)
+    if not summary or not summary['total_records']:
         return {
-            "total_records": len(data),
-            "date_range": {
-                "start": data[0]['date'],
-                "end": data[-1]['date']
-            }
+            "symbol": symbol.upper(),
+            "total_records": 0,
+            "date_range": {"start": None, "end": None},
+            "latest_close": None,
+            "latest_rsi": None
         }
+    return {
+        "symbol": symbol.upper(),
+        "total_records": summary['total_records'],
+        "date_range": {
+            "start": summary['start'],
+            "end": summary['end']
+        },
+        "latest_close": summary['latest_close'],
+        "latest_rsi": summary['latest_rsi']
+    }
+@app.get("/api/monthly-stats")
+async def get_monthly_stats(request: Request, symbol: str = symbol_query()):
+    try:
+        return cached_response(request, "monthly-stats", symbol, lambda: monthly_stats(symbol))
     except Exception as e:
         print("Error in get_monthly_stats:", e, file=sys.stderr)
         traceback.print_exception(type(e), e, e.__traceback__, file=sys.stderr)
         sys.stderr.flush()
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
+def monthly_stats(symbol: str) -> Dict[str, Any]:
+    summary = load_summary("monthly", symbol)
+    if not summary or not summary['total_records']:
+        return {
+            "symbol": symbol.upper(),
+            "total_records": 0,
+            "date_range": {"start": None, "end": None}
+        }
+    return {
+        "symbol": symbol.upper(),
+        "total_records": summary['total_records'],
+        "date_range": {
+            "start": summary['start'],
+            "end": summary['end']
+        }
+    }
@@ -0,0 +1,183 @@
+import inspect
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import kernel
+# Rule-based long-only strategies over the daily indicators. A strategy turns the bars into
+# entry and exit signals (boolean arrays); run() holds the position from an entry until the
+# next exit and derives equity, trades and statistics with array operations only, so 30
+# years of daily bars take about a millisecond.
+# Signals are evaluated on a bar's close and filled at that close; the position earns the
+# returns from the next bar on. cost_bps is charged on every entry and every exit.
+# Stored columns the strategies use, besides the date. With other indicator parameters
+# than the stored ones the indicator is computed from close instead
+COLUMNS = ('close', 'rsi', 'macd_hist')
+PERIODS_PER_YEAR = 252
+# name -> (function, default parameters); every function takes the bars (a dict of float
+# arrays, 'close' and possibly the other COLUMNS, one value per bar in time order) and
+# returns (entries, exits). Indicator parameters come first, so a grid in signature order
+# keeps the combinations sharing an indicator next to each other
+STRATEGIES: Dict[str, Tuple[Callable[..., Tuple[np.ndarray, np.ndarray]], Dict[str, Any]]] = {}
+def strategy(name: str):
+    def register(fn):
+        defaults = {
+            param.name: param.default for param in inspect.signature(fn).parameters.values()
+            if param.default is not inspect.Parameter.empty
+        }
+        STRATEGIES[name] = (fn, defaults)
+        return fn
+    return register
+def derived(bars: Dict[Any, np.ndarray], key: Tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+    # Indicator arrays are kept in the bars dict, so a parameter sweep computes each indicator
+    # setting once however many thresholds it is combined with
+    values = bars.get(key)
+    if values is None:
+        values = bars[key] = compute()
+    return values
+def rsi_values(bars: Dict[Any, np.ndarray], period: int) -> np.ndarray:
+    if period == kernel.RSI_PERIOD and 'rsi' in bars:
+        return bars['rsi']
+    def compute():
+        delta = np.diff(bars['close'], prepend=bars['close'][:1])
+        return kernel.rsi_from_deltas(delta, period)[0]
+    return derived(bars, ('rsi', period), compute)
+def macd_hist_values(bars: Dict[Any, np.ndarray], fast: int, slow: int, signal: int) -> np.ndarray:
+    if (fast, slow, signal) == (kernel.MACD_FAST, kernel.MACD_SLOW, kernel.MACD_SIGNAL) and 'macd_hist' in bars:
+        return bars['macd_hist']
+    def compute():
+        line, signal_line, _, _ = kernel.macd(bars['close'], fast, slow, signal)
+        return line - signal_line
+    return derived(bars, ('macd_hist', fast, slow, signal), compute)
+def crossed_below(values: np.ndarray, level: float) -> np.ndarray:
+    # True on the bar that closes below level after one at or above it; NaN never crosses
+    crossed = np.zeros(len(values), dtype=bool)
+    crossed[1:] = (values[:-1] >= level) & (values[1:] < level)
+    return crossed
+def crossed_above(values: np.ndarray, level: float) -> np.ndarray:
+    crossed = np.zeros(len(values), dtype=bool)
+    crossed[1:] = (values[:-1] <= level) & (values[1:] > level)
+    return crossed
+@strategy("rsi")
+def rsi_reversal(bars: Dict[Any, np.ndarray], period: int = kernel.RSI_PERIOD, lower: float = 30.0,
+                 upper: float = 70.0) -> Tuple[np.ndarray, np.ndarray]:
+    # Buy when RSI crosses below lower (oversold), sell when it crosses above upper
+    if lower >= upper:
+        raise ValueError("rsi.lower must be below rsi.upper")
+    rsi = rsi_values(bars, period)
+    return crossed_below(rsi, lower), crossed_above(rsi, upper)
+@strategy("macd")
+def macd_histogram(bars: Dict[Any, np.ndarray], fast: int = kernel.MACD_FAST, slow: int = kernel.MACD_SLOW,
+                   signal: int = kernel.MACD_SIGNAL) -> Tuple[np.ndarray, np.ndarray]:
+    # Long while the MACD histogram is positive: buy when it turns positive, sell when negative
+    if fast >= slow:
+        raise ValueError("macd.fast must be below macd.slow")
+    hist = macd_hist_values(bars, fast, slow, signal)
+    return crossed_above(hist, 0.0), crossed_below(hist, 0.0)
+def signals(bars: Dict[Any, np.ndarray], name: str, params: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    return STRATEGIES[name][0](bars, **params)
+def hold(entries: np.ndarray, exits: np.ndarray) -> np.ndarray:
+    # Position (0 or 1) per bar: the most recent signal wins, an exit over an entry on the same bar.
+    # Forward fill of the signal bars via a running maximum over their indices
+    signal = np.where(exits, 0.0, np.where(entries, 1.0, np.nan))
+    known = np.where(np.isnan(signal), 0, np.arange(len(signal)))
+    np.maximum.accumulate(known, out=known)
+    position = signal[known]
+    return np.nan_to_num(position, nan=0.0)
+def simulate(close: np.ndarray, position: np.ndarray, cost_bps: float) -> Tuple[np.ndarray, np.ndarray]:
+    # (per-bar strategy returns, position held during each bar)
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1.0
+    held = np.zeros(len(position))
+    held[1:] = position[:-1]
+    turnover = np.abs(np.diff(position, prepend=0.0))
+    return (1.0 + held * returns) * (1.0 - turnover * cost_bps / 10_000) - 1.0, held
+def sharpe(strategy_returns: np.ndarray) -> Optional[float]:
+    # Annualized, from the returns after the first bar; None without variation
+    if len(strategy_returns) < 3:
+        return None
+    std = strategy_returns[1:].std(ddof=1)
+    return float(strategy_returns[1:].mean() / std * np.sqrt(PERIODS_PER_YEAR)) if std > 0 else None
+def score(close: np.ndarray, entries: np.ndarray, exits: np.ndarray, cost_bps: float) -> Dict[str, Any]:
+    # The headline numbers of run() without the equity curve and trade list, for sweeps.
+    # The window starts flat, whatever the signals before it were
+    position = hold(entries, exits)
+    strategy_returns, held = simulate(close, position, cost_bps)
+    growth = np.cumprod(1.0 + strategy_returns)
+    return {
+        "total_return": float(growth[-1] - 1.0),
+        "sharpe": sharpe(strategy_returns),
+        "max_drawdown": float((growth / np.maximum.accumulate(growth)).min() - 1.0),
+        "exposure": float(held.mean()),
+        "trades": int(np.count_nonzero(np.diff(position, prepend=0.0) > 0)),
+    }
+def max_drawdown(equity: np.ndarray, drawdowns: np.ndarray) -> Tuple[float, int, int]:
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(equity[:trough + 1]))
+    return float(drawdowns[trough]), peak, trough
+def trade_list(dates: np.ndarray, close: np.ndarray, position: np.ndarray, equity_before: np.ndarray,
+               equity: np.ndarray) -> List[Dict[str, Any]]:
+    # Trade returns come from the equity curve, so they include costs; a trade still open at
+    # the last bar is valued at its close
+    change = np.diff(position, prepend=0.0)
+    entries = np.flatnonzero(change > 0)
+    exits = np.flatnonzero(change < 0)
+    is_open = len(exits) < len(entries)
+    if is_open:
+        exits = np.append(exits, len(position) - 1)
+    returns = equity[exits] / equity_before[entries] - 1.0
+    return [{
+        "entry_date": dates[entry],
+        "entry_price": round(float(close[entry]), 2),
+        "exit_date": dates[exit],
+        "exit_price": round(float(close[exit]), 2),
+        "bars": int(exit - entry),
+        "return": round(float(ret), 6),
+        "open": bool(is_open and i == len(entries) - 1),
+    } for i, (entry, exit, ret) in enumerate(zip(entries, exits, returns))]
+def run(bars: pd.DataFrame, name: str, params: Dict[str, Any], capital: float = 10_000.0,
+        cost_bps: float = 0.0) -> Dict[str, Any]:
+    if len(bars) < 2:
+        raise ValueError("A backtest needs at least 2 daily bars")
+    arrays: Dict[Any, np.ndarray] = {column: bars[column].to_numpy(dtype=float) for column in COLUMNS if column in bars}
+    entries, exits = signals(arrays, name, params)
+    position = hold(entries, exits)
+    dates = bars['date'].to_numpy()
+    close = arrays['close']
+    strategy_returns, held = simulate(close, position, cost_bps)
+    growth = np.cumprod(1.0 + strategy_returns)
+    equity = capital * growth
+    equity_before = np.concatenate(([capital], equity[:-1]))
+    drawdowns = equity / np.maximum.accumulate(equity) - 1.0
+    drawdown, peak, trough = max_drawdown(equity, drawdowns)
+    ratio = sharpe(strategy_returns)
+    years = (np.datetime64(dates[-1]) - np.datetime64(dates[0])) / np.timedelta64(1, 'D') / 365.25
+    trades = trade_list(dates, close, position, equity_before, equity)
+    wins = sum(1 for trade in trades if trade["return"] > 0)
+    stats = {
+        "bars": len(bars),
+        "total_return": round(float(growth[-1] - 1.0), 6),
+        "buy_and_hold_return": round(float(close[-1] / close[0] - 1.0), 6),
+        "cagr": round(float(growth[-1] ** (1 / years) - 1.0), 6) if years > 0 and growth[-1] > 0 else None,
+        "sharpe": round(ratio, 4) if ratio is not None else None,
+        "max_drawdown": round(drawdown, 6),
+        "max_drawdown_start": dates[peak],
+        "max_drawdown_end": dates[trough],
+        "exposure": round(float(held.mean()), 4),
+        "trades": len(trades),
+        "win_rate": round(wins / len(trades), 4) if trades else None,
+    }
+    return {
+        "strategy": name,
+        "params": params,
+        "capital": capital,
+        "cost_bps": cost_bps,
+        "stats": stats,
+        "trades": trades,
+        # column-wise: for 30 years of bars a list per field is several times cheaper to build
+        # and encode than a record per bar
+        "equity_curve": {
+            "date": dates.tolist(),
+            "equity": np.round(equity, 2).tolist(),
+            "drawdown": np.round(drawdowns, 6).tolist(),
+        },
+    }
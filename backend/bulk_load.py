@@ -0,0 +1,156 @@
+import argparse
+import glob
+import hashlib
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+import main
+import db
+import cache
+import compressed
+# Loads many TradingView exports at once: files are parsed and their indicators computed in
+# a process pool, and the results are written in large transactions by this process (SQLite
+# has a single writer). Run from backend/:
+#   python bulk_load.py ../data                    every *.csv below ../data
+#   python bulk_load.py "../data/SP_*.csv" --workers 4
+# Files whose content hash is in ingested_files are skipped, so an interrupted run can simply
+# be started again. Each batch bumps the dataset versions of its symbols, so a running server
+# stops serving cached responses for them as soon as the batch commits.
+logger = logging.getLogger("bulk_load")
+BATCH_ROWS = 1_000_000
+HASH_BLOCK = 1 << 20
+def find_csv_files(patterns: Iterable[str]) -> List[str]:
+    # Directories are searched recursively for *.csv (also .csv.gz, .csv.zst), anything else is a file or glob pattern
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for suffix in compressed.CODECS:
+                paths.extend(glob.glob(os.path.join(pattern, "**", "*" + suffix), recursive=True))
+        else:
+            paths.extend(glob.glob(pattern) or ([pattern] if os.path.isfile(pattern) else []))
+    return sorted(set(os.path.abspath(path) for path in paths))
+def symbol_from_filename(path: str) -> str:
+    # TradingView names exports "<EXCHANGE>_<TICKER>, <timeframe>[_<id>].csv", e.g.
+    # "SP_SPX, 1D_3f2b1.csv"; other file names are used as the symbol as they are
+    name = os.path.basename(path)
+    stem = next((name[:-len(suffix)] for suffix in compressed.CODECS if name.lower().endswith(suffix)),
+                os.path.splitext(name)[0])
+    if "," in stem:
+        stem = stem.split(",", 1)[0].rsplit("_", 1)[-1]
+    return main.normalize_symbol(stem)
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+def prepare(path: str) -> pd.DataFrame:
+    # Runs in a worker process: parse + indicators, the CPU-bound part of an upload
+    with compressed.open_file(path) as f:
+        return main.process_csv_data(f.read())
+def already_ingested(digests: Iterable[str]) -> set:
+    with db.connection(main.DB_PATH) as conn:
+        known = {row[0] for row in conn.execute("SELECT sha256 FROM ingested_files")}
+    return known & set(digests)
+def write_batch(batch: List[Tuple[str, str, str, pd.DataFrame]]):
+    # One transaction for the whole batch; the file hashes commit together with their bars
+    now = datetime.now(timezone.utc).isoformat()
+    with db.connection(main.DB_PATH) as conn:
+        try:
+            for path, digest, symbol, df in batch:
+                main._replace_bars(conn, df, symbol)
+                cache.bump_version(conn, symbol)
+                conn.execute("INSERT OR REPLACE INTO ingested_files VALUES (?, ?, ?, ?, ?)",
+                             (digest, path, symbol, len(df), now))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+def load(paths: List[str], workers: Optional[int] = None, batch_rows: int = BATCH_ROWS,
+         force: bool = False, symbol: Optional[str] = None) -> Dict[str, Any]:
+    start = time.perf_counter()
+    if symbol and len(paths) > 1:
+        raise ValueError("--symbol can only be used with a single file")
+    symbols = {path: main.normalize_symbol(symbol) if symbol else symbol_from_filename(path) for path in paths}
+    seen: Dict[str, str] = {}
+    for path, name in symbols.items():
+        if name in seen:
+            raise ValueError(f"{seen[name]} and {path} are both {name}; each file replaces the symbol's history")
+        seen[name] = path
+    digests = {path: file_digest(path) for path in paths}
+    skip = set() if force else already_ingested(digests.values())
+    todo = [path for path in paths if digests[path] not in skip]
+    summary: Dict[str, Any] = {"files": len(paths), "skipped": len(paths) - len(todo), "loaded": 0,
+                               "failed": [], "records": 0, "bytes": 0}
+    batch: List[Tuple[str, str, str, pd.DataFrame]] = []
+    def flush():
+        write_batch(batch)
+        for path, _, name, df in batch:
+            summary["loaded"] += 1
+            summary["records"] += len(df)
+            summary["bytes"] += os.path.getsize(path)
+            logger.info(f"{name}: {len(df):,} bars from {os.path.basename(path)}")
+        batch.clear()
+    def collect(path: str, result: "Future[pd.DataFrame]"):
+        try:
+            df = result.result()
+        except Exception as e:
+            summary["failed"].append(path)
+            logger.error(f"{os.path.basename(path)}: {e}")
+            return
+        batch.append((path, digests[path], symbols[path], df))
+        if sum(len(item[3]) for item in batch) >= batch_rows:
+            flush()
+    if workers == 0:
+        # in-process, e.g. for debugging
+        for path in todo:
+            future: "Future[pd.DataFrame]" = Future()
+            try:
+                future.set_result(prepare(path))
+            except Exception as e:
+                future.set_exception(e)
+            collect(path, future)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(prepare, path): path for path in todo}
+            for future in as_completed(futures):
+                collect(futures[future], future)
+    if batch:
+        flush()
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+def run():
+    parser = argparse.ArgumentParser(description="Bulk load TradingView daily CSV exports into the database")
+    parser.add_argument("paths", nargs="+", help="CSV files, directories or glob patterns")
+    parser.add_argument("--db", default=main.DB_PATH, help=f"SQLite database (default {main.DB_PATH})")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count, 0 = in-process)")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="Bars per write transaction")
+    parser.add_argument("--symbol", help="Symbol for a single file (default: taken from the file name)")
+    parser.add_argument("--force", action="store_true", help="Also load files that were loaded before")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    logger.setLevel(logging.INFO)
+    main.DB_PATH = args.db
+    main.init_db()
+    paths = find_csv_files(args.paths)
+    if not paths:
+        parser.error("no CSV files found")
+    try:
+        summary = load(paths, args.workers, args.batch_rows, args.force, args.symbol)
+    except ValueError as e:
+        parser.error(str(e))
+    seconds = summary["seconds"]
+    print(f"{summary['loaded']} loaded, {summary['skipped']} skipped (already ingested), "
+          f"{len(summary['failed'])} failed of {summary['files']} files")
+    print(f"{summary['records']:,} bars in {seconds:.2f}s: {summary['records'] / seconds:,.0f} bars/s, "
+          f"{summary['bytes'] / 2**20 / seconds:.1f} MB/s")
+    db.close_all()
+    sys.exit(1 if summary["failed"] else 0)
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", "256"))
+MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_BYTES", str(64 * 2**20)))
+# Version of responses that span every symbol; bumped together with each symbol's version
+ALL_SYMBOLS = "*"
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple, Tuple[bytes, Dict[str, str]]]" = OrderedDict()
+_size = 0
+def create_table(cursor: sqlite3.Cursor):
+    # Dataset versions live in the database, so every uvicorn worker, the ingest workers and
+    # bulk_load.py see the same version, and it survives restarts. A version is a random
+    # number rather than a counter, so a recreated database never repeats an old ETag
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dataset_versions (
+            symbol TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+def dataset_version(conn: sqlite3.Connection, symbol: str) -> int:
+    row = conn.execute("SELECT version FROM dataset_versions WHERE symbol = ?", (symbol,)).fetchone()
+    return row[0] if row else 0
+def bump_version(conn: Any, symbol: str):
+    # Runs inside the transaction that changes the symbol's data, so the new version becomes
+    # visible together with the data; older cache entries and ETags become unreachable
+    conn.executemany("""
+        INSERT INTO dataset_versions (symbol, version) VALUES (?, abs(random()))
+        ON CONFLICT(symbol) DO UPDATE SET version = excluded.version
+    """, [(symbol,), (ALL_SYMBOLS,)])
+def cache_key(endpoint: str, symbol: str, version: int, **params: Any) -> Tuple:
+    return (endpoint, symbol, version) + tuple(sorted(params.items()))
+def etag_for(key: Tuple) -> str:
+    # Derived from the key alone, so a matching If-None-Match is answered without
+    # building (or even looking up) the response body
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+    return f'"{key[2]:x}-{digest}"'
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
+def get(key: Tuple) -> Optional[Tuple[bytes, Dict[str, str]]]:
+    # Returns (body, headers) as stored by put
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+        return entry
+def put(key: Tuple, body: bytes, headers: Optional[Dict[str, str]] = None):
+    global _size
+    if len(body) > MAX_BYTES:
+        return
+    with _lock:
+        old = _entries.pop(key, None)
+        if old is not None:
+            _size -= len(old[0])
+        _entries[key] = (body, headers or {})
+        _size += len(body)
+        while len(_entries) > MAX_ENTRIES or _size > MAX_BYTES:
+            _, (evicted, _) = _entries.popitem(last=False)
+            _size -= len(evicted)
+def clear():
+    global _size
+    with _lock:
+        _entries.clear()
+        _size = 0
@@ -0,0 +1,135 @@
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import metrics
+# Optional column store for the analytical read path (backtests, optimizations, forecasts).
+# Every dataset (symbol, timeframe) is also kept as one .npy file per column: 'date' as int64
+# days since 1970-01-01, the prices and indicators as float64 (NaN for NULL). Readers map the
+# files and slice a date range without copying, and the OS shares the pages between uvicorn
+# workers. SQLite stays the source of truth: the column_store table records which generation
+# of files belongs to each dataset and commits in the same transaction as the bars.
+ROOT = os.environ.get("COLUMN_STORE_DIR") or None
+COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'high_prev_close_diff',
+           'rsi', 'macd_line', 'macd_signal', 'macd_hist')
+# Generations a process keeps mapped
+OPEN_ENTRIES = 256
+_lock = threading.Lock()
+_open: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+def create_table(cursor: sqlite3.Cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS column_store (
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            generation TEXT NOT NULL,
+            rows INTEGER,
+            first_ts TEXT,
+            last_ts TEXT,
+            PRIMARY KEY (symbol, timeframe)
+        ) WITHOUT ROWID
+    """)
+def dataset_dir(symbol: str, timeframe: str) -> str:
+    return os.path.join(ROOT, symbol, timeframe)
+def export(conn: sqlite3.Connection, symbol: str, timeframe: str, since: Optional[str] = None) -> int:
+    # Writes the dataset as it is in the caller's (uncommitted) transaction to a new generation
+    # directory: the files are complete before the directory is renamed into place, and readers
+    # only find it once the transaction commits. A rollback leaves an orphaned directory, which
+    # the next export removes together with the generation it replaces. With `since` the bars
+    # before it are unchanged: they are copied from the current generation, and only the bars
+    # from `since` on are read from SQLite, so an append doesn't re-read the whole history
+    directory = dataset_dir(symbol, timeframe)
+    current = conn.execute("SELECT generation FROM column_store WHERE symbol = ? AND timeframe = ?",
+                           (symbol, timeframe)).fetchone()
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if current is None or name != current[0]:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    with metrics.DB_SECONDS.time(op="column_write"):
+        head = None
+        if since is not None and current is not None:
+            path = os.path.join(directory, current[0])
+            try:
+                days = mapped(path, 'date')
+                keep = int(np.searchsorted(days, np.datetime64(since, 'D').astype(np.int64)))
+                head = [days[:keep]] + [mapped(path, column)[:keep] for column in COLUMNS]
+            except FileNotFoundError:
+                head = None
+        bounds = (since,) if head is not None else ()
+        rows = conn.execute(f"""
+            SELECT ts, {', '.join(COLUMNS)} FROM bars WHERE symbol = ? AND timeframe = ?
+            {'AND ts >= ?' if bounds else ''} ORDER BY ts
+        """, (symbol, timeframe) + bounds).fetchall()
+        dates = np.array([row[0] for row in rows], dtype='datetime64[D]').astype(np.int64)
+        # None becomes NaN
+        values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(COLUMNS))
+        arrays = [dates] + [values[:, i] for i in range(len(COLUMNS))]
+        if head is not None:
+            arrays = [np.concatenate([old, new]) for old, new in zip(head, arrays)]
+        if not len(arrays[0]):
+            conn.execute("DELETE FROM column_store WHERE symbol = ? AND timeframe = ?", (symbol, timeframe))
+            return 0
+        generation = uuid.uuid4().hex
+        staging = os.path.join(directory, f".{generation}")
+        os.makedirs(staging)
+        for name, column in zip(('date',) + COLUMNS, arrays):
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(column))
+        os.rename(staging, os.path.join(directory, generation))
+    first, last = np.datetime_as_string(arrays[0][[0, -1]].view('datetime64[D]')).tolist()
+    conn.execute("""
+        INSERT OR REPLACE INTO column_store (symbol, timeframe, generation, rows, first_ts, last_ts)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (symbol, timeframe, generation, len(arrays[0]), first, last))
+    return len(arrays[0])
+def backfill(conn: sqlite3.Connection) -> List[Tuple[str, str]]:
+    # Datasets stored before the column store was enabled
+    pending = conn.execute("""
+        SELECT symbol, timeframe FROM bars AS b GROUP BY symbol, timeframe HAVING NOT EXISTS (
+            SELECT 1 FROM column_store WHERE symbol = b.symbol AND timeframe = b.timeframe
+        )
+    """).fetchall()
+    for symbol, timeframe in pending:
+        export(conn, symbol, timeframe)
+    return pending
+def mapped(path: str, name: str) -> np.ndarray:
+    # Columns are mapped on first use; a generation is never modified, so the maps stay valid
+    with _lock:
+        arrays = _open.get(path)
+        if arrays is None:
+            arrays = _open[path] = {}
+            while len(_open) > OPEN_ENTRIES:
+                _open.popitem(last=False)
+        else:
+            _open.move_to_end(path)
+        values = arrays.get(name)
+    if values is None:
+        if name == 'date_iso':
+            values = np.datetime_as_string(mapped(path, 'date').view('datetime64[D]'))
+        else:
+            values = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+        with _lock:
+            arrays[name] = values
+    return values
+def read(conn: sqlite3.Connection, symbol: str, timeframe: str, columns: Sequence[str],
+         start: Optional[str] = None, end: Optional[str] = None) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+    # (ISO dates, {column: values}) for the bars from start to end inclusive, as read-only views
+    # of the mapped files; None when the dataset has not been exported (or was just replaced)
+    found = conn.execute("SELECT generation FROM column_store WHERE symbol = ? AND timeframe = ?",
+                         (symbol, timeframe)).fetchone()
+    if found is None:
+        return None
+    path = os.path.join(dataset_dir(symbol, timeframe), found[0])
+    with metrics.DB_SECONDS.time(op="column_read"):
+        try:
+            days = mapped(path, 'date').view('datetime64[D]')
+            lo = np.searchsorted(days, np.datetime64(start, 'D')) if start else 0
+            hi = np.searchsorted(days, np.datetime64(end, 'D'), side='right') if end else len(days)
+            return mapped(path, 'date_iso')[lo:hi], {column: mapped(path, column)[lo:hi] for column in columns}
+        except FileNotFoundError:
+            return None
+def clear():
+    with _lock:
+        _open.clear()
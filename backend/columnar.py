@@ -0,0 +1,61 @@
+import io
+import json
+import importlib.util
+import numpy as np
+from typing import Any, Dict, Optional
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+NPY = "application/x-npy"
+JSON = "application/json"
+# pyarrow is optional; without it the Arrow media type is simply not offered
+HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+MEDIA_TYPES = [ARROW_STREAM, NPY] if HAS_ARROW else [NPY]
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder produces the same document
+    orjson = None
+def negotiate(accept: Optional[str]) -> str:
+    # Picks the columnar type with the highest q-value in the Accept header; JSON stays the
+    # default for browsers and anything that does not ask for a binary type explicitly
+    best, best_q = JSON, 0.0
+    for part in (accept or "").split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        if media_type not in MEDIA_TYPES:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+def to_columns(dates: np.ndarray, values: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # ISO dates and float64 columns as main.read_columns returns them (NULL already NaN)
+    return {'date': dates.astype('datetime64[D]'), **values}
+def encode_npy(columns: Dict[str, np.ndarray]) -> bytes:
+    # One structured array: np.load(...) gives a record array with a datetime64[D] 'date'
+    # field followed by little-endian float64 fields
+    dtype = [(name, '<M8[D]' if name == 'date' else '<f8') for name in columns]
+    array = np.empty(len(columns['date']), dtype=dtype)
+    for name, values in columns.items():
+        array[name] = values
+    out = io.BytesIO()
+    np.lib.format.write_array(out, array, allow_pickle=False)
+    return out.getvalue()
+def encode_arrow(columns: Dict[str, np.ndarray]) -> bytes:
+    import pyarrow as pa
+    table = pa.table({name: pa.array(values, from_pandas=True) for name, values in columns.items()})  # NaN -> null
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+def encode_json(payload: Any) -> bytes:
+    # Same output as JSONResponse.render, without going through jsonable_encoder
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+ENCODERS = {ARROW_STREAM: encode_arrow, NPY: encode_npy}
+def encode(media_type: str, columns: Dict[str, np.ndarray]) -> bytes:
+    return ENCODERS[media_type](columns)
@@ -0,0 +1,82 @@
+import gzip
+import io
+import importlib.util
+from typing import BinaryIO, Optional
+# TradingView CSVs shrink 5-10x with gzip or zstd, so uploads may be compressed. They are
+# spooled as received and decompressed as a stream while parsing; the inflated CSV is never
+# held in memory or on disk as a whole
+HAS_ZSTD = importlib.util.find_spec("zstandard") is not None
+CODECS = {".csv": None, ".csv.gz": "gzip", ".csv.zst": "zstd"}
+SUFFIXES = {codec: suffix for suffix, codec in CODECS.items()}
+BUFFER_SIZE = 1 << 16
+class DecompressionError(ValueError):
+    pass
+def upload_codec(filename: Optional[str]) -> Optional[str]:
+    name = (filename or "").lower()
+    for suffix, codec in CODECS.items():
+        if name.endswith(suffix):
+            if codec == "zstd" and not HAS_ZSTD:
+                raise ValueError("zstd uploads need the zstandard package")
+            return codec
+    raise ValueError(f"File must be a CSV ({', '.join(CODECS)})")
+class DecompressingReader(io.RawIOBase):
+    # Raw stream over a decompressor. seek(0) restarts decompression from the start of the
+    # source, which is all the CSV readers need (header sniffing, the in-memory fallback)
+    def __init__(self, source: BinaryIO, codec: str, owns_source: bool = False):
+        self.source = source
+        self.codec = codec
+        self.owns_source = owns_source
+        self._start = source.tell()
+        self._reader = None
+        self._open()
+    def _open(self):
+        if self._reader is not None:
+            self._reader.close()
+        self.source.seek(self._start)
+        if self.codec == "gzip":
+            self._reader = gzip.GzipFile(fileobj=self.source, mode='rb')
+        else:
+            import zstandard
+            self._reader = zstandard.ZstdDecompressor().stream_reader(self.source, closefd=False,
+                                                                      read_across_frames=True)
+        self._position = 0
+    def readable(self) -> bool:
+        return True
+    def seekable(self) -> bool:
+        return True
+    def readinto(self, buffer) -> int:
+        try:
+            count = self._reader.readinto(buffer)
+        except Exception as e:
+            raise DecompressionError(f"Could not decompress the {self.codec} upload: {e}") from e
+        self._position += count
+        return count
+    def tell(self) -> int:
+        return self._position
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET and offset == 0:
+            self._open()
+        elif not (whence == io.SEEK_CUR and offset == 0):
+            raise io.UnsupportedOperation("compressed uploads can only be rewound")
+        return self._position
+    def close(self):
+        if not self.closed:
+            self._reader.close()
+            if self.owns_source:
+                self.source.close()
+        super().close()
+def open_stream(source: BinaryIO, codec: Optional[str], owns_source: bool = False) -> BinaryIO:
+    # The decompressed view of source from its current position; closing it leaves source
+    # open unless owns_source
+    if codec is None:
+        return source
+    return io.BufferedReader(DecompressingReader(source, codec, owns_source), BUFFER_SIZE)
+def open_file(path: str) -> BinaryIO:
+    # Codec from the file name, as spooled by the upload endpoints
+    codec = upload_codec(path)
+    source = open(path, 'rb')
+    try:
+        return open_stream(source, codec, owns_source=True)
+    except Exception:
+        source.close()
+        raise
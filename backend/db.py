@@ -0,0 +1,75 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+# WAL lets readers keep reading the last committed snapshot while an ingest job writes;
+# synchronous=NORMAL is durable in WAL mode except for the last transactions on power loss
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 30000",
+    "PRAGMA temp_store = MEMORY",
+    f"PRAGMA cache_size = -{int(os.environ.get('DB_CACHE_KB', '65536'))}",
+    f"PRAGMA mmap_size = {int(os.environ.get('DB_MMAP_BYTES', str(256 * 2**20)))}",
+]
+# sqlite3 keeps compiled statements per connection keyed by SQL text, so long-lived pooled
+# connections reuse prepared statements as long as queries are built from constant strings
+STATEMENT_CACHE_SIZE = 256
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+class ConnectionPool:
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return connect(self.path)
+        return self._idle.get()
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+_pools: Dict[Tuple[int, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+def get_pool(path: str) -> ConnectionPool:
+    # Keyed by pid as well, so forked ingest workers never reuse the parent's connections
+    key = (os.getpid(), path)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, ConnectionPool(path))
+    return pool
+@contextmanager
+def connection(path: str) -> Iterator[sqlite3.Connection]:
+    pool = get_pool(path)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+def close_all():
+    with _pools_lock:
+        for key in [key for key in _pools if key[0] == os.getpid()]:
+            _pools.pop(key).close()
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+import kernel
+# pandas wrappers around the shared kernel (also used by api/index.py), so the backend,
+# the indicator registry and the serverless API compute identical values
+def wilder_smooth(values: pd.Series, period: int, initial: Optional[float] = None) -> pd.Series:
+    # Wilder's smoothing (alpha = 1/period) seeded with the SMA of the first `period` values,
+    # or continued from a previous average when `initial` is given.
+    arr = values.to_numpy(dtype=np.float64)
+    smoothed, _ = kernel.wilder_averages(arr, arr, period, initial, initial)
+    return pd.Series(smoothed, index=values.index)
+def calculate_rsi(data: pd.Series, period: int = 14) -> pd.Series:
+    closes = data.to_numpy(dtype=np.float64)
+    return pd.Series(kernel.vectorized(closes, closes, rsi_period=period)['rsi'], index=data.index)
+def calculate_ema(data: pd.Series, period: int, initial: Optional[float] = None) -> pd.Series:
+    return pd.Series(kernel.ema(data.to_numpy(dtype=np.float64), period, initial), index=data.index)
+def calculate_macd(data: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9,
+                   initial: Optional[Dict[str, float]] = None) -> Dict[str, pd.Series]:
+    # `initial` holds the previous 'fast', 'slow' and 'signal' EMA values to resume from.
+    initial = initial or {}
+    closes = data.to_numpy(dtype=np.float64)
+    values = kernel.vectorized(closes, closes, fast=fast, slow=slow, signal=signal, state={
+        'ema_fast': initial.get('fast'), 'ema_slow': initial.get('slow'), 'ema_signal': initial.get('signal')
+    })
+    return {
+        'line': pd.Series(values['macd_line'], index=data.index),
+        'signal': pd.Series(values['macd_signal'], index=data.index),
+        'hist': pd.Series(values['macd_hist'], index=data.index),
+        'fast': pd.Series(values['ema_fast'], index=data.index),
+        'slow': pd.Series(values['ema_slow'], index=data.index)
+    }
@@ -0,0 +1,108 @@
+import os
+import uuid
+import logging
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+logger = logging.getLogger(__name__)
+# "process" keeps CPU-bound parsing/indicator work off the API process's GIL entirely;
+# "thread" avoids the fork/pickle overhead for small deployments
+EXECUTOR_KIND = os.environ.get("INGEST_EXECUTOR", "process")
+# SQLite has a single writer, so more than one ingest worker mostly adds lock contention
+MAX_WORKERS = int(os.environ.get("INGEST_WORKERS", "1"))
+MAX_PENDING = int(os.environ.get("INGEST_MAX_PENDING", "8"))
+# Jobs that fan their work out to a process pool of their own (the optimizer) run on a thread
+# of the API process instead, so they can publish progress while they run
+COORDINATOR_WORKERS = int(os.environ.get("COORDINATOR_JOBS", "1"))
+JOB_HISTORY = 100
+_executor: Optional[Executor] = None
+_coordinator: Optional[Executor] = None
+# Guards _jobs: requests on the server's thread pool submit, list and look up jobs concurrently
+_lock = threading.Lock()
+_jobs: Dict[str, Dict[str, Any]] = {}
+class JobQueueFull(RuntimeError):
+    pass
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if EXECUTOR_KIND == "thread":
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ingest")
+        elif EXECUTOR_KIND == "process":
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+        else:
+            raise ValueError(f"Unknown INGEST_EXECUTOR: {EXECUTOR_KIND}")
+        logger.info(f"Started {EXECUTOR_KIND} pool with {MAX_WORKERS} ingest worker(s)")
+    return _executor
+def get_coordinator() -> Executor:
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = ThreadPoolExecutor(max_workers=COORDINATOR_WORKERS, thread_name_prefix="coordinator")
+    return _coordinator
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+def pending_jobs() -> int:
+    with _lock:
+        return _pending()
+def _pending() -> int:
+    return sum(1 for job in _jobs.values() if not job['future'].done())
+def submit_job(kind: str, fn: Callable[..., Dict[str, Any]], *args: Any,
+               on_success: Optional[Callable[[Dict[str, Any]], None]] = None, coordinator: bool = False,
+               **meta: Any) -> Dict[str, Any]:
+    # A coordinator job gets a report(**progress) callable as its first argument; the last
+    # reported progress is part of the job status until the job finishes
+    job_id = uuid.uuid4().hex
+    job = {"id": job_id, "kind": kind, "created_at": _now(), "finished_at": None, **meta}
+    def finished(future: Future):
+        job['finished_at'] = _now()
+        if future.cancelled() or future.exception() is not None:
+            logger.error(f"Job {job_id} ({kind}) failed: {future.exception() if not future.cancelled() else 'cancelled'}")
+            return
+        logger.info(f"Job {job_id} ({kind}) completed")
+        if on_success is not None:
+            on_success(future.result())
+    def report(**progress: Any):
+        job['progress'] = progress
+    with _lock:
+        # The check and the insert are one step, so concurrent uploads can't overshoot MAX_PENDING
+        if _pending() >= MAX_PENDING:
+            raise JobQueueFull(f"Too many pending jobs ({MAX_PENDING}), try again later")
+        if coordinator:
+            job['future'] = get_coordinator().submit(fn, report, *args)
+        else:
+            job['future'] = get_executor().submit(fn, *args)
+        _jobs[job_id] = job
+        while len(_jobs) > JOB_HISTORY:
+            oldest = next(iter(_jobs))
+            if not _jobs[oldest]['future'].done():
+                break
+            del _jobs[oldest]
+    job['future'].add_done_callback(finished)
+    return job_status(job)
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    future = job['future']
+    status = {key: value for key, value in job.items() if key != 'future'}
+    if not future.done():
+        status['status'] = "running" if future.running() else "queued"
+    elif future.cancelled():
+        status['status'] = "failed"
+        status['error'] = "Job was cancelled"
+    elif future.exception() is not None:
+        status['status'] = "failed"
+        status['error'] = str(future.exception())
+    else:
+        status['status'] = "completed"
+        status['result'] = future.result()
+    return status
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        job = _jobs.get(job_id)
+    return job_status(job) if job else None
+def shutdown():
+    global _executor, _coordinator
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _coordinator is not None:
+        _coordinator.shutdown(wait=False, cancel_futures=True)
+        _coordinator = None
@@ -0,0 +1,183 @@
+import math
+from typing import Dict, List, Optional, Sequence
+# numpy is imported on first use, not with the module: api/index.py imports the kernel at
+# its cold start and only needs the streaming path
+np = None
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+# Per-bar outputs of both paths; the last five are the state needed to resume after that bar
+OUTPUTS = ['high_prev_close_diff', 'rsi', 'macd_line', 'macd_signal', 'macd_hist',
+           'avg_gain', 'avg_loss', 'ema_fast', 'ema_slow', 'ema_signal']
+# Both paths share these semantics:
+# - without a previous close the first bar counts as unchanged (delta 0), so Wilder's averages
+#   are seeded with the mean of the first `rsi_period` gains/losses, at bar rsi_period - 1
+# - RSI is 100 whenever the average loss is 0
+# - every EMA starts at its first input value
+# `state` is the bar before the input: close, avg_gain, avg_loss, ema_fast, ema_slow, ema_signal
+def load_numpy():
+    # numpy once imported, None when it isn't installed
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+def rsi_value(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+def stream(closes: Sequence[float], highs: Sequence[float], state: Optional[Dict[str, float]] = None,
+           rsi_period: int = RSI_PERIOD, fast: int = MACD_FAST, slow: int = MACD_SLOW,
+           signal: int = MACD_SIGNAL) -> Dict[str, List[Optional[float]]]:
+    # Single pass over the bars with O(1) state per indicator; values that are not defined
+    # yet are None
+    state = state or {}
+    prev = state.get('close')
+    avg_gain, avg_loss = state.get('avg_gain'), state.get('avg_loss')
+    if avg_gain is None or avg_loss is None:
+        avg_gain = avg_loss = None
+    ema_fast, ema_slow, ema_signal = state.get('ema_fast'), state.get('ema_slow'), state.get('ema_signal')
+    k_fast, k_slow, k_signal = 2 / (fast + 1), 2 / (slow + 1), 2 / (signal + 1)
+    gain_sum = loss_sum = 0.0
+    seen = 0
+    out: Dict[str, List[Optional[float]]] = {name: [] for name in OUTPUTS}
+    diff_out, rsi_out, line_out, signal_out, hist_out = (out[name] for name in OUTPUTS[:5])
+    gain_out, loss_out, fast_out, slow_out, ema_signal_out = (out[name] for name in OUTPUTS[5:])
+    for close, high in zip(closes, highs):
+        if prev is None:
+            delta = 0.0
+            diff_out.append(None)
+        else:
+            delta = close - prev
+            diff_out.append(high - prev)
+        prev = close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if avg_gain is None:
+            gain_sum += gain
+            loss_sum += loss
+            seen += 1
+            if seen == rsi_period:
+                avg_gain, avg_loss = gain_sum / rsi_period, loss_sum / rsi_period
+        else:
+            avg_gain = (avg_gain * (rsi_period - 1) + gain) / rsi_period
+            avg_loss = (avg_loss * (rsi_period - 1) + loss) / rsi_period
+        rsi_out.append(rsi_value(avg_gain, avg_loss) if avg_gain is not None else None)
+        gain_out.append(avg_gain)
+        loss_out.append(avg_loss)
+        ema_fast = close if ema_fast is None else close * k_fast + ema_fast * (1 - k_fast)
+        ema_slow = close if ema_slow is None else close * k_slow + ema_slow * (1 - k_slow)
+        line = ema_fast - ema_slow
+        ema_signal = line if ema_signal is None else line * k_signal + ema_signal * (1 - k_signal)
+        fast_out.append(ema_fast)
+        slow_out.append(ema_slow)
+        ema_signal_out.append(ema_signal)
+        line_out.append(line)
+        signal_out.append(ema_signal)
+        hist_out.append(line - ema_signal)
+    return out
+def scan(values: "np.ndarray", decay: float, initial: float) -> "np.ndarray":
+    # y[i] = decay * y[i-1] + values[i] with y[-1] = initial. Inside a block of b values y is a
+    # rescaled cumsum; only the block ends are chained in Python. b keeps decay**-b below 100,
+    # which bounds the rounding error of the rescaling to about 100 ulp.
+    load_numpy()
+    n = len(values)
+    if n == 0 or decay <= 0:
+        return np.array(values, dtype=np.float64)
+    b = n if decay >= 1 else max(1, min(n, int(math.log(100.0) / -math.log(decay))))
+    blocks = np.zeros(-(-n // b) * b)
+    blocks[:n] = values
+    blocks = blocks.reshape(-1, b)
+    powers = decay ** np.arange(b)
+    local = np.cumsum(blocks / powers, axis=1) * powers
+    carry = np.empty(len(blocks))
+    y, tail = initial, decay ** b
+    for i, end in enumerate(local[:, -1].tolist()):
+        carry[i] = y
+        y = tail * y + end
+    return (local + carry[:, None] * (decay * powers)).ravel()[:n]
+def ema(values: "np.ndarray", period: int, initial: Optional[float] = None) -> "np.ndarray":
+    load_numpy()
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return values.copy()
+    k = 2 / (period + 1)
+    return scan(k * values, 1 - k, values[0] if initial is None else initial)
+def wilder_averages(gain: "np.ndarray", loss: "np.ndarray", period: int, avg_gain: Optional[float] = None,
+                    avg_loss: Optional[float] = None):
+    # Continued from the given averages, or seeded with the mean of the first `period` values
+    load_numpy()
+    gain, loss = np.asarray(gain, dtype=np.float64), np.asarray(loss, dtype=np.float64)
+    decay = (period - 1) / period
+    if avg_gain is not None and avg_loss is not None:
+        return scan(gain / period, decay, avg_gain), scan(loss / period, decay, avg_loss)
+    out_gain, out_loss = np.full(len(gain), np.nan), np.full(len(loss), np.nan)
+    if len(gain) >= period:
+        for out, values in ((out_gain, gain), (out_loss, loss)):
+            seed = values[:period].mean()
+            out[period - 1] = seed
+            out[period:] = scan(values[period:] / period, decay, seed)
+    return out_gain, out_loss
+def rsi_from_averages(avg_gain: "np.ndarray", avg_loss: "np.ndarray") -> "np.ndarray":
+    load_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, rsi)
+def rsi_from_deltas(delta: "np.ndarray", period: int, avg_gain: Optional[float] = None,
+                    avg_loss: Optional[float] = None):
+    # (rsi, avg_gain, avg_loss) arrays; NaN until the averages are seeded
+    load_numpy()
+    avg_gain, avg_loss = wilder_averages(np.maximum(delta, 0.0), np.maximum(-delta, 0.0), period, avg_gain, avg_loss)
+    rsi = rsi_from_averages(avg_gain, avg_loss)
+    rsi[np.isnan(avg_gain)] = np.nan
+    return rsi, avg_gain, avg_loss
+def macd(close: "np.ndarray", fast: int = MACD_FAST, slow: int = MACD_SLOW, signal: int = MACD_SIGNAL,
+         state: Optional[Dict[str, float]] = None):
+    # (line, signal, ema_fast, ema_slow) arrays; the histogram is line - signal
+    state = state or {}
+    ema_fast = ema(close, fast, state.get('ema_fast'))
+    ema_slow = ema(close, slow, state.get('ema_slow'))
+    line = ema_fast - ema_slow
+    return line, ema(line, signal, state.get('ema_signal')), ema_fast, ema_slow
+def vectorized(closes: Sequence[float], highs: Sequence[float], state: Optional[Dict[str, float]] = None,
+               rsi_period: int = RSI_PERIOD, fast: int = MACD_FAST, slow: int = MACD_SLOW,
+               signal: int = MACD_SIGNAL) -> Dict[str, "np.ndarray"]:
+    # Same results as stream() as float64 arrays (NaN where stream() gives None)
+    load_numpy()
+    state = state or {}
+    close = np.asarray(closes, dtype=np.float64)
+    high = np.asarray(highs, dtype=np.float64)
+    prev_close = np.empty(len(close))
+    prev_close[1:] = close[:-1]
+    if len(close):
+        prev_close[0] = np.nan if state.get('close') is None else state['close']
+    delta = close - prev_close
+    if len(close) and state.get('close') is None:
+        delta[0] = 0.0
+    rsi, avg_gain, avg_loss = rsi_from_deltas(delta, rsi_period, state.get('avg_gain'), state.get('avg_loss'))
+    line, ema_signal, ema_fast, ema_slow = macd(close, fast, slow, signal, state)
+    return {
+        'high_prev_close_diff': high - prev_close,
+        'rsi': rsi,
+        'macd_line': line,
+        'macd_signal': ema_signal,
+        'macd_hist': line - ema_signal,
+        'avg_gain': avg_gain,
+        'avg_loss': avg_loss,
+        'ema_fast': ema_fast,
+        'ema_slow': ema_slow,
+        'ema_signal': ema_signal,
+    }
+def compute(closes: Sequence[float], highs: Sequence[float], state: Optional[Dict[str, float]] = None,
+            **periods: int) -> Dict[str, List[Optional[float]]]:
+    # List output for callers without numpy; uses the vectorized path when numpy is installed
+    if load_numpy() is None:
+        return stream(closes, highs, state, **periods)
+    return {
+        name: [None if math.isnan(v) else v for v in values.tolist()]
+        for name, values in vectorized(closes, highs, state, **periods).items()
+    }
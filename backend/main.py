@@ -1,13 +1,35 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, BinaryIO, Iterator, Callable, Tuple
 import sqlite3
 from datetime import datetime
 import io
+import os
+import time
+import shutil
+import tempfile
+import re
 import logging
+import jobs
+import db
+import cache
+import columnar
+import registry
+import kernel
+import resample
+import metrics
+import compressed
+import backtest
+import optimize
+import predict
+import colstore
+import screener
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 app = FastAPI(title="S&P500 Analysis API")
@@ -17,87 +39,265 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Link"],
 )
+# Responses smaller than GZIP_MIN_BYTES aren't worth compressing; bodies are cached uncompressed
+app.add_middleware(GZipMiddleware, minimum_size=int(os.environ.get("GZIP_MIN_BYTES", "1024")),
+                   compresslevel=int(os.environ.get("GZIP_LEVEL", "6")))
+app.add_middleware(metrics.RequestMetrics)
 DB_PATH = "sp500_data.db"
+# Symbol used by requests that don't pass ?symbol=, and for data stored before multi-symbol support
+DEFAULT_SYMBOL = os.environ.get("DEFAULT_SYMBOL", "SPX")
+SYMBOL_PATTERN = r"^[A-Za-z0-9._:!^=-]{1,32}$"
+# Bars are keyed by ISO date strings, so range filters and cursors are plain dates
+DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+DAILY = "1D"
+MONTHLY = "1M"
+# Weekly, monthly, quarterly and yearly bars, rebuilt from the daily bars on every daily upload
+DERIVED_TIMEFRAMES = list(resample.PERIODS)
+TIMEFRAME_PATTERN = f"^({'|'.join([DAILY] + DERIVED_TIMEFRAMES)})$"
+REQUIRED_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+PRICE_COLUMNS = REQUIRED_COLUMNS[1:]
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+DAILY_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'high_prev_close_diff',
+                 'rsi', 'macd_line', 'macd_signal', 'macd_hist']
+STATE_COLUMNS = ['date', 'close', 'avg_gain', 'avg_loss', 'ema_fast', 'ema_slow', 'ema_signal']
+# DataFrames use 'date', the bars/indicator_state tables key bars by 'ts'
+BAR_COLUMNS = ['ts'] + DAILY_COLUMNS[1:]
+STATE_DB_COLUMNS = ['ts'] + STATE_COLUMNS[1:]
+# Number of trailing bars whose indicator state is kept, so revisions of the most
+# recent (still forming) bars can resume without a full recompute
+STATE_CHECKPOINTS = 5
+CSV_CHUNK_ROWS = int(os.environ.get("CSV_CHUNK_ROWS", "100000"))
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR") or None
+# Raised mid-stream when a CSV can't be ingested chunk by chunk; it is parsed in memory instead
+class StreamingFallback(ValueError):
+    pass
+class UnsortedCSVError(StreamingFallback):
+    pass
+class UntypedCSVError(StreamingFallback):
+    pass
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS daily_data (
-            date TEXT PRIMARY KEY,
-            open REAL,
-            high REAL,
-            low REAL,
-            close REAL,
-            volume REAL,
-            high_prev_close_diff REAL,
-            rsi REAL,
-            macd_line REAL,
-            macd_signal REAL,
-            macd_hist REAL
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS monthly_data (
-            date TEXT PRIMARY KEY,
-            open REAL,
-            high REAL,
-            low REAL,
-            close REAL,
-            volume REAL
-        )
-    """)
-    conn.commit()
-    conn.close()
+    with db.connection(DB_PATH) as conn:
+        cursor = conn.cursor()
+        state_columns = [col[1] for col in cursor.execute("PRAGMA table_info(indicator_state)")]
+        if state_columns and 'symbol' not in state_columns:
+            cursor.execute("ALTER TABLE indicator_state RENAME TO indicator_state_legacy")
+        # Bars of every symbol and timeframe live in one table clustered on its primary key,
+        # so per-symbol range scans read contiguous pages and the key itself is a covering index
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS bars (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                high_prev_close_diff REAL,
+                rsi REAL,
+                macd_line REAL,
+                macd_signal REAL,
+                macd_hist REAL,
+                PRIMARY KEY (symbol, timeframe, ts)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS indicator_state (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                close REAL,
+                avg_gain REAL,
+                avg_loss REAL,
+                ema_fast REAL,
+                ema_slow REAL,
+                ema_signal REAL,
+                PRIMARY KEY (symbol, timeframe, ts)
+            ) WITHOUT ROWID
+        """)
+        # Content hashes of the files loaded by bulk_load.py, so a rerun skips them
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ingested_files (
+                sha256 TEXT PRIMARY KEY,
+                path TEXT,
+                symbol TEXT NOT NULL,
+                records INTEGER,
+                ingested_at TEXT
+            )
+        """)
+        cache.create_table(cursor)
+        colstore.create_table(cursor)
+        screener.create_table(cursor)
+        migrate_single_symbol_tables(cursor)
+        backfilled = resample.backfill(conn)
+        if backfilled:
+            logger.info(f"Derived {', '.join(resample.PERIODS)} bars for {backfilled}")
+        snapshots = screener.backfill(conn)
+        if snapshots:
+            logger.info(f"Built the latest-bar snapshot for {len(snapshots)} symbols")
+        for symbol in set(backfilled) | set(snapshots):
+            cache.bump_version(conn, symbol)
+        if colstore.ROOT:
+            exported = colstore.backfill(conn)
+            if exported:
+                logger.info(f"Exported {len(exported)} datasets to the column store in {colstore.ROOT}")
+        conn.commit()
     logger.info("Database initialized")
-def calculate_rsi(data: pd.Series, period: int = 14) -> pd.Series:
-    delta = data.diff()
-    gain = delta.where(delta > 0, 0.0)
-    loss = -delta.where(delta < 0, 0.0)
-    avg_gain = gain.rolling(window=period, min_periods=period).mean()
-    avg_loss = loss.rolling(window=period, min_periods=period).mean()
-    for i in range(period, len(data)):
-        avg_gain.iloc[i] = (avg_gain.iloc[i-1] * (period - 1) + gain.iloc[i]) / period
-        avg_loss.iloc[i] = (avg_loss.iloc[i-1] * (period - 1) + loss.iloc[i]) / period
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-def calculate_ema(data: pd.Series, period: int) -> pd.Series:
-    return data.ewm(span=period, adjust=False).mean()
-def calculate_macd(data: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, pd.Series]:
-    ema_fast = calculate_ema(data, fast)
-    ema_slow = calculate_ema(data, slow)
-    macd_line = ema_fast - ema_slow
-    macd_signal = calculate_ema(macd_line, signal)
-    macd_hist = macd_line - macd_signal
-    return {
-        'line': macd_line,
-        'signal': macd_signal,
-        'hist': macd_hist
-    }
+def migrate_single_symbol_tables(cursor: sqlite3.Cursor):
+    # Before multi-symbol support there were daily_data/monthly_data tables keyed by date only
+    tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'daily_data' in tables:
+        logger.info(f"Migrating daily_data into bars as {DEFAULT_SYMBOL}/{DAILY}")
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO bars (symbol, timeframe, {', '.join(BAR_COLUMNS)})
+            SELECT ?, ?, {', '.join(DAILY_COLUMNS)} FROM daily_data ORDER BY date
+        """, (DEFAULT_SYMBOL, DAILY))
+        cursor.execute("DROP TABLE daily_data")
+        cache.bump_version(cursor, DEFAULT_SYMBOL)
+    if 'monthly_data' in tables:
+        logger.info(f"Migrating monthly_data into bars as {DEFAULT_SYMBOL}/{MONTHLY}")
+        cursor.execute("""
+            INSERT OR REPLACE INTO bars (symbol, timeframe, ts, open, high, low, close, volume)
+            SELECT ?, ?, date, open, high, low, close, volume FROM monthly_data ORDER BY date
+        """, (DEFAULT_SYMBOL, MONTHLY))
+        cursor.execute("DROP TABLE monthly_data")
+        cache.bump_version(cursor, DEFAULT_SYMBOL)
+    if 'indicator_state_legacy' in tables:
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO indicator_state (symbol, timeframe, {', '.join(STATE_DB_COLUMNS)})
+            SELECT ?, ?, {', '.join(STATE_COLUMNS)} FROM indicator_state_legacy
+        """, (DEFAULT_SYMBOL, DAILY))
+        cursor.execute("DROP TABLE indicator_state_legacy")
+def normalize_symbol(symbol: str) -> str:
+    symbol = (symbol or "").strip().upper()
+    if not re.match(SYMBOL_PATTERN, symbol):
+        raise ValueError(f"Invalid symbol: {symbol!r}")
+    return symbol
+def csv_columns(header: str) -> Dict[str, str]:
+    # Maps the CSV's own header names to REQUIRED_COLUMNS (matched case-insensitively), so
+    # only those columns are parsed and the prices can be given an explicit dtype
+    columns: Dict[str, str] = {}
+    for name in pd.read_csv(io.StringIO(header), nrows=0).columns:
+        key = str(name).lower().strip()
+        if key in REQUIRED_COLUMNS and key not in columns.values():
+            columns[name] = key
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in columns.values()]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+    return columns
+def time_dtype(sample: bytes, columns: Dict[str, str]) -> Any:
+    # Sniffs the time column once from the first data row: epoch seconds are read as numbers,
+    # anything else as strings that epoch_days parses in bulk
+    name = next(name for name, key in columns.items() if key == 'time')
+    first = pd.read_csv(io.BytesIO(sample), usecols=[name], dtype=str, nrows=1)[name].tolist()
+    try:
+        float(first[0])
+        return np.float64
+    except (IndexError, ValueError):
+        return str
+def column_types(sample: bytes, columns: Dict[str, str]) -> Dict[str, Any]:
+    time = time_dtype(sample, columns)
+    return {name: time if key == 'time' else np.float64 for name, key in columns.items()}
+def read_ohlcv_csv(source: Any, columns: Dict[str, str], dtype: Optional[Dict[str, Any]], **kwargs: Any):
+    # With dtype the parser produces float64 columns directly and raises ValueError on
+    # non-numeric values; without it they are coerced to NaN in normalize_ohlcv instead
+    return pd.read_csv(source, usecols=list(columns), dtype=dtype, **kwargs)
+def arrow_csv_options(columns: Dict[str, str], dtype: Dict[str, Any], chunksize: Optional[int] = None,
+                      row_bytes: float = 0) -> Dict[str, Any]:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    options = {"convert_options": pacsv.ConvertOptions(
+        include_columns=list(columns),
+        column_types={name: pa.string() if dtype[name] is str else pa.float64() for name in columns}
+    )}
+    if chunksize:
+        # blocks are sized in bytes, so that a block holds about `chunksize` rows
+        options["read_options"] = pacsv.ReadOptions(block_size=max(int(row_bytes * chunksize), 1 << 14))
+    return options
+def arrow_csv_chunks(fileobj: BinaryIO, columns: Dict[str, str], chunksize: int) -> Iterator[pd.DataFrame]:
+    # pyarrow's multithreaded CSV reader parses numbers about twice as fast as pandas' C
+    # parser, and rounds them correctly
+    import pyarrow.csv as pacsv
+    sample = fileobj.read(1 << 16)
+    fileobj.seek(0)
+    row_bytes = len(sample) / max(sample.count(b"\n"), 1)
+    reader = pacsv.open_csv(fileobj, **arrow_csv_options(columns, column_types(sample, columns), chunksize, row_bytes))
+    for batch in reader:
+        yield batch.to_pandas()
+def parse_ohlcv_csv(csv_content: bytes) -> pd.DataFrame:
+    columns = csv_columns(io.BytesIO(csv_content).readline().decode('utf-8', errors='replace'))
+    dtype = column_types(csv_content[:1 << 16], columns)
+    with metrics.PARSE_SECONDS.time(kind="memory"):
+        try:
+            if columnar.HAS_ARROW:
+                import pyarrow.csv as pacsv
+                df = pacsv.read_csv(io.BytesIO(csv_content), **arrow_csv_options(columns, dtype)).to_pandas()
+            else:
+                df = read_ohlcv_csv(io.BytesIO(csv_content), columns, dtype)
+        except ValueError:
+            df = read_ohlcv_csv(io.BytesIO(csv_content), columns, None)
+        logger.info(f"CSV loaded with {len(df)} rows and columns: {list(df.columns)}")
+        metrics.ROWS_PARSED.inc(len(df), kind="memory")
+        return normalize_ohlcv(df, columns)
+def epoch_days(time: pd.Series) -> np.ndarray:
+    # Days since 1970-01-01 as float64, NaN where unparseable. The column type is sniffed once
+    # from the first value: numbers are epoch seconds (TradingView's default export), anything
+    # else is parsed in one vectorized call, with an explicit format for plain dates and
+    # otherwise the format pandas infers. Datetimes keep their local date, not the UTC one
+    if not pd.api.types.is_numeric_dtype(time):
+        text = time.astype(str).str.strip()
+        first = text[time.notna()].head(1).tolist()
+        try:
+            float(first[0])
+            time = pd.to_numeric(text, errors='coerce')
+        except (IndexError, ValueError):
+            plain = bool(first) and ISO_DATE.match(first[0]) is not None
+            return datetime_days(pd.to_datetime(text, format='%Y-%m-%d' if plain else None, errors='coerce'))
+    return np.floor(time.to_numpy(dtype=np.float64, na_value=np.nan) / 86400)
+def datetime_days(parsed: pd.Series) -> np.ndarray:
+    if parsed.dt.tz is not None:
+        parsed = parsed.dt.tz_localize(None)
+    return ((parsed - pd.Timestamp(0)) // pd.Timedelta(days=1)).to_numpy(dtype=np.float64, na_value=np.nan)
+def normalize_ohlcv(df: pd.DataFrame, columns: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    # Bars are sorted by integer epoch day and keyed by its ISO string, formatted in bulk
+    if columns is None:
+        columns = csv_columns(",".join(f'"{name}"' for name in df.columns))
+    df = df[list(columns)].rename(columns=columns)
+    prices = {}
+    for col in PRICE_COLUMNS:
+        values = df[col]
+        if values.dtype != np.float64:
+            values = pd.to_numeric(values, errors='coerce')
+        prices[col] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    days = epoch_days(df['time'])
+    valid = ~np.isnan(days)
+    for col in ['open', 'high', 'low', 'close']:
+        valid &= ~np.isnan(prices[col])
+    removed = len(df) - int(valid.sum())
+    if removed > 0:
+        logger.info(f"Removed {removed} rows with missing values")
+    days = days[valid].astype(np.int64)
+    order = None if (np.diff(days) >= 0).all() else np.argsort(days, kind='stable')
+    if order is not None:
+        days = days[order]
+    result = pd.DataFrame({'date': np.datetime_as_string(days.astype('datetime64[D]'), unit='D')})
+    for col in PRICE_COLUMNS:
+        result[col] = prices[col][valid] if order is None else prices[col][valid][order]
+    return result
+def compute_indicators(df: pd.DataFrame, state: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    # `state` is an indicator_state row for the bar right before df; without it the
+    # indicators are seeded from the first rows of df.
+    with metrics.INDICATOR_SECONDS.time(indicator="kernel"):
+        values = kernel.vectorized(df['close'].to_numpy(dtype=np.float64), df['high'].to_numpy(dtype=np.float64),
+                                   state if len(df) else None)
+    for name in kernel.OUTPUTS:
+        df[name] = values[name]
+    return df
 def process_monthly_csv_data(csv_content: bytes) -> pd.DataFrame:
     try:
-        df = pd.read_csv(io.BytesIO(csv_content))
-        logger.info(f"Monthly CSV loaded with {len(df)} rows and columns: {list(df.columns)}")
-        df.columns = df.columns.str.lower().str.strip()
-        required_cols = ['time', 'open', 'high', 'low', 'close', 'volume']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
-        df = df[required_cols].copy()
-        df['time'] = pd.to_datetime(df['time'], unit='s', errors='ignore')
-        if df['time'].dtype == 'object':
-            df['time'] = pd.to_datetime(df['time'])
-        df = df.sort_values('time').reset_index(drop=True)
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        initial_len = len(df)
-        df = df.dropna(subset=['time', 'open', 'high', 'low', 'close'])
-        removed = initial_len - len(df)
-        if removed > 0:
-            logger.info(f"Removed {removed} rows with missing values")
-        df = df.rename(columns={'time': 'date'})
-        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+        df = parse_ohlcv_csv(csv_content)
         logger.info(f"Monthly processing complete. Final dataset: {len(df)} rows")
         return df
     except Exception as e:
@@ -105,246 +305,846 @@ def process_monthly_csv_data(csv_content: bytes) -> pd.DataFrame:
         raise
 def process_csv_data(csv_content: bytes) -> pd.DataFrame:
     try:
-        df = pd.read_csv(io.BytesIO(csv_content))
-        logger.info(f"CSV loaded with {len(df)} rows and columns: {list(df.columns)}")
-        df.columns = df.columns.str.lower().str.strip()
-        required_cols = ['time', 'open', 'high', 'low', 'close', 'volume']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required columns: {missing_cols}")
-        df = df[required_cols].copy()
-        df['time'] = pd.to_datetime(df['time'], unit='s', errors='ignore')
-        if df['time'].dtype == 'object':
-            df['time'] = pd.to_datetime(df['time'])
-        df = df.sort_values('time').reset_index(drop=True)
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        initial_len = len(df)
-        df = df.dropna(subset=['time', 'open', 'high', 'low', 'close'])
-        removed = initial_len - len(df)
-        if removed > 0:
-            logger.info(f"Removed {removed} rows with missing values")
-        df['high_prev_close_diff'] = df['high'] - df['close'].shift(1)
-        df['rsi'] = calculate_rsi(df['close'], period=14)
-        macd_values = calculate_macd(df['close'], fast=12, slow=26, signal=9)
-        df['macd_line'] = macd_values['line']
-        df['macd_signal'] = macd_values['signal']
-        df['macd_hist'] = macd_values['hist']
-        df = df.rename(columns={'time': 'date'})
-        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+        df = compute_indicators(parse_ohlcv_csv(csv_content))
         logger.info(f"Processing complete. Final dataset: {len(df)} rows")
         return df
     except Exception as e:
         logger.error(f"Error processing CSV: {str(e)}")
         raise
-def save_to_db(df: pd.DataFrame):
-    conn = sqlite3.connect(DB_PATH)
+def _append_bars(conn: sqlite3.Connection, df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    # Returns only the bars that are new or changed compared to the stored daily bars, with
+    # indicators resumed from the nearest stored checkpoint before the first changed date.
+    if df.empty:
+        return compute_indicators(df)
+    stored = pd.read_sql_query(
+        """SELECT ts AS date, open, high, low, close, volume FROM bars
+        WHERE symbol = ? AND timeframe = ? AND ts >= ?""",
+        conn, params=(symbol, DAILY, df['date'].iloc[0])
+    )
+    merged = df.merge(stored, on='date', how='left', suffixes=('', '_stored'))
+    changed = np.zeros(len(merged), dtype=bool)
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        new, old = merged[col].to_numpy(dtype=float), merged[f'{col}_stored'].to_numpy(dtype=float)
+        changed |= ~((new == old) | (np.isnan(new) & np.isnan(old)))
+    changed |= merged['close_stored'].isna().to_numpy()
+    if not changed.any():
+        logger.info(f"Append {symbol}: no new or changed bars")
+        return compute_indicators(df.iloc[0:0].copy())
+    first_changed = merged.loc[changed, 'date'].iloc[0]
+    cursor = conn.execute(f"""
+        SELECT {', '.join(STATE_DB_COLUMNS)} FROM indicator_state
+        WHERE symbol = ? AND timeframe = ? AND ts < ? AND avg_gain IS NOT NULL AND avg_loss IS NOT NULL
+        ORDER BY ts DESC LIMIT 1
+    """, (symbol, DAILY, first_changed))
+    checkpoint = cursor.fetchone()
+    state = dict(zip(STATE_COLUMNS, checkpoint)) if checkpoint else None
+    since = state['date'] if state else ''
+    history = pd.read_sql_query(
+        """SELECT ts AS date, open, high, low, close, volume FROM bars
+        WHERE symbol = ? AND timeframe = ? AND ts > ? ORDER BY ts""",
+        conn, params=(symbol, DAILY, since)
+    )
+    parts = [history[~history['date'].isin(df['date'])], df[df['date'] > since]]
+    bars = pd.concat([part for part in parts if not part.empty])
+    bars = bars.sort_values('date').reset_index(drop=True)
+    if state is None:
+        logger.info(f"Append {symbol}: no checkpoint before {first_changed}, recomputing {len(bars)} bars")
+    else:
+        logger.info(f"Append {symbol}: resuming from {since}, computing {len(bars)} bars")
+    return compute_indicators(bars, state)
+def process_csv_append(csv_content: bytes, symbol: str = DEFAULT_SYMBOL) -> pd.DataFrame:
     try:
-        df.to_sql('daily_data', conn, if_exists='replace', index=False)
-        conn.commit()
-        logger.info(f"Saved {len(df)} records to daily_data table")
+        df = parse_ohlcv_csv(csv_content)
+        with db.connection(DB_PATH) as conn:
+            return _append_bars(conn, df, symbol)
     except Exception as e:
-        conn.rollback()
-        logger.error(f"Error saving to database: {str(e)}")
+        logger.error(f"Error processing CSV for append: {str(e)}")
         raise
+def iter_ohlcv_chunks(fileobj: BinaryIO, chunksize: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    # Parses the CSV incrementally so only one chunk of raw rows is in memory at a time.
+    # The text wrapper is detached afterwards so the caller's file stays open and seekable.
+    columns = csv_columns(fileobj.readline().decode('utf-8', errors='replace'))
+    fileobj.seek(0)
+    chunksize = chunksize or CSV_CHUNK_ROWS
+    text = None
+    if columnar.HAS_ARROW:
+        chunks = arrow_csv_chunks(fileobj, columns, chunksize)
+    else:
+        dtype = column_types(fileobj.read(1 << 16), columns)
+        fileobj.seek(0)
+        text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+        chunks = read_ohlcv_csv(text, columns, dtype, chunksize=chunksize)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            except ValueError as e:
+                raise UntypedCSVError(f"CSV has non-numeric prices ({e})") from e
+            bars = normalize_ohlcv(chunk, columns)
+            metrics.PARSE_SECONDS.observe(time.perf_counter() - start, kind="stream")
+            metrics.ROWS_PARSED.inc(len(chunk), kind="stream")
+            yield bars
     finally:
-        conn.close()
-def save_monthly_to_db(df: pd.DataFrame):
-    conn = sqlite3.connect(DB_PATH)
+        if text is not None:
+            text.detach()
+def parse_ohlcv_stream(fileobj: BinaryIO) -> pd.DataFrame:
+    # parse_ohlcv_csv for a file object, parsed chunk by chunk so the raw CSV (e.g. a decompressed
+    # upload) is never in memory as a whole; only the parsed bars are
     try:
-        df[['date', 'open', 'high', 'low', 'close', 'volume']].to_sql(
-            'monthly_data', conn, if_exists='replace', index=False
+        chunks = [chunk for chunk in iter_ohlcv_chunks(fileobj) if not chunk.empty]
+    except UntypedCSVError as e:
+        logger.warning(f"{e}; falling back to in-memory processing")
+        chunks = []
+    if not chunks:
+        fileobj.seek(0)
+        return parse_ohlcv_csv(fileobj.read())
+    df = pd.concat(chunks, ignore_index=True)
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date', kind='stable', ignore_index=True)
+    return df
+def _stream_chunks(conn: sqlite3.Connection, fileobj: BinaryIO, mode: str, symbol: str) -> Dict[str, Any]:
+    total, start, end, last_seen, warmup = 0, None, None, None, None
+    for chunk in iter_ohlcv_chunks(fileobj):
+        if chunk.empty:
+            continue
+        if last_seen is not None and chunk['date'].iloc[0] < last_seen:
+            raise UnsortedCSVError(f"CSV rows are not in ascending time order after {last_seen}")
+        last_seen = chunk['date'].iloc[-1]
+        if mode == "append":
+            bars = _append_bars(conn, chunk, symbol)
+            total += len(bars)
+        else:
+            if warmup is not None:
+                # Too few bars so far to seed RSI, so recompute them together with this chunk
+                bars = compute_indicators(pd.concat([warmup, chunk], ignore_index=True))
+            elif total:
+                state = conn.execute(f"""
+                    SELECT {', '.join(STATE_DB_COLUMNS)} FROM indicator_state
+                    WHERE symbol = ? AND timeframe = ? ORDER BY ts DESC LIMIT 1
+                """, (symbol, DAILY)).fetchone()
+                bars = compute_indicators(chunk, dict(zip(STATE_COLUMNS, state)))
+            else:
+                bars = compute_indicators(chunk)
+            warmup = bars[['date', 'open', 'high', 'low', 'close', 'volume']] if pd.isna(bars['avg_loss'].iloc[-1]) else None
+            total += len(chunk)
+        if bars.empty:
+            continue
+        _write_bars(conn, bars, symbol)
+        start = bars['date'].iloc[0] if start is None else min(start, bars['date'].iloc[0])
+        end = bars['date'].iloc[-1] if end is None else max(end, bars['date'].iloc[-1])
+    return {"records_processed": total, "start": start, "end": end}
+def _clear_bars(conn: sqlite3.Connection, symbol: str, timeframe: str):
+    # Clearing the daily bars also drops the bars derived from them; the caller materializes
+    # them again from its first daily bar
+    if timeframe == DAILY:
+        resample.clear(conn, symbol)
+    conn.execute("DELETE FROM bars WHERE symbol = ? AND timeframe = ?", (symbol, timeframe))
+    conn.execute("DELETE FROM indicator_state WHERE symbol = ? AND timeframe = ?", (symbol, timeframe))
+def ingest_csv_stream(fileobj: BinaryIO, mode: str = "replace", symbol: str = DEFAULT_SYMBOL) -> Dict[str, Any]:
+    # Streams a daily CSV into the bars table chunk by chunk inside one transaction. Indicator
+    # state is carried across chunk boundaries, so the result equals process_csv_data +
+    # save_to_db (or upsert_to_db in append mode) while peak memory stays at one chunk.
+    with db.connection(DB_PATH) as conn:
+        try:
+            if mode == "replace":
+                _clear_bars(conn, symbol, DAILY)
+            try:
+                summary = _stream_chunks(conn, fileobj, mode, symbol)
+            except StreamingFallback as e:
+                # TradingView exports are ascending and numeric; anything else is handled in memory
+                logger.warning(f"{e}; falling back to in-memory processing")
+                conn.rollback()
+                if mode == "replace":
+                    _clear_bars(conn, symbol, DAILY)
+                fileobj.seek(0)
+                df = parse_ohlcv_csv(fileobj.read())
+                bars = _append_bars(conn, df, symbol) if mode == "append" else compute_indicators(df)
+                if len(bars):
+                    _write_bars(conn, bars, symbol)
+                summary = {
+                    "records_processed": len(bars),
+                    "start": bars['date'].iloc[0] if len(bars) else None,
+                    "end": bars['date'].iloc[-1] if len(bars) else None
+                }
+            if summary["start"]:
+                resample.materialize(conn, symbol, summary["start"])
+            screener.refresh(conn, symbol)
+            if mode == "replace":
+                _export_columns(conn, symbol, [DAILY] + DERIVED_TIMEFRAMES)
+            elif summary["start"]:
+                _export_columns(conn, symbol, [DAILY] + DERIVED_TIMEFRAMES, summary["start"])
+            cache.bump_version(conn, symbol)
+            conn.commit()
+            logger.info(f"Saved {summary['records_processed']} {symbol} daily records ({mode})")
+            return summary
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error ingesting CSV: {str(e)}")
+            raise
+def _write_bars(conn: sqlite3.Connection, df: pd.DataFrame, symbol: str, timeframe: str = DAILY):
+    with metrics.DB_SECONDS.time(op="write"):
+        key = (symbol, timeframe)
+        conn.executemany(
+            f"""INSERT INTO bars (symbol, timeframe, {', '.join(BAR_COLUMNS)})
+            VALUES ({', '.join('?' * (len(BAR_COLUMNS) + 2))})
+            ON CONFLICT(symbol, timeframe, ts) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in BAR_COLUMNS[1:])}""",
+            (key + row for row in df[DAILY_COLUMNS].itertuples(index=False, name=None))
         )
-        conn.commit()
-        logger.info(f"Saved {len(df)} records to monthly_data table")
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Error saving monthly data to database: {str(e)}")
-        raise
+        conn.execute(
+            "DELETE FROM indicator_state WHERE symbol = ? AND timeframe = ? AND ts >= ?",
+            key + (df['date'].iloc[0],)
+        )
+        conn.executemany(
+            f"""INSERT OR REPLACE INTO indicator_state (symbol, timeframe, {', '.join(STATE_DB_COLUMNS)})
+            VALUES ({', '.join('?' * (len(STATE_DB_COLUMNS) + 2))})""",
+            (key + row for row in df[STATE_COLUMNS].tail(STATE_CHECKPOINTS).itertuples(index=False, name=None))
+        )
+        conn.execute("""
+            DELETE FROM indicator_state WHERE symbol = ? AND timeframe = ? AND ts NOT IN (
+                SELECT ts FROM indicator_state WHERE symbol = ? AND timeframe = ? ORDER BY ts DESC LIMIT ?
+            )
+        """, key + key + (STATE_CHECKPOINTS,))
+def _export_columns(conn: sqlite3.Connection, symbol: str, timeframes: List[str], since: Optional[str] = None):
+    # Part of the caller's transaction, right before its commit. `since` is the first daily bar
+    # an append wrote: bars of earlier periods are unchanged, so only the rest is exported again
+    if colstore.ROOT:
+        for timeframe in timeframes:
+            start = resample.period_start(since, timeframe) if since and timeframe != DAILY else since
+            colstore.export(conn, symbol, timeframe, start)
+def _replace_bars(conn: sqlite3.Connection, df: pd.DataFrame, symbol: str):
+    # Replaces the symbol's daily bars with df (indicators computed) inside the caller's transaction
+    _clear_bars(conn, symbol, DAILY)
+    if len(df):
+        _write_bars(conn, df, symbol)
+        resample.materialize(conn, symbol, df['date'].iloc[0])
+    screener.refresh(conn, symbol)
+    _export_columns(conn, symbol, [DAILY] + DERIVED_TIMEFRAMES)
+def save_to_db(df: pd.DataFrame, symbol: str = DEFAULT_SYMBOL):
+    with db.connection(DB_PATH) as conn:
+        try:
+            _replace_bars(conn, df, symbol)
+            cache.bump_version(conn, symbol)
+            conn.commit()
+            logger.info(f"Saved {len(df)} {symbol} daily records")
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error saving to database: {str(e)}")
+            raise
+def upsert_to_db(df: pd.DataFrame, symbol: str = DEFAULT_SYMBOL):
+    if df.empty:
+        return
+    with db.connection(DB_PATH) as conn:
+        try:
+            _write_bars(conn, df, symbol)
+            resample.materialize(conn, symbol, df['date'].iloc[0])
+            screener.refresh(conn, symbol)
+            _export_columns(conn, symbol, [DAILY] + DERIVED_TIMEFRAMES, df['date'].iloc[0])
+            cache.bump_version(conn, symbol)
+            conn.commit()
+            logger.info(f"Upserted {len(df)} {symbol} daily records")
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error upserting to database: {str(e)}")
+            raise
+def save_monthly_to_db(df: pd.DataFrame, symbol: str = DEFAULT_SYMBOL):
+    with db.connection(DB_PATH) as conn:
+        try:
+            _clear_bars(conn, symbol, MONTHLY)
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars (symbol, timeframe, ts, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((symbol, MONTHLY) + row for row in df[['date', 'open', 'high', 'low', 'close', 'volume']].itertuples(index=False, name=None))
+            )
+            _export_columns(conn, symbol, [MONTHLY])
+            cache.bump_version(conn, symbol)
+            conn.commit()
+            logger.info(f"Saved {len(df)} {symbol} monthly records")
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error saving monthly data to database: {str(e)}")
+            raise
+def check_csv_header(fileobj: BinaryIO, codec: Optional[str] = None):
+    stream = compressed.open_stream(fileobj, codec)
+    header = stream.readline().decode('utf-8', errors='replace')
+    if stream is not fileobj:
+        stream.close()
+    fileobj.seek(0)
+    csv_columns(header)
+async def spool_upload(file: UploadFile, codec: Optional[str] = None) -> str:
+    # Copies the upload (still compressed) to a named file so an ingest worker (possibly
+    # another process) can read it; the suffix tells compressed.open_file how to decompress it
+    await file.seek(0)
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=compressed.SUFFIXES[codec], dir=UPLOAD_DIR)
+    with os.fdopen(fd, 'wb') as out:
+        await run_in_threadpool(shutil.copyfileobj, file.file, out, 1024 * 1024)
+    return path
+def ingest_daily_file(path: str, mode: str = "replace", symbol: str = DEFAULT_SYMBOL) -> Dict[str, Any]:
+    try:
+        with compressed.open_file(path) as f:
+            summary = ingest_csv_stream(f, mode, symbol)
+        return {
+            "status": "success",
+            "message": "CSV uploaded and processed successfully",
+            "symbol": symbol,
+            "mode": mode,
+            "records_processed": summary["records_processed"],
+            "date_range": {
+                "start": summary["start"],
+                "end": summary["end"]
+            }
+        }
     finally:
-        conn.close()
+        os.remove(path)
+def ingest_monthly_file(path: str, symbol: str = DEFAULT_SYMBOL) -> Dict[str, Any]:
+    try:
+        with compressed.open_file(path) as f:
+            df = parse_ohlcv_stream(f)
+        logger.info(f"Monthly processing complete. Final dataset: {len(df)} rows")
+        save_monthly_to_db(df, symbol)
+        return {
+            "status": "success",
+            "message": "Monthly CSV uploaded successfully",
+            "symbol": symbol,
+            "records_processed": len(df),
+            "date_range": {
+                "start": df['date'].min() if len(df) else None,
+                "end": df['date'].max() if len(df) else None
+            }
+        }
+    finally:
+        os.remove(path)
+async def submit_upload(file: UploadFile, kind: str, symbol: str, fn, *args, codec: Optional[str] = None,
+                        profile: bool = False) -> JSONResponse:
+    path = await spool_upload(file, codec)
+    try:
+        job = jobs.submit_job(kind, metrics.instrumented, fn, profile, path, *args, on_success=metrics.merge_result,
+                              filename=file.filename, symbol=symbol)
+    except Exception:
+        os.remove(path)
+        raise
+    return JSONResponse(status_code=202, content={
+        "status": "queued",
+        "message": "Upload received, processing in the background",
+        "job_id": job['id'],
+        "status_url": f"/api/jobs/{job['id']}"
+    })
+def symbol_query() -> Any:
+    return Query(DEFAULT_SYMBOL, pattern=SYMBOL_PATTERN, description="Ticker, e.g. SPX or ES1!")
+def date_query(description: str) -> Any:
+    return Query(None, pattern=DATE_PATTERN, description=description)
+def profile_query() -> Any:
+    return Query(False, description="Add a cProfile breakdown of the upload to the job result")
+def dataset_version(symbol: str) -> int:
+    with db.connection(DB_PATH) as conn:
+        return cache.dataset_version(conn, symbol)
+def cached_response(request: Request, endpoint: str, symbol: str, build: Callable[[], Any],
+                    links: Optional[Callable[[Any], Dict[str, str]]] = None,
+                    media_type: str = columnar.JSON, **params: Any) -> Response:
+    # Responses are cached per dataset version, which every write for the symbol bumps in its
+    # own transaction, so neither a cached body nor a matching ETag can outlive its data.
+    # `links` derives extra headers (pagination) from the payload; they are cached with the body.
+    # For any other media type than JSON, build returns the encoded body itself
+    key = cache.cache_key(endpoint, symbol, dataset_version(symbol), media_type=media_type, **params)
+    headers = {"ETag": cache.etag_for(key), "Cache-Control": "no-cache", "Vary": "Accept"}
+    if cache.etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    entry = cache.get(key)
+    if entry is None:
+        payload = build()
+        if media_type == columnar.JSON:
+            with metrics.SERIALIZE_SECONDS.time(endpoint=endpoint, media_type=media_type):
+                body = columnar.encode_json(payload)
+        else:
+            body = payload
+        metrics.SERIALIZED_BYTES.inc(len(body), endpoint=endpoint, media_type=media_type)
+        entry = (body, links(payload) if links else {})
+        cache.put(key, *entry)
+    body, extra = entry
+    return Response(body, media_type=media_type, headers={**headers, **extra})
 @app.on_event("startup")
 async def startup_event():
     init_db()
+@app.on_event("shutdown")
+async def shutdown_event():
+    jobs.shutdown()
+    db.close_all()
 @app.get("/")
 async def root():
     return {"status": "ok", "message": "S&P500 Analysis API"}
 @app.post("/api/upload")
-async def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(file: UploadFile = File(...), mode: str = "replace", symbol: str = symbol_query(),
+                     profile: bool = profile_query()):
     try:
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="File must be a CSV")
-        content = await file.read()
-        df = process_csv_data(content)
-        save_to_db(df)
-        return {
-            "status": "success",
-            "message": "CSV uploaded and processed successfully",
-            "records_processed": len(df),
-            "date_range": {
-                "start": df['date'].min(),
-                "end": df['date'].max()
-            }
-        }
+        codec = compressed.upload_codec(file.filename)
+        if mode not in ("replace", "append"):
+            raise HTTPException(status_code=400, detail="mode must be 'replace' or 'append'")
+        await file.seek(0)
+        check_csv_header(file.file, codec)
+        symbol = normalize_symbol(symbol)
+        return await submit_upload(file, "daily", symbol, ingest_daily_file, mode, symbol, codec=codec,
+                                   profile=profile)
+    except HTTPException:
+        raise
+    except jobs.JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+@app.get("/api/metrics")
+def get_metrics():
+    # Prometheus text format; ingest metrics include completed jobs from worker processes
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+@app.get("/api/jobs/{job_id}")
+def get_job_status(job_id: str):
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+def parse_fields(fields: Optional[str], available: Dict[str, tuple]) -> List[str]:
+    # Returns the requested response fields in canonical order, so equal projections share
+    # one SQL statement and one cache entry; 'date' is always returned
+    if not fields:
+        return list(available)
+    names = {name.strip().lower() for name in fields.split(",") if name.strip()}
+    unknown = sorted(names - set(available) - {'date'})
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}. Available: {['date'] + list(available)}")
+    return [name for name in available if name in names]
+def query_bars(symbol: str, timeframe: str, columns: List[str], limit: Optional[int],
+               start: Optional[str] = None, end: Optional[str] = None,
+               after: Optional[str] = None, before: Optional[str] = None) -> List[tuple]:
+    # Every filter becomes one half-open range [lo, hi) on the primary key, so a page is an
+    # index range scan of `limit` rows however deep into the history it starts (no OFFSET).
+    # "ts > after" is written as "ts >= after + NUL", the smallest string sorting after it.
+    lo = max(start or "", after + "\0" if after else "")
+    hi = min(end + "\0" if end else "~", before or "~")
+    order = "ASC" if after else "DESC"
+    query = f"""
+        SELECT ts, {', '.join(columns)}
+        FROM bars
+        WHERE symbol = ? AND timeframe = ? AND ts >= ? AND ts < ?
+        ORDER BY ts {order}
+        LIMIT ?
+    """
+    with db.connection(DB_PATH) as conn, metrics.DB_SECONDS.time(op="read"):
+        # LIMIT -1 is unbounded
+        rows = conn.execute(query, (symbol, timeframe, lo, hi, limit or -1)).fetchall()
+    if order == "DESC":
+        rows.reverse()
+    return rows
+def read_columns(symbol: str, timeframe: str, columns: List[str], start: Optional[str] = None,
+                 end: Optional[str] = None, limit: Optional[int] = None, after: Optional[str] = None,
+                 before: Optional[str] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    # (ISO dates, float arrays per column) for the analytical endpoints and the columnar
+    # responses, paged like query_bars. With the column store these are views of the mapped
+    # files, treat them as read-only
+    if colstore.ROOT:
+        # after/before are exclusive, the column store's bounds inclusive
+        lo = max(filter(None, [start, after and str(np.datetime64(after, 'D') + 1)]), default=None)
+        hi = min(filter(None, [end, before and str(np.datetime64(before, 'D') - 1)]), default=None)
+        with db.connection(DB_PATH) as conn:
+            found = colstore.read(conn, symbol, timeframe, columns, lo, hi)
+        if found is not None:
+            dates, values = found
+            if limit:
+                # the `limit` oldest bars after a cursor, otherwise the newest
+                page = slice(None, limit) if after else slice(max(len(dates) - limit, 0), None)
+                dates, values = dates[page], {column: array[page] for column, array in values.items()}
+            return dates, values
+    rows = query_bars(symbol, timeframe, columns, limit, start=start, end=end, after=after, before=before)
+    dates = np.array([row[0] for row in rows], dtype=str)
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(columns))
+    return dates, {column: values[:, i] for i, column in enumerate(columns)}
+def page_links(request: Request, rows: List[Dict[str, Any]], limit: Optional[int], after: Optional[str]) -> Dict[str, str]:
+    # A full page may have more rows behind it: after=... pages forward in time, otherwise
+    # the next page is the one before the oldest returned bar
+    if not limit or len(rows) < limit:
+        return {}
+    if after:
+        url = request.url.remove_query_params("before").include_query_params(after=rows[-1]['date'])
+    else:
+        url = request.url.remove_query_params("after").include_query_params(before=rows[0]['date'])
+    return {"Link": f'<{url}>; rel="next"'}
+# Response field -> stored columns; the order is the response order and 'macd' stays last
+DAILY_FIELDS = {
+    'open': ('open',),
+    'high': ('high',),
+    'low': ('low',),
+    'close': ('close',),
+    'volume': ('volume',),
+    'high_prev_close_diff': ('high_prev_close_diff',),
+    'rsi': ('rsi',),
+    'macd': ('macd_line', 'macd_signal', 'macd_hist'),
+}
+MONTHLY_FIELDS = {name: DAILY_FIELDS[name] for name in ['open', 'high', 'low', 'close', 'volume']}
+def rounded(column: str) -> str:
+    # JSON responses show 2 decimals and whole volumes; SQLite does that in C while stepping
+    # the rows, the stored values keep full precision for indicators and columnar exports.
+    # Integer arithmetic instead of ROUND(), which formats every value through printf and
+    # rounds halves away from zero. The result is exactly Python's round(value, 2): the exact
+    # binary value is rounded, ties to even (97.125 -> 97.12, 2.675 -> 2.67); only values
+    # whose scaled fraction is .5 take the slower branch
+    if column == 'volume':
+        return f"CAST({column} AS INTEGER)"
+    scaled = f"{column} * 100"
+    whole = f"CAST({scaled} AS INTEGER)"
+    sign = f"(CASE WHEN {column} < 0 THEN -1 ELSE 1 END)"
+    excess = f"abs({scaled} - {whole})"
+    # Rounding error of column * 100 (Dekker's product with a Veltkamp split), for products
+    # that rounded onto .5 although the exact value is just above or below it
+    high = f"({column} * 134217729 - ({column} * 134217729 - {column}))"
+    error = f"({high} * 100 - {scaled} + ({column} - {high}) * 100)"
+    return f"""(CASE WHEN {excess} < 0.5 THEN {whole}
+        WHEN {excess} > 0.5 OR {error} * {sign} > 0 OR {error} = 0 AND {whole} % 2 != 0 THEN {whole} + {sign}
+        ELSE {whole} END) / 100.0"""
+def bar_rows(symbol: str, timeframe: str, available: Dict[str, tuple], fields: List[str],
+             limit: Optional[int], **bounds: Optional[str]) -> List[Dict[str, Any]]:
+    columns = [rounded(column) for name in fields for column in available[name]]
+    rows = query_bars(symbol, timeframe, columns, limit, **bounds)
+    if 'macd' not in fields:
+        keys = ['date'] + fields
+        return [dict(zip(keys, row)) for row in rows]
+    keys = ['date'] + fields[:-1]
+    return [
+        dict(zip(keys, row), macd={"line": row[-3], "signal": row[-2], "hist": row[-1]})
+        for row in rows
+    ]
+def daily_data(symbol: str, limit: int, fields: Optional[List[str]] = None, **bounds: Optional[str]) -> List[Dict[str, Any]]:
+    result = bar_rows(symbol, DAILY, DAILY_FIELDS, fields or list(DAILY_FIELDS), limit, **bounds)
+    logger.info(f"Returned {len(result)} records")
+    return result
+def daily_columns(symbol: str, limit: Optional[int], fields: List[str], media_type: str, **bounds: Optional[str]) -> bytes:
+    # Unrounded stored values as one float64 array per column; built once per dataset version
+    # and then served from the response cache as-is
+    names = [column for name in fields for column in DAILY_FIELDS[name]]
+    dates, values = read_columns(symbol, DAILY, names, limit=limit, **bounds)
+    logger.info(f"Returned {len(dates)} records as {media_type}")
+    with metrics.SERIALIZE_SECONDS.time(endpoint="daily-data", media_type=media_type):
+        return columnar.encode(media_type, columnar.to_columns(dates, values))
 @app.get("/api/daily-data")
-async def get_daily_data(limit: int = 60) -> List[Dict[str, Any]]:
+def get_daily_data(request: Request, limit: Optional[int] = Query(None, ge=1, description="Default 60 for JSON, unlimited for columnar formats"),
+                   symbol: str = symbol_query(),
+                   start: Optional[str] = date_query("First date to return (inclusive)"),
+                   end: Optional[str] = date_query("Last date to return (inclusive)"),
+                   after: Optional[str] = date_query("Keyset cursor: the `limit` bars after this date, oldest first"),
+                   before: Optional[str] = date_query("Keyset cursor: the `limit` bars before this date"),
+                   fields: Optional[str] = Query(None, description="Comma separated fields, e.g. close,rsi")):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM daily_data")
-        count = cursor.fetchone()[0]
-        if count == 0:
-            conn.close()
-            return []
-        query = """
-            SELECT
-                date,
-                open,
-                high,
-                low,
-                close,
-                volume,
-                high_prev_close_diff,
-                rsi,
-                macd_line,
-                macd_signal,
-                macd_hist
-            FROM daily_data
-            ORDER BY date DESC
-            LIMIT ?
-        """
-        cursor.execute(query, (limit,))
-        rows = cursor.fetchall()
-        result = []
-        for row in rows:
-            result.append({
-                "date": row[0],
-                "open": round(row[1], 2) if row[1] is not None else None,
-                "high": round(row[2], 2) if row[2] is not None else None,
-                "low": round(row[3], 2) if row[3] is not None else None,
-                "close": round(row[4], 2) if row[4] is not None else None,
-                "volume": int(row[5]) if row[5] is not None else None,
-                "high_prev_close_diff": round(row[6], 2) if row[6] is not None else None,
-                "rsi": round(row[7], 2) if row[7] is not None else None,
-                "macd": {
-                    "line": round(row[8], 2) if row[8] is not None else None,
-                    "signal": round(row[9], 2) if row[9] is not None else None,
-                    "hist": round(row[10], 2) if row[10] is not None else None
-                }
-            })
-        result.reverse()
-        conn.close()
-        logger.info(f"Returned {len(result)} records")
-        return result
+        symbol = normalize_symbol(symbol)
+        selected = parse_fields(fields, DAILY_FIELDS)
+        bounds = {"start": start, "end": end, "after": after, "before": before}
+        media_type = columnar.negotiate(request.headers.get("accept"))
+        if media_type != columnar.JSON:
+            return cached_response(request, "daily-data", symbol,
+                                   lambda: daily_columns(symbol, limit, selected, media_type, **bounds),
+                                   media_type=media_type, limit=limit, fields=tuple(selected), **bounds)
+        limit = limit or 60
+        return cached_response(request, "daily-data", symbol,
+                               lambda: daily_data(symbol, limit, selected, **bounds),
+                               links=lambda rows: page_links(request, rows, limit, after),
+                               limit=limit, fields=tuple(selected), **bounds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
-@app.get("/api/stats")
-async def get_stats():
+# Query parameters of /api/indicators that are not indicator parameters
+INDICATOR_QUERY = {"name", "symbol", "timeframe", "limit", "start", "end"}
+def load_ohlcv(symbol: str, timeframe: str) -> pd.DataFrame:
+    with db.connection(DB_PATH) as conn, metrics.DB_SECONDS.time(op="read"):
+        return pd.read_sql_query(
+            """SELECT ts AS date, open, high, low, close, volume FROM bars
+            WHERE symbol = ? AND timeframe = ? ORDER BY ts""",
+            conn, params=(symbol, timeframe)
+        )
+def indicator_data(symbol: str, timeframe: str, name: str, params: Dict[str, Any], limit: Optional[int],
+                   start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+    # Computed over the full history (recursive indicators depend on every earlier bar) and
+    # memoized per dataset version, so other windows or limits only slice the result
+    result = registry.compute(name, params, (symbol, timeframe, dataset_version(symbol)),
+                              lambda: load_ohlcv(symbol, timeframe))
+    if start:
+        result = result[result['date'] >= start]
+    if end:
+        result = result[result['date'] <= end]
+    if limit:
+        result = result.tail(limit)
+    return result.round(2).astype(object).where(result.notna(), None).to_dict('records')
+@app.get("/api/indicators")
+def get_indicator(request: Request, name: str, symbol: str = symbol_query(),
+                  timeframe: str = Query(DAILY, pattern=TIMEFRAME_PATTERN),
+                  limit: Optional[int] = Query(60, ge=1),
+                  start: Optional[str] = date_query("First date to return (inclusive)"),
+                  end: Optional[str] = date_query("Last date to return (inclusive)")):
+    # Any other query parameter is an indicator parameter, e.g. ?name=rsi&period=7
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*), MIN(date), MAX(date) FROM daily_data")
-        row = cursor.fetchone()
-        conn.close()
-        return {
-            "total_records": row[0],
-            "date_range": {
-                "start": row[1],
-                "end": row[2]
-            }
+        symbol = normalize_symbol(symbol)
+        name = name.lower()
+        params = registry.parse_params(name, {
+            key: value for key, value in request.query_params.items() if key not in INDICATOR_QUERY
+        })
+        return cached_response(request, "indicators", symbol,
+                               lambda: indicator_data(symbol, timeframe, name, params, limit, start, end),
+                               name=name, timeframe=timeframe, limit=limit, start=start, end=end,
+                               params=tuple(sorted(params.items())))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing indicator: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/api/indicators/list")
+def list_indicators():
+    return {name: defaults for name, (fn, defaults) in sorted(registry.INDICATORS.items())}
+BACKTEST_QUERY = {"strategy", "symbol", "start", "end", "capital", "cost_bps"}
+def backtest_data(symbol: str, name: str, params: Dict[str, Any], capital: float, cost_bps: float,
+                  start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+    # The stored RSI/MACD columns are computed over the full history, so a start date only
+    # limits the traded window
+    dates, columns = read_columns(symbol, DAILY, list(backtest.COLUMNS), start, end)
+    bars = pd.DataFrame({'date': dates, **columns})
+    result = backtest.run(bars, name, params, capital, cost_bps)
+    logger.info(f"Backtested {name} over {len(bars)} {symbol} bars: {result['stats']['trades']} trades")
+    return {"symbol": symbol, **result}
+@app.get("/api/backtest")
+def get_backtest(request: Request, strategy: str, symbol: str = symbol_query(),
+                 start: Optional[str] = date_query("First date to trade (inclusive)"),
+                 end: Optional[str] = date_query("Last date to trade (inclusive)"),
+                 capital: float = Query(10_000.0, gt=0, description="Starting equity"),
+                 cost_bps: float = Query(0.0, ge=0, description="Cost per entry and per exit, in basis points")):
+    # Any other query parameter is a strategy parameter, e.g. ?strategy=rsi&lower=25&upper=75
+    try:
+        symbol = normalize_symbol(symbol)
+        name = strategy.lower()
+        params = registry.parse_params(name, {
+            key: value for key, value in request.query_params.items() if key not in BACKTEST_QUERY
+        }, backtest.STRATEGIES, "strategy")
+        return cached_response(request, "backtest", symbol,
+                               lambda: backtest_data(symbol, name, params, capital, cost_bps, start, end),
+                               name=name, start=start, end=end, capital=capital, cost_bps=cost_bps,
+                               params=tuple(sorted(params.items())))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running backtest: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/api/backtest/strategies")
+def list_strategies():
+    return {name: defaults for name, (fn, defaults) in sorted(backtest.STRATEGIES.items())}
+class OptimizeRequest(BaseModel):
+    strategy: str
+    # values per strategy parameter, e.g. {"period": [7, 14], "lower": [25, 30]}; others keep their default
+    grid: Dict[str, List[float]] = Field(default_factory=dict)
+    start: Optional[str] = Field(None, pattern=DATE_PATTERN)
+    end: Optional[str] = Field(None, pattern=DATE_PATTERN)
+    # walk-forward train window; without it only the full history is ranked
+    train_years: Optional[int] = Field(None, ge=1)
+    test_years: int = Field(1, ge=1)
+    metric: str = "sharpe"
+    cost_bps: float = Field(0.0, ge=0)
+def optimize_job(report: Callable[..., None], symbol: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    # Coordinator job, on a thread of the API process; the sweep itself runs in optimize's pool
+    dates, columns = read_columns(symbol, DAILY, ['close'], request['start'], request['end'])
+    close = np.ascontiguousarray(columns['close'])
+    result = optimize.sweep(report, dates, close, request['strategy'], request['grid'], request['train_years'],
+                            request['test_years'], request['cost_bps'], request['metric'])
+    return {"symbol": symbol, **result}
+@app.post("/api/optimize")
+def post_optimize(body: OptimizeRequest, symbol: str = symbol_query()):
+    try:
+        symbol = normalize_symbol(symbol)
+        request = body.model_dump()
+        request['strategy'] = request['strategy'].lower()
+        if request['metric'] not in optimize.METRICS:
+            raise ValueError(f"metric must be one of {list(optimize.METRICS)}")
+        combinations = len(optimize.expand_grid(request['strategy'], request['grid']))
+        job = jobs.submit_job("optimize", optimize_job, symbol, request, coordinator=True,
+                              symbol=symbol, strategy=request['strategy'], combinations=combinations)
+    except jobs.JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(status_code=202, content={
+        "status": "queued",
+        "message": f"Optimizing {combinations} combinations in the background",
+        "job_id": job['id'],
+        "status_url": f"/api/jobs/{job['id']}"
+    })
+def train_model(symbol: str, model: str, horizon: int) -> Dict[str, Any]:
+    dates, columns = read_columns(symbol, DAILY, list(predict.COLUMNS))
+    if not len(dates):
+        raise ValueError(f"No daily data for {symbol}")
+    entry = predict.train(columns, model, horizon)
+    logger.info(f"Trained {model} (horizon {horizon}) on {entry['trained_on']} {symbol} bars")
+    return {**entry, "dates": dates.tolist()}
+def predict_data(symbol: str, model: str, horizon: int, limit: int) -> Dict[str, Any]:
+    # The model is fitted once per dataset version; every request after that only slices its predictions
+    entry = predict.cached((symbol, dataset_version(symbol), model, horizon),
+                           lambda: train_model(symbol, model, horizon))
+    history = predict.rows(entry, limit)
+    return {
+        "symbol": symbol,
+        "model": model,
+        "horizon": horizon,
+        # logistic: probability that the close `horizon` bars later is higher; ridge: expected return
+        "target": "probability_up" if model == "logistic" else "expected_return",
+        "latest": history[-1],
+        "trained_on": entry["trained_on"],
+        "holdout": entry["holdout"],
+        "coefficients": entry["coefficients"],
+        "history": history,
+    }
+@app.get("/api/predict")
+def get_predict(request: Request, symbol: str = symbol_query(),
+                model: str = Query("logistic", pattern=f"^({'|'.join(predict.MODELS)})$"),
+                horizon: int = Query(1, ge=1, le=60, description="Bars ahead to forecast"),
+                limit: int = Query(20, ge=1, le=5000, description="Recent bars to return predictions for")):
+    try:
+        symbol = normalize_symbol(symbol)
+        return cached_response(request, "predict", symbol, lambda: predict_data(symbol, model, horizon, limit),
+                               model=model, horizon=horizon, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error predicting: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+def screen_data(sql: str, params: tuple) -> Dict[str, Any]:
+    with db.connection(DB_PATH) as conn, metrics.DB_SECONDS.time(op="read"):
+        results = screener.screen(conn, sql, params)
+    return {"count": len(results), "results": results}
+@app.get("/api/screen")
+def get_screen(request: Request,
+               conditions: Optional[str] = Query(None, alias="filter",
+                                                 description="e.g. rsi<30,macd_hist>0,prev_macd_hist<=0"),
+               sort: Optional[str] = Query(None, description="Fields, '-' for descending, e.g. -change"),
+               limit: int = Query(screener.DEFAULT_LIMIT, ge=1, le=5000)):
+    # Every symbol's latest daily bar; cached until any symbol's data changes
+    try:
+        sql, params = screener.build_query(conditions, sort, limit)
+        return cached_response(request, "screen", cache.ALL_SYMBOLS, lambda: screen_data(sql, params),
+                               sql=sql, params=params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error screening: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+def daily_stats(symbol: str) -> Dict[str, Any]:
+    with db.connection(DB_PATH) as conn:
+        row = conn.execute(
+            "SELECT COUNT(*), MIN(ts), MAX(ts) FROM bars WHERE symbol = ? AND timeframe = ?",
+            (symbol, DAILY)
+        ).fetchone()
+    return {
+        "symbol": symbol,
+        "total_records": row[0],
+        "date_range": {
+            "start": row[1],
+            "end": row[2]
         }
+    }
+@app.get("/api/stats")
+def get_stats(request: Request, symbol: str = symbol_query()):
+    try:
+        symbol = normalize_symbol(symbol)
+        return cached_response(request, "stats", symbol, lambda: daily_stats(symbol))
     except Exception as e:
         logger.error(f"Error fetching stats: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 @app.post("/api/upload-monthly")
-async def upload_monthly_csv(file: UploadFile = File(...)):
+async def upload_monthly_csv(file: UploadFile = File(...), symbol: str = symbol_query(),
+                             profile: bool = profile_query()):
     try:
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(status_code=400, detail="File must be a CSV")
-        content = await file.read()
-        df = process_monthly_csv_data(content)
-        save_monthly_to_db(df)
-        return {
-            "status": "success",
-            "message": "Monthly CSV uploaded successfully",
-            "records_processed": len(df),
-            "date_range": {
-                "start": df['date'].min(),
-                "end": df['date'].max()
-            }
-        }
+        codec = compressed.upload_codec(file.filename)
+        await file.seek(0)
+        check_csv_header(file.file, codec)
+        symbol = normalize_symbol(symbol)
+        return await submit_upload(file, "monthly", symbol, ingest_monthly_file, symbol, codec=codec,
+                                   profile=profile)
+    except HTTPException:
+        raise
+    except jobs.JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Monthly upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+def monthly_data(symbol: str, limit: Optional[int], fields: Optional[List[str]] = None, **bounds: Optional[str]) -> List[Dict[str, Any]]:
+    result = bar_rows(symbol, MONTHLY, MONTHLY_FIELDS, fields or list(MONTHLY_FIELDS), limit, **bounds)
+    logger.info(f"Returned {len(result)} monthly records")
+    return result
 @app.get("/api/monthly-data")
-async def get_monthly_data(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+def get_monthly_data(request: Request, limit: Optional[int] = Query(None, ge=1), symbol: str = symbol_query(),
+                     start: Optional[str] = date_query("First date to return (inclusive)"),
+                     end: Optional[str] = date_query("Last date to return (inclusive)"),
+                     after: Optional[str] = date_query("Keyset cursor: the `limit` bars after this date, oldest first"),
+                     before: Optional[str] = date_query("Keyset cursor: the `limit` bars before this date"),
+                     fields: Optional[str] = Query(None, description="Comma separated fields, e.g. close,volume")):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM monthly_data")
-        count = cursor.fetchone()[0]
-        if count == 0:
-            conn.close()
-            return []
-        if limit:
-            query = """
-                SELECT date, open, high, low, close, volume
-                FROM monthly_data
-                ORDER BY date DESC
-                LIMIT ?
-            """
-            cursor.execute(query, (limit,))
-        else:
-            query = """
-                SELECT date, open, high, low, close, volume
-                FROM monthly_data
-                ORDER BY date DESC
-            """
-            cursor.execute(query)
-        rows = cursor.fetchall()
-        result = []
-        for row in rows:
-            result.append({
-                "date": row[0],
-                "open": round(row[1], 2) if row[1] is not None else None,
-                "high": round(row[2], 2) if row[2] is not None else None,
-                "low": round(row[3], 2) if row[3] is not None else None,
-                "close": round(row[4], 2) if row[4] is not None else None,
-                "volume": int(row[5]) if row[5] is not None else None
-            })
-        result.reverse()
-        conn.close()
-        logger.info(f"Returned {len(result)} monthly records")
-        return result
+        symbol = normalize_symbol(symbol)
+        selected = parse_fields(fields, MONTHLY_FIELDS)
+        bounds = {"start": start, "end": end, "after": after, "before": before}
+        return cached_response(request, "monthly-data", symbol,
+                               lambda: monthly_data(symbol, limit, selected, **bounds),
+                               links=lambda rows: page_links(request, rows, limit, after),
+                               limit=limit, fields=tuple(selected), **bounds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching monthly data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+def monthly_stats(symbol: str) -> Dict[str, Any]:
+    with db.connection(DB_PATH) as conn:
+        row = conn.execute(
+            "SELECT COUNT(*), MIN(ts), MAX(ts) FROM bars WHERE symbol = ? AND timeframe = ?",
+            (symbol, MONTHLY)
+        ).fetchone()
+    return {
+        "symbol": symbol,
+        "total_records": row[0],
+        "date_range": {
+            "start": row[1],
+            "end": row[2]
+        }
+    }
 @app.get("/api/monthly-stats")
-async def get_monthly_stats():
+def get_monthly_stats(request: Request, symbol: str = symbol_query()):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*), MIN(date), MAX(date) FROM monthly_data")
-        row = cursor.fetchone()
-        conn.close()
-        return {
-            "total_records": row[0],
-            "date_range": {
-                "start": row[1],
-                "end": row[2]
-            }
-        }
+        symbol = normalize_symbol(symbol)
+        return cached_response(request, "monthly-stats", symbol, lambda: monthly_stats(symbol))
     except Exception as e:
         logger.error(f"Error fetching monthly stats: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+def period_data(symbol: str, timeframe: str, limit: Optional[int], fields: Optional[List[str]] = None,
+                **bounds: Optional[str]) -> List[Dict[str, Any]]:
+    result = bar_rows(symbol, timeframe, MONTHLY_FIELDS, fields or list(MONTHLY_FIELDS), limit, **bounds)
+    logger.info(f"Returned {len(result)} {timeframe} records")
+    return result
+@app.get("/api/bars")
+def get_bars(request: Request, timeframe: str = Query(..., pattern=f"^({'|'.join(DERIVED_TIMEFRAMES)})$"),
+             limit: Optional[int] = Query(None, ge=1), symbol: str = symbol_query(),
+             start: Optional[str] = date_query("First date to return (inclusive)"),
+             end: Optional[str] = date_query("Last date to return (inclusive)"),
+             after: Optional[str] = date_query("Keyset cursor: the `limit` bars after this date, oldest first"),
+             before: Optional[str] = date_query("Keyset cursor: the `limit` bars before this date"),
+             fields: Optional[str] = Query(None, description="Comma separated fields, e.g. close,volume")):
+    # Bars derived from the daily data; a bar's date is the first day of its period
+    try:
+        symbol = normalize_symbol(symbol)
+        selected = parse_fields(fields, MONTHLY_FIELDS)
+        bounds = {"start": start, "end": end, "after": after, "before": before}
+        return cached_response(request, "bars", symbol,
+                               lambda: period_data(symbol, timeframe, limit, selected, **bounds),
+                               links=lambda rows: page_links(request, rows, limit, after),
+                               timeframe=timeframe, limit=limit, fields=tuple(selected), **bounds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching {timeframe} data: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
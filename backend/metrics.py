@@ -0,0 +1,171 @@
+import cProfile
+import multiprocessing
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+# Prometheus text exposition without a client library: counters and histograms keyed by
+# their label values, rendered on GET /api/metrics
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROFILE_ENTRIES = 30
+_lock = threading.Lock()
+_registry: List["Metric"] = []
+class Metric:
+    kind = ""
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: Dict[Tuple[str, ...], Any] = {}
+        _registry.append(self)
+    def key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[label]) for label in self.labels)
+    def label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{label}="{escape(value)}"' for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+class Counter(Metric):
+    kind = "counter"
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self.key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    def merge(self, key: Tuple[str, ...], value: float):
+        self.values[key] = self.values.get(key, 0) + value
+    def render(self) -> List[str]:
+        return [f"{self.name}{self.label_text(key)} {format_value(value)}" for key, value in sorted(self.values.items())]
+class Histogram(Metric):
+    kind = "histogram"
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+    def observe(self, value: float, **labels: Any):
+        key = self.key(labels)
+        with _lock:
+            counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self.values[key] = (counts, total + value)
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    def merge(self, key: Tuple[str, ...], value: Tuple[List[int], float]):
+        counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+        self.values[key] = ([a + b for a, b in zip(counts, value[0])], total + value[1])
+    def render(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else format_value(bound)
+                bucket = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{self.label_text(key, bucket)} {cumulative}")
+            lines.append(f"{self.name}_sum{self.label_text(key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{self.label_text(key)} {cumulative}")
+        return lines
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency by route template",
+                            ("method", "endpoint", "status"))
+ROWS_PARSED = Counter("csv_rows_parsed_total", "CSV rows parsed and normalized", ("kind",))
+PARSE_SECONDS = Histogram("csv_parse_seconds", "Time parsing and normalizing one CSV chunk", ("kind",))
+INDICATOR_SECONDS = Histogram("indicator_compute_seconds", "Indicator computation time", ("indicator",))
+DB_SECONDS = Histogram("db_seconds", "Time spent in SQLite reads and writes", ("op",))
+SERIALIZE_SECONDS = Histogram("response_serialize_seconds", "Time encoding a response body",
+                              ("endpoint", "media_type"))
+SERIALIZED_BYTES = Counter("response_serialized_bytes_total", "Bytes of encoded response bodies",
+                           ("endpoint", "media_type"))
+def render() -> str:
+    lines = []
+    with _lock:
+        for metric in _registry:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+def snapshot() -> Dict[str, Dict[Tuple[str, ...], Any]]:
+    with _lock:
+        return {metric.name: dict(metric.values) for metric in _registry if metric.values}
+def merge(values: Dict[str, Dict[Tuple[str, ...], Any]]):
+    by_name = {metric.name: metric for metric in _registry}
+    with _lock:
+        for name, series in values.items():
+            for key, value in series.items():
+                by_name[name].merge(tuple(key), value)
+def reset():
+    with _lock:
+        for metric in _registry:
+            metric.values.clear()
+def profile_entries(profiler: cProfile.Profile, limit: int = PROFILE_ENTRIES) -> List[Dict[str, Any]]:
+    # The functions with the highest cumulative time, like `python -m cProfile -s cumulative`
+    stats = pstats.Stats(profiler).stats
+    entries = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{
+        "function": f"{os.path.basename(filename)}:{line}({name})",
+        "calls": calls,
+        "tottime": round(tottime, 6),
+        "cumtime": round(cumtime, 6),
+    } for (filename, line, name), (_, calls, tottime, cumtime, _) in entries]
+def instrumented(fn: Callable[..., Dict[str, Any]], profile: bool, *args: Any) -> Dict[str, Any]:
+    # Entry point of ingest jobs. Jobs usually run in a worker process, so the metrics they
+    # record are returned in the result and merged into the API process by merge_result().
+    # With profile the result also gets a cProfile breakdown of the job
+    worker = multiprocessing.parent_process() is not None
+    if worker:
+        reset()  # values inherited from the parent on fork
+    profiler = cProfile.Profile() if profile else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        result = fn(*args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    if profiler is not None:
+        result["profile"] = {"total_seconds": round(time.perf_counter() - start, 6),
+                             "functions": profile_entries(profiler)}
+    if worker:
+        result["metrics"] = snapshot()
+    return result
+def merge_result(result: Dict[str, Any]):
+    # Called in the API process when a job completes
+    values = result.pop("metrics", None)
+    if values:
+        merge(values)
+class RequestMetrics:
+    # ASGI middleware recording http_request_duration_seconds. The endpoint label is the
+    # matched route's path template, so path parameters don't create new series
+    def __init__(self, app: Any):
+        self.app = app
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        async def send_status(message: Dict[str, Any]):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"],
+                                    endpoint=getattr(route, "path", "unmatched"), status=status)
@@ -0,0 +1,169 @@
+import itertools
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+import backtest
+logger = logging.getLogger(__name__)
+# Parameter sweeps and walk-forward optimization of the backtest strategies. The closes are
+# copied once into a shared memory block that every worker maps, so the workers only receive
+# parameter combinations and send back scores. Combinations are cut into a few chunks per
+# worker, in grid order, so the combinations sharing an indicator setting (e.g. one RSI
+# period with every threshold) mostly land in the same worker and compute it once.
+WORKERS = int(os.environ.get("OPTIMIZER_WORKERS", "0")) or os.cpu_count() or 1
+MAX_COMBINATIONS = int(os.environ.get("OPTIMIZER_MAX_COMBINATIONS", "100000"))
+CHUNKS_PER_WORKER = 4
+# Indicator arrays a worker keeps between chunks
+WORKER_CACHE_ENTRIES = 64
+TOP = 10
+# Ranking metrics; all are better when higher (max_drawdown is negative)
+METRICS = ("sharpe", "total_return", "max_drawdown")
+Window = Tuple[int, int, int, int]
+_shm: Optional[shared_memory.SharedMemory] = None
+_bars: Dict[Any, np.ndarray] = {}
+def expand_grid(name: str, grid: Dict[str, Sequence[float]]) -> List[Dict[str, Any]]:
+    # Every combination of the grid values in the strategy's parameter order; parameters
+    # missing from the grid keep their default
+    if name not in backtest.STRATEGIES:
+        raise ValueError(f"Unknown strategy: {name!r}. Available: {sorted(backtest.STRATEGIES)}")
+    defaults = backtest.STRATEGIES[name][1]
+    unknown = sorted(set(grid) - set(defaults))
+    if unknown:
+        raise ValueError(f"Unknown parameters for {name}: {unknown}. Available: {sorted(defaults)}")
+    axes = []
+    for key, default in defaults.items():
+        values = list(grid.get(key, [default]))
+        if not values:
+            raise ValueError(f"{name}.{key} needs at least one value")
+        for value in values:
+            if value <= 0 or (isinstance(default, int) and value != int(value)):
+                raise ValueError(f"{name}.{key} values must be positive {type(default).__name__}s, got {value!r}")
+        axes.append([type(default)(value) for value in dict.fromkeys(values)])
+    total = math.prod(len(axis) for axis in axes)
+    if total > MAX_COMBINATIONS:
+        raise ValueError(f"The grid has {total} combinations, at most {MAX_COMBINATIONS} are allowed")
+    return [dict(zip(defaults, values)) for values in itertools.product(*axes)]
+def walk_forward_windows(dates: Sequence[str], train_years: int, test_years: int) -> List[Window]:
+    # (train_start, train_end, test_start, test_end) bar indices, ends exclusive: fit on
+    # train_years, evaluate on the following test_years, then move both by test_years. The
+    # last test window may be shorter
+    dates = np.asarray(dates)
+    first, last = pd.Timestamp(str(dates[0])), pd.Timestamp(str(dates[-1]))
+    windows = []
+    for k in itertools.count():
+        train_start = first + pd.DateOffset(years=k * test_years)
+        train_end = train_start + pd.DateOffset(years=train_years)
+        if train_end > last:
+            break
+        test_end = train_end + pd.DateOffset(years=test_years)
+        a, b, c = np.searchsorted(dates, [moment.strftime('%Y-%m-%d') for moment in (train_start, train_end, test_end)]).tolist()
+        if c - b >= 2:
+            windows.append((a, b, b, c))
+    return windows
+def attach(name: str, length: int):
+    # Pool initializer: map the closes published by sweep()
+    global _shm
+    _shm = shared_memory.SharedMemory(name=name)
+    _bars.clear()
+    _bars['close'] = np.ndarray((length,), dtype=np.float64, buffer=_shm.buf)
+def evaluate(name: str, combos: List[Tuple[int, Dict[str, Any]]], windows: List[Window], cost_bps: float,
+             metric: str) -> List[Tuple[int, Dict[str, Any], List[Tuple[float, Dict[str, Any]]]]]:
+    # Runs in a worker: per combination the full-history score, and per window the train
+    # metric with the test score. Invalid combinations (e.g. lower >= upper) are left out
+    close = _bars['close']
+    results = []
+    for index, params in combos:
+        try:
+            entries, exits = backtest.signals(_bars, name, params)
+        except ValueError:
+            continue
+        full = backtest.score(close, entries, exits, cost_bps)
+        per_window = [(rank(backtest.score(close[a:b], entries[a:b], exits[a:b], cost_bps), metric),
+                       backtest.score(close[c:d], entries[c:d], exits[c:d], cost_bps))
+                      for a, b, c, d in windows]
+        results.append((index, full, per_window))
+    if len(_bars) > WORKER_CACHE_ENTRIES:
+        close = _bars['close']
+        _bars.clear()
+        _bars['close'] = close
+    return results
+def rank(scores: Dict[str, Any], metric: str) -> float:
+    value = scores[metric]
+    return -math.inf if value is None else value
+def rounded(scores: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: round(value, 6) if isinstance(value, float) else value for key, value in scores.items()}
+def leaderboard(combos: List[Dict[str, Any]], full: Dict[int, Dict[str, Any]], metric: str,
+                top: int = TOP) -> List[Dict[str, Any]]:
+    best = sorted(full, key=lambda index: rank(full[index], metric), reverse=True)[:top]
+    return [{"params": combos[index], **rounded(full[index])} for index in best]
+def sweep(report: Callable[..., None], dates: Sequence[str], close: np.ndarray, name: str,
+          grid: Dict[str, Sequence[float]], train_years: Optional[int] = None, test_years: int = 1,
+          cost_bps: float = 0.0, metric: str = "sharpe", workers: Optional[int] = None) -> Dict[str, Any]:
+    # Runs as a coordinator job: fans the grid out to a process pool and reports the leaderboard
+    # so far after every chunk. Without train_years only the full-history ranking is computed
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {list(METRICS)}")
+    if len(close) < 2:
+        raise ValueError("An optimization needs at least 2 daily bars")
+    start = time.perf_counter()
+    combos = expand_grid(name, grid)
+    windows = walk_forward_windows(dates, train_years, test_years) if train_years else []
+    workers = workers or WORKERS
+    size = max(1, math.ceil(len(combos) / (workers * CHUNKS_PER_WORKER)))
+    indexed = list(enumerate(combos))
+    chunks = [indexed[i:i + size] for i in range(0, len(indexed), size)]
+    full: Dict[int, Dict[str, Any]] = {}
+    per_window: Dict[int, List[Tuple[float, Dict[str, Any]]]] = {}
+    shm = shared_memory.SharedMemory(create=True, size=max(close.nbytes, 1))
+    try:
+        np.ndarray(close.shape, dtype=np.float64, buffer=shm.buf)[:] = close
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach, initargs=(shm.name, len(close))) as pool:
+            futures = {pool.submit(evaluate, name, chunk, windows, cost_bps, metric): len(chunk) for chunk in chunks}
+            done = 0
+            for future in as_completed(futures):
+                for index, scores, window_scores in future.result():
+                    full[index] = scores
+                    per_window[index] = window_scores
+                done += futures[future]
+                report(combinations_done=done, combinations=len(combos), evaluated=len(full),
+                       top=leaderboard(combos, full, metric))
+    finally:
+        shm.close()
+        shm.unlink()
+    dates = [str(date) for date in dates]
+    walk_forward = []
+    for w, (a, b, c, d) in enumerate(windows):
+        best = max(per_window, key=lambda index: per_window[index][w][0], default=None)
+        if best is None:
+            break
+        train_score, test = per_window[best][w]
+        walk_forward.append({
+            "train_start": dates[a], "train_end": dates[b - 1],
+            "test_start": dates[c], "test_end": dates[d - 1],
+            "params": combos[best],
+            f"train_{metric}": round(train_score, 6) if math.isfinite(train_score) else None,
+            "test": rounded(test),
+        })
+    growth = [1 + window["test"]["total_return"] for window in walk_forward]
+    seconds = time.perf_counter() - start
+    logger.info(f"Optimized {name}: {len(full)} of {len(combos)} combinations x {len(windows)} windows "
+                f"in {seconds:.2f}s on {workers} worker(s)")
+    return {
+        "status": "success",
+        "strategy": name,
+        "metric": metric,
+        "cost_bps": cost_bps,
+        "combinations": len(combos),
+        "evaluated": len(full),
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "top": leaderboard(combos, full, metric),
+        "walk_forward": walk_forward,
+        # the test windows chained, each traded with the parameters that won its train window
+        "out_of_sample_return": round(float(np.prod(growth)) - 1, 6) if growth else None,
+    }
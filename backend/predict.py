@@ -0,0 +1,143 @@
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+# Next-bar forecasts from the indicators stored with every daily bar. Two linear models,
+# fitted with NumPy on standardized features: "logistic" gives the probability that the
+# close `horizon` bars ahead is higher, "ridge" the expected return over those bars.
+# A fitted model and its predictions for every bar are cached per dataset version, so
+# dashboard loads only slice the cached predictions; an upload bumps the version.
+MAX_ENTRIES = int(os.environ.get("MODEL_CACHE_ENTRIES", "32"))
+# Stored columns the features are built from
+COLUMNS = ('close', 'high_prev_close_diff', 'rsi', 'macd_line', 'macd_signal', 'macd_hist')
+LAGS = 5
+FEATURES = ['rsi', 'macd_line', 'macd_signal', 'macd_hist', 'high_prev_close_diff'] + [f'return_{k}' for k in range(LAGS)]
+MODELS = ("logistic", "ridge")
+# The last part of the history is held out to report out-of-sample quality
+HOLDOUT = 0.2
+# Fewer bars with a known outcome than this leave too little to fit a model on (with a long
+# horizon, the holdout model's training part shrinks by `horizon` bars as well)
+MIN_TRAIN_ROWS = 50
+ALPHA = 1.0
+NEWTON_ITERATIONS = 25
+_lock = threading.Lock()
+_models: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+def features(bars: Dict[str, np.ndarray]) -> np.ndarray:
+    # One row per bar, NaN until every indicator and lag is defined. Prices are divided by
+    # the close so the features mean the same at any price level; return_k is the return
+    # k bars before the bar's own
+    close = bars['close']
+    returns = np.full(len(close), np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1.0
+    lagged = []
+    for k in range(LAGS):
+        shifted = np.full(len(close), np.nan)
+        shifted[k:] = returns[:len(returns) - k]
+        lagged.append(shifted)
+    return np.column_stack([
+        bars['rsi'] / 100.0,
+        bars['macd_line'] / close,
+        bars['macd_signal'] / close,
+        bars['macd_hist'] / close,
+        bars['high_prev_close_diff'] / close,
+        *lagged,
+    ])
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    forward = np.full(len(close), np.nan)
+    forward[:-horizon] = close[horizon:] / close[:-horizon] - 1.0
+    return forward
+def fit(kind: str, X: np.ndarray, forward: np.ndarray, alpha: float = ALPHA) -> Dict[str, Any]:
+    # L2-regularized on standardized features; the intercept is not penalized
+    mean, scale = X.mean(axis=0), X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = np.column_stack([np.ones(len(X)), (X - mean) / scale])
+    penalty = alpha * np.eye(Z.shape[1])
+    penalty[0, 0] = 0.0
+    if kind == "ridge":
+        weights = np.linalg.solve(Z.T @ Z + penalty, Z.T @ forward)
+    else:
+        # Newton's method (IRLS); the log-likelihood is concave, so it converges in a few steps
+        y = (forward > 0).astype(float)
+        weights = np.zeros(Z.shape[1])
+        for _ in range(NEWTON_ITERATIONS):
+            p = 1.0 / (1.0 + np.exp(-(Z @ weights)))
+            gradient = Z.T @ (p - y) + penalty @ weights
+            hessian = (Z * (p * (1 - p))[:, None]).T @ Z + penalty
+            step = np.linalg.solve(hessian, gradient)
+            weights -= step
+            if np.abs(step).max() < 1e-8:
+                break
+    return {"kind": kind, "mean": mean, "scale": scale, "weights": weights}
+def predict(model: Dict[str, Any], X: np.ndarray) -> np.ndarray:
+    # Batched: one matrix product for all rows; NaN rows stay NaN
+    score = ((X - model["mean"]) / model["scale"]) @ model["weights"][1:] + model["weights"][0]
+    return 1.0 / (1.0 + np.exp(-score)) if model["kind"] == "logistic" else score
+def finite(x: float, digits: int) -> Optional[float]:
+    # JSON has no NaN or infinity (the stdlib encoder refuses them), so an undefined value is None
+    return round(float(x), digits) if np.isfinite(x) else None
+def quality(kind: str, predictions: Optional[np.ndarray], forward: np.ndarray) -> Dict[str, Any]:
+    # hit_rate: how often the predicted direction was right. The correlation is undefined
+    # (None) when the predictions or the returns are constant; every metric is None without
+    # predictions (no holdout model could be fitted)
+    up = forward > 0
+    result: Dict[str, Any] = {"bars": len(forward), "hit_rate": None, "base_rate": finite(up.mean(), 4)}
+    result.update(dict.fromkeys(["log_loss"] if kind == "logistic" else ["rmse", "correlation"]))
+    if predictions is None:
+        return result
+    called_up = predictions > 0.5 if kind == "logistic" else predictions > 0
+    result["hit_rate"] = finite((called_up == up).mean(), 4)
+    if kind == "logistic":
+        p = np.clip(predictions, 1e-12, 1 - 1e-12)
+        result["log_loss"] = finite(-np.mean(np.where(up, np.log(p), np.log(1 - p))), 6)
+    else:
+        result["rmse"] = finite(np.sqrt(np.mean((predictions - forward) ** 2)), 6)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result["correlation"] = finite(np.corrcoef(predictions, forward)[0, 1], 4) if len(forward) > 2 else None
+    return result
+def train(bars: Dict[str, np.ndarray], kind: str, horizon: int) -> Dict[str, Any]:
+    # Quality is measured on the last HOLDOUT of the bars with a known outcome by a model fitted
+    # on the bars before them, leaving a gap of `horizon` bars so no training target overlaps
+    # the holdout. The served model is then refitted on every bar with a known outcome
+    if kind not in MODELS:
+        raise ValueError(f"Unknown model: {kind!r}. Available: {list(MODELS)}")
+    X = features(bars)
+    forward = forward_returns(bars['close'], horizon)
+    usable = np.flatnonzero(~np.isnan(X).any(axis=1) & ~np.isnan(forward))
+    if len(usable) < MIN_TRAIN_ROWS:
+        raise ValueError(f"Need at least {MIN_TRAIN_ROWS} daily bars with indicators to train, got {len(usable)}")
+    split = int(len(usable) * (1 - HOLDOUT))
+    train_rows, test_rows = usable[:max(split - horizon, 0)], usable[split:]
+    holdout = fit(kind, X[train_rows], forward[train_rows]) if len(train_rows) >= MIN_TRAIN_ROWS else None
+    model = fit(kind, X[usable], forward[usable])
+    return {
+        "model": model,
+        "predictions": predict(model, X),
+        "forward": forward,
+        "trained_on": len(usable),
+        "holdout": quality(kind, predict(holdout, X[test_rows]) if holdout else None, forward[test_rows]),
+        "coefficients": {name: finite(weight, 6) for name, weight in zip(FEATURES, model["weights"][1:])},
+    }
+def cached(key: Tuple, build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    # `key` must include the dataset version; `build` only runs on a miss
+    with _lock:
+        entry = _models.get(key)
+        if entry is not None:
+            _models.move_to_end(key)
+            return entry
+    entry = build()
+    with _lock:
+        _models[key] = entry
+        while len(_models) > MAX_ENTRIES:
+            _models.popitem(last=False)
+    return entry
+def clear():
+    with _lock:
+        _models.clear()
+def rows(entry: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+    # The last `limit` bars: the prediction made at the bar's close and the realized forward
+    # return (None while it lies in the future)
+    dates = entry["dates"]
+    start = max(len(dates) - limit, 0)
+    return [{"date": dates[i], "prediction": finite(entry["predictions"][i], 6), "actual": finite(entry["forward"][i], 6)}
+            for i in range(start, len(dates))]
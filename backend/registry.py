@@ -0,0 +1,108 @@
+import os
+import inspect
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from indicators import calculate_ema, calculate_macd, calculate_rsi, wilder_smooth
+import metrics
+MAX_ENTRIES = int(os.environ.get("INDICATOR_CACHE_ENTRIES", "64"))
+# name -> (function, default parameters); every function takes an OHLCV frame (columns
+# open/high/low/close/volume, one row per bar in time order) and returns one or more
+# series aligned with it, keyed by output name
+INDICATORS: Dict[str, Tuple[Callable[..., Dict[str, pd.Series]], Dict[str, Any]]] = {}
+_lock = threading.Lock()
+_results: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+def indicator(name: str):
+    def register(fn):
+        defaults = {
+            param.name: param.default for param in inspect.signature(fn).parameters.values()
+            if param.default is not inspect.Parameter.empty
+        }
+        INDICATORS[name] = (fn, defaults)
+        return fn
+    return register
+def parse_params(name: str, raw: Mapping[str, str], table: Optional[Mapping[str, Tuple[Callable, Dict[str, Any]]]] = None,
+                 kind: str = "indicator") -> Dict[str, Any]:
+    # Query string values are cast to the type of the default; every parameter is a
+    # positive window length, multiplier or threshold, and a fast window must be shorter
+    # than its slow one. `table` is another registry of the same shape, e.g. backtest.STRATEGIES
+    table = INDICATORS if table is None else table
+    if name not in table:
+        raise ValueError(f"Unknown {kind}: {name!r}. Available: {sorted(table)}")
+    defaults = table[name][1]
+    unknown = sorted(set(raw) - set(defaults))
+    if unknown:
+        raise ValueError(f"Unknown parameters for {name}: {unknown}. Available: {sorted(defaults)}")
+    params = dict(defaults)
+    for key, value in raw.items():
+        try:
+            params[key] = type(defaults[key])(value)
+        except ValueError:
+            raise ValueError(f"{name}.{key} must be {type(defaults[key]).__name__}, got {value!r}")
+        if params[key] <= 0:
+            raise ValueError(f"{name}.{key} must be positive")
+    if 'fast' in params and 'slow' in params and params['fast'] >= params['slow']:
+        raise ValueError(f"{name}.fast must be below {name}.slow")
+    return params
+def compute(name: str, params: Dict[str, Any], dataset: Tuple, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    # Memoized per (dataset, indicator, params); `dataset` must change whenever the stored
+    # bars do (symbol, timeframe and dataset version), `load` is only called on a miss
+    key = dataset + (name,) + tuple(sorted(params.items()))
+    with _lock:
+        result = _results.get(key)
+        if result is not None:
+            _results.move_to_end(key)
+            return result
+    bars = load()
+    fn = INDICATORS[name][0]
+    with metrics.INDICATOR_SECONDS.time(indicator=name):
+        result = pd.DataFrame(fn(bars, **params), index=bars.index)
+    result.insert(0, 'date', bars['date'])
+    with _lock:
+        _results[key] = result
+        while len(_results) > MAX_ENTRIES:
+            _results.popitem(last=False)
+    return result
+def clear():
+    with _lock:
+        _results.clear()
+@indicator("sma")
+def sma(bars: pd.DataFrame, period: int = 20) -> Dict[str, pd.Series]:
+    return {'sma': bars['close'].rolling(period, min_periods=period).mean()}
+@indicator("ema")
+def ema(bars: pd.DataFrame, period: int = 20) -> Dict[str, pd.Series]:
+    return {'ema': calculate_ema(bars['close'], period)}
+@indicator("rsi")
+def rsi(bars: pd.DataFrame, period: int = 14) -> Dict[str, pd.Series]:
+    return {'rsi': calculate_rsi(bars['close'], period)}
+@indicator("macd")
+def macd(bars: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, pd.Series]:
+    values = calculate_macd(bars['close'], fast, slow, signal)
+    return {'line': values['line'], 'signal': values['signal'], 'hist': values['hist']}
+@indicator("bollinger")
+def bollinger(bars: pd.DataFrame, period: int = 20, stddev: float = 2.0) -> Dict[str, pd.Series]:
+    # Population standard deviation, as TradingView's ta.bb
+    window = bars['close'].rolling(period, min_periods=period)
+    middle, spread = window.mean(), window.std(ddof=0) * stddev
+    return {'middle': middle, 'upper': middle + spread, 'lower': middle - spread}
+@indicator("atr")
+def atr(bars: pd.DataFrame, period: int = 14) -> Dict[str, pd.Series]:
+    prev_close = bars['close'].shift(1)
+    true_range = pd.concat([
+        bars['high'] - bars['low'],
+        (bars['high'] - prev_close).abs(),
+        (bars['low'] - prev_close).abs(),
+    ], axis=1).max(axis=1)
+    return {'atr': wilder_smooth(true_range, period)}
+@indicator("stochastic")
+def stochastic(bars: pd.DataFrame, k: int = 14, d: int = 3) -> Dict[str, pd.Series]:
+    lowest = bars['low'].rolling(k, min_periods=k).min()
+    highest = bars['high'].rolling(k, min_periods=k).max()
+    percent_k = 100 * (bars['close'] - lowest) / (highest - lowest).replace(0, np.nan)
+    return {'k': percent_k, 'd': percent_k.rolling(d, min_periods=d).mean()}
+@indicator("obv")
+def obv(bars: pd.DataFrame) -> Dict[str, pd.Series]:
+    direction = np.sign(bars['close'].diff().fillna(0.0))
+    return {'obv': (direction * bars['volume']).cumsum()}
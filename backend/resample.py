@@ -0,0 +1,74 @@
+import sqlite3
+import pandas as pd
+from typing import Iterable, List
+import metrics
+# Timeframes derived from the daily bars -> pandas period frequency. A derived bar is keyed
+# by the first calendar day of its period (the Monday for weeks), like TradingView's exports
+PERIODS = {
+    "1W": "W-SUN",
+    "1M": "M",
+    "3M": "Q",
+    "12M": "Y",
+}
+DAILY = "1D"
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+def period_start(date: str, timeframe: str) -> str:
+    return pd.Period(date, freq=PERIODS[timeframe]).start_time.strftime('%Y-%m-%d')
+def resample(daily: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    # `daily` holds ascending 'date' strings and OHLCV columns; one output row per period
+    # that has at least one daily bar
+    if daily.empty:
+        return pd.DataFrame(columns=['date'] + OHLCV)
+    periods = pd.PeriodIndex(pd.to_datetime(daily['date'], format='%Y-%m-%d'), freq=PERIODS[timeframe])
+    bars = daily.groupby(periods, sort=True).agg(
+        open=('open', 'first'),
+        high=('high', 'max'),
+        low=('low', 'min'),
+        close=('close', 'last'),
+        volume=('volume', 'sum'),
+    )
+    bars.insert(0, 'date', bars.index.start_time.strftime('%Y-%m-%d'))
+    return bars.reset_index(drop=True)
+def materialize(conn: sqlite3.Connection, symbol: str, since: str, timeframes: Iterable[str] = PERIODS):
+    # Rebuilds the derived bars from the period containing `since` (the first daily bar an
+    # upload wrote) onwards. Earlier periods cannot have changed, so only the daily bars from
+    # the start of the longest such period are read, not the whole history. Runs inside the
+    # caller's transaction, so derived bars commit together with the daily bars. Only periods
+    # with daily bars are written: uploaded monthly bars share the 1M key, and months the
+    # daily bars don't cover stay as uploaded
+    with metrics.DB_SECONDS.time(op="resample"):
+        starts = {timeframe: period_start(since, timeframe) for timeframe in timeframes}
+        daily = pd.read_sql_query(
+            """SELECT ts AS date, open, high, low, close, volume FROM bars
+            WHERE symbol = ? AND timeframe = ? AND ts >= ? ORDER BY ts""",
+            conn, params=(symbol, DAILY, min(starts.values()))
+        )
+        for timeframe, start in starts.items():
+            bars = resample(daily[daily['date'] >= start], timeframe)
+            conn.executemany(
+                f"""INSERT INTO bars (symbol, timeframe, ts, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(symbol, timeframe, ts) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in OHLCV)}""",
+                ((symbol, timeframe) + row for row in bars[['date'] + OHLCV].itertuples(index=False, name=None))
+            )
+def clear(conn: sqlite3.Connection, symbol: str, timeframes: Iterable[str] = PERIODS):
+    # Drops the derived bars of every period the symbol's stored daily bars cover, before
+    # those daily bars are replaced; bars of other periods (uploaded months) are kept
+    with metrics.DB_SECONDS.time(op="resample"):
+        dates = pd.to_datetime(pd.read_sql_query(
+            "SELECT ts FROM bars WHERE symbol = ? AND timeframe = ?", conn, params=(symbol, DAILY)
+        )['ts'], format='%Y-%m-%d')
+        for timeframe in timeframes:
+            starts = pd.PeriodIndex(dates, freq=PERIODS[timeframe]).unique().start_time.strftime('%Y-%m-%d')
+            conn.executemany("DELETE FROM bars WHERE symbol = ? AND timeframe = ? AND ts = ?",
+                             ((symbol, timeframe, start) for start in starts))
+def backfill(conn: sqlite3.Connection) -> List[str]:
+    # Databases from before derived timeframes existed: build them once for every symbol
+    # that has daily bars but no weekly bars yet
+    pending = conn.execute(
+        """SELECT symbol, MIN(ts) FROM bars AS d WHERE timeframe = ? AND NOT EXISTS (
+            SELECT 1 FROM bars WHERE symbol = d.symbol AND timeframe = '1W'
+        ) GROUP BY symbol""", (DAILY,)
+    ).fetchall()
+    for symbol, since in pending:
+        materialize(conn, symbol, since)
+    return [symbol for symbol, since in pending]
@@ -0,0 +1,136 @@
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+# Cross-symbol screens over a snapshot of every symbol's latest daily bar. The latest_bars
+# table holds one row per symbol, rewritten in the same transaction as each daily write, with
+# the previous bar's RSI and MACD histogram next to the latest ones so "turning" conditions
+# are plain comparisons. A screen reads only this table (indexed on the common filters), never
+# the history in bars, so it stays fast however many symbols and years are stored.
+DAILY = "1D"
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'high_prev_close_diff',
+               'rsi', 'macd_line', 'macd_signal', 'macd_hist')
+# Filterable and sortable fields -> snapshot column
+FIELDS = {
+    'symbol': 'symbol',
+    'date': 'ts',
+    **{column: column for column in BAR_COLUMNS},
+    'prev_close': 'prev_close',
+    'prev_rsi': 'prev_rsi',
+    'prev_macd_hist': 'prev_macd_hist',
+    # close over the previous close, minus 1
+    'change': 'change',
+}
+INDEXED = ('rsi', 'macd_hist', 'change', 'volume')
+DEFAULT_LIMIT = 100
+CONDITION = re.compile(r"^\s*([A-Za-z_]+)\s*(<=|>=|==|!=|<|>|=)\s*(\S+)\s*$")
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+OPERATORS = {'<': '<', '<=': '<=', '>': '>', '>=': '>=', '=': '=', '==': '=', '!=': '!='}
+def create_table(cursor: sqlite3.Cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS latest_bars (
+            symbol TEXT PRIMARY KEY,
+            ts TEXT NOT NULL,
+            {', '.join(f'{column} REAL' for column in BAR_COLUMNS)},
+            prev_close REAL,
+            prev_rsi REAL,
+            prev_macd_hist REAL,
+            change REAL
+        ) WITHOUT ROWID
+    """)
+    for column in INDEXED:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS latest_bars_{column} ON latest_bars ({column})")
+def refresh(conn: sqlite3.Connection, symbol: str):
+    # Rebuilds the symbol's snapshot from its last two daily bars, inside the caller's transaction
+    rows = conn.execute(f"""
+        SELECT ts, {', '.join(BAR_COLUMNS)} FROM bars
+        WHERE symbol = ? AND timeframe = ? ORDER BY ts DESC LIMIT 2
+    """, (symbol, DAILY)).fetchall()
+    if not rows:
+        conn.execute("DELETE FROM latest_bars WHERE symbol = ?", (symbol,))
+        return
+    latest = dict(zip(('ts',) + BAR_COLUMNS, rows[0]))
+    prev = dict(zip(('ts',) + BAR_COLUMNS, rows[1])) if len(rows) > 1 else {}
+    prev_close = prev.get('close')
+    change = latest['close'] / prev_close - 1 if prev_close and latest['close'] is not None else None
+    conn.execute(f"""
+        INSERT OR REPLACE INTO latest_bars (symbol, ts, {', '.join(BAR_COLUMNS)}, prev_close, prev_rsi, prev_macd_hist, change)
+        VALUES ({', '.join('?' * (len(BAR_COLUMNS) + 6))})
+    """, (symbol, *rows[0], prev_close, prev.get('rsi'), prev.get('macd_hist'), change))
+def backfill(conn: sqlite3.Connection) -> List[str]:
+    # Symbols stored before the snapshot existed
+    pending = [row[0] for row in conn.execute("""
+        SELECT symbol FROM bars AS b WHERE timeframe = ? GROUP BY symbol HAVING NOT EXISTS (
+            SELECT 1 FROM latest_bars WHERE symbol = b.symbol
+        )
+    """, (DAILY,))]
+    for symbol in pending:
+        refresh(conn, symbol)
+    return pending
+def field(name: str) -> str:
+    column = FIELDS.get(name.strip().lower())
+    if column is None:
+        raise ValueError(f"Unknown field: {name!r}. Available: {sorted(FIELDS)}")
+    return column
+def parse_filter(expression: Optional[str]) -> Tuple[List[str], List[Any]]:
+    # "rsi<30,macd_hist>0,prev_macd_hist<=0": comma-separated conditions that must all hold.
+    # The right-hand side is a number, a date (for 'date'), a symbol or another field, e.g.
+    # "macd_line>macd_signal". Fields become whitelisted columns and values bound
+    # parameters, so the expression never reaches the SQL text
+    clauses: List[str] = []
+    params: List[Any] = []
+    for condition in (expression or "").split(","):
+        if not condition.strip():
+            continue
+        match = CONDITION.match(condition)
+        if match is None:
+            raise ValueError(f"Invalid condition: {condition.strip()!r}, expected e.g. 'rsi<30'")
+        name, operator, value = match.groups()
+        column = field(name)
+        quoted = value[0] in "'\""
+        if not quoted and value.lower() in FIELDS:
+            clauses.append(f"{column} {OPERATORS[operator]} {FIELDS[value.lower()]}")
+            continue
+        if column == 'symbol':
+            params.append(value.strip("'\"").upper())
+        elif column == 'ts':
+            if not ISO_DATE.match(value.strip("'\"")):
+                raise ValueError(f"Invalid date in {condition.strip()!r}, expected YYYY-MM-DD")
+            params.append(value.strip("'\""))
+        else:
+            try:
+                params.append(float(value))
+            except ValueError:
+                raise ValueError(f"Invalid value in {condition.strip()!r}: {value!r}")
+        clauses.append(f"{column} {OPERATORS[operator]} ?")
+    return clauses, params
+def parse_sort(expression: Optional[str]) -> List[str]:
+    # "-rsi,symbol": descending with a leading '-'; symbols without a value sort last
+    order = []
+    for name in (expression or "symbol").split(","):
+        if not name.strip():
+            continue
+        descending = name.strip().startswith("-")
+        column = field(name.strip().lstrip("-"))
+        order.append(f"{column} IS NULL, {column} {'DESC' if descending else 'ASC'}")
+    return order or ["symbol ASC"]
+def build_query(conditions: Optional[str], sort: Optional[str], limit: int = DEFAULT_LIMIT) -> Tuple[str, Tuple[Any, ...]]:
+    clauses, params = parse_filter(conditions)
+    sql = f"""
+        SELECT symbol, ts, {', '.join(BAR_COLUMNS)}, prev_rsi, prev_macd_hist, change FROM latest_bars
+        {'WHERE ' + ' AND '.join(clauses) if clauses else ''}
+        ORDER BY {', '.join(parse_sort(sort))}, symbol
+        LIMIT ?
+    """
+    return sql, tuple(params) + (limit,)
+def screen(conn: sqlite3.Connection, sql: str, params: Tuple[Any, ...]) -> List[Dict[str, Any]]:
+    # Prices and indicators with 2 decimals and whole volumes like the other endpoints
+    results = []
+    for row in conn.execute(sql, params):
+        symbol, ts, *values, change = row
+        names = BAR_COLUMNS + ('prev_rsi', 'prev_macd_hist')
+        result: Dict[str, Any] = {"symbol": symbol, "date": ts}
+        for name, value in zip(names, values):
+            result[name] = None if value is None else int(value) if name == 'volume' else round(value, 2)
+        result["change"] = None if change is None else round(change, 6)
+        results.append(result)
+    return results
@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+import main
+import db
+def symbol_bars(dates: pd.Index, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    return pd.DataFrame({
+        "date": dates, "open": close, "high": close * 1.01, "low": close * 0.99, "close": close, "volume": 1e6,
+    })
+def run():
+    parser = argparse.ArgumentParser(description="Bulk load N symbols x Y years of daily bars into the bars table")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--years", type=int, default=30)
+    args = parser.parse_args()
+    n = args.years * 252
+    with tempfile.TemporaryDirectory() as tmp:
+        main.DB_PATH = os.path.join(tmp, "bench.db")
+        main.init_db()
+        dates = pd.bdate_range(end="2024-12-31", periods=n).strftime('%Y-%m-%d')
+        raw = [symbol_bars(dates, i) for i in range(args.symbols)]
+        start = time.perf_counter()
+        frames = [(f"SYM{i:04d}", main.compute_indicators(df)) for i, df in enumerate(raw)]
+        compute_s = time.perf_counter() - start
+        start = time.perf_counter()
+        with db.connection(main.DB_PATH) as conn:
+            for symbol, df in frames:
+                main._write_bars(conn, df, symbol)
+            conn.commit()
+        write_s = time.perf_counter() - start
+        rows = args.symbols * n
+        size = os.path.getsize(main.DB_PATH) / 2**20
+    print(f"{args.symbols} symbols x {n} bars = {rows:,} rows")
+    print(f"indicators: {compute_s:.2f}s  insert: {write_s:.2f}s ({rows / write_s:,.0f} rows/s)  db: {size:.0f} MB")
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    run()
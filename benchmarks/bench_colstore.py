@@ -0,0 +1,70 @@
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+import main
+import colstore
+import db
+def symbol_bars(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        "date": pd.bdate_range(end="2024-12-31", periods=n).strftime('%Y-%m-%d'),
+        "open": close, "high": close * 1.01, "low": close * 0.99, "close": close, "volume": 1e6,
+    })
+def timed(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+def run():
+    parser = argparse.ArgumentParser(description="Analytical reads: SQLite rows vs memory-mapped column store")
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    n = args.years * 252
+    columns = list(colstore.COLUMNS)
+    with tempfile.TemporaryDirectory() as tmp:
+        main.DB_PATH = os.path.join(tmp, "bench.db")
+        colstore.ROOT = os.path.join(tmp, "columns")
+        main.init_db()
+        symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+        start = time.perf_counter()
+        with db.connection(main.DB_PATH) as conn:
+            for i, symbol in enumerate(symbols):
+                main._write_bars(conn, main.compute_indicators(symbol_bars(n, i)), symbol)
+            conn.commit()
+        write_s = time.perf_counter() - start
+        start = time.perf_counter()
+        with db.connection(main.DB_PATH) as conn:
+            for symbol in symbols:
+                colstore.export(conn, symbol, main.DAILY)
+            conn.commit()
+        export_s = time.perf_counter() - start
+        print(f"{args.symbols} symbols x {n:,} bars; SQLite insert {write_s:.2f}s, column export {export_s:.2f}s")
+        print(f"{'read':<28} {'sqlite':>9} {'columns':>9} {'speedup':>8}")
+        cases = [
+            ("1 symbol, all columns", lambda: main.read_columns(symbols[0], main.DAILY, columns)),
+            ("1 symbol, close, 5 years", lambda: main.read_columns(symbols[0], main.DAILY, ['close'], "2015-01-01", "2019-12-31")),
+            (f"{args.symbols} symbols, close", lambda: [main.read_columns(s, main.DAILY, ['close']) for s in symbols]),
+        ]
+        mapped = colstore.ROOT
+        for name, fn in cases:
+            colstore.ROOT = None
+            sqlite_s = timed(fn, args.repeat)
+            colstore.ROOT = mapped
+            columns_s = timed(fn, args.repeat)
+            print(f"{name:<28} {sqlite_s * 1000:>7.1f}ms {columns_s * 1000:>7.2f}ms {sqlite_s / columns_s:>7.0f}x")
+        db.close_all()
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    run()
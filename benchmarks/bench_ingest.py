@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+import main
+def write_csv(path: str, n: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("1900-01-01").value // 10**9
+    # Hourly bars so multi-million row files stay inside the datetime64[ns] range; daily_data
+    # keeps the last bar per date, which doesn't matter for measuring parse/compute/write cost
+    chunk = 1_000_000
+    for offset in range(0, n, chunk):
+        m = min(chunk, n - offset)
+        close = 4000.0 + np.cumsum(rng.normal(0, 10, m))
+        pd.DataFrame({
+            "time": start + (offset + np.arange(m)) * 3600,
+            "open": close, "high": close + 5, "low": close - 5, "close": close, "volume": 1e6,
+        }).to_csv(path, mode="a", header=offset == 0, index=False)
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+def run():
+    parser = argparse.ArgumentParser(description="Peak memory of streaming vs in-memory daily CSV ingest")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--skip-in-memory", action="store_true")
+    args = parser.parse_args()
+    print(f"{'rows':>12} {'csv MB':>8} {'stream s':>9} {'stream MB':>10} {'in-mem s':>9} {'in-mem MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        main.DB_PATH = os.path.join(tmp, "bench.db")
+        main.init_db()
+        for n in args.sizes:
+            path = os.path.join(tmp, f"{n}.csv")
+            write_csv(path, n)
+            size = os.path.getsize(path) / 2**20
+            def stream():
+                with open(path, "rb") as f:
+                    main.ingest_csv_stream(f)
+            s_time, s_peak = measure(stream)
+            if args.skip_in_memory:
+                m_col = f"{'-':>9} {'-':>10}"
+            else:
+                def in_memory():
+                    with open(path, "rb") as f:
+                        main.save_to_db(main.process_csv_data(f.read()))
+                m_time, m_peak = measure(in_memory)
+                m_col = f"{m_time:>9.2f} {m_peak:>10.1f}"
+            print(f"{n:>12,} {size:>8.1f} {s_time:>9.2f} {s_peak:>10.1f} {m_col}")
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    run()
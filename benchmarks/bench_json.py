@@ -0,0 +1,80 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+import main
+import columnar
+import db
+def legacy_daily_data(symbol: str, limit: int):
+    # Per-row round()/int() loop that bar_rows replaced, encoded the way FastAPI encodes a
+    # returned list (jsonable_encoder + JSONResponse); kept as the reference
+    with db.connection(main.DB_PATH) as conn:
+        rows = conn.execute(f"""
+            SELECT ts, {', '.join(main.BAR_COLUMNS[1:])} FROM bars
+            WHERE symbol = ? AND timeframe = ? ORDER BY ts DESC LIMIT ?
+        """, (symbol, main.DAILY, limit)).fetchall()
+    result = []
+    for row in rows:
+        result.append({
+            "date": row[0],
+            "open": round(row[1], 2) if row[1] is not None else None,
+            "high": round(row[2], 2) if row[2] is not None else None,
+            "low": round(row[3], 2) if row[3] is not None else None,
+            "close": round(row[4], 2) if row[4] is not None else None,
+            "volume": int(row[5]) if row[5] is not None else None,
+            "high_prev_close_diff": round(row[6], 2) if row[6] is not None else None,
+            "rsi": round(row[7], 2) if row[7] is not None else None,
+            "macd": {
+                "line": round(row[8], 2) if row[8] is not None else None,
+                "signal": round(row[9], 2) if row[9] is not None else None,
+                "hist": round(row[10], 2) if row[10] is not None else None
+            }
+        })
+    result.reverse()
+    return JSONResponse(jsonable_encoder(result)).body
+def fast_daily_data(symbol: str, limit: int):
+    return columnar.encode_json(main.daily_data(symbol, limit))
+def timed(fn, *args, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(*args)
+        times.append(time.perf_counter() - start)
+    return body, statistics.median(times)
+def run():
+    parser = argparse.ArgumentParser(description="Build + encode time of /api/daily-data responses")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[60, 5_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    n = max(args.sizes)
+    with tempfile.TemporaryDirectory() as tmp:
+        main.DB_PATH = os.path.join(tmp, "bench.db")
+        main.init_db()
+        rng = np.random.default_rng(42)
+        close = 4000.0 + np.cumsum(rng.normal(0, 10, n))
+        df = pd.DataFrame({
+            "date": pd.date_range(end="2024-12-31", periods=n).strftime('%Y-%m-%d'),
+            "open": close, "high": close + 5, "low": close - 5, "close": close, "volume": 1e6,
+        })
+        with db.connection(main.DB_PATH) as conn:
+            main._write_bars(conn, main.compute_indicators(df), "BENCH")
+            conn.commit()
+        encoder = "orjson" if columnar.orjson is not None else "stdlib json"
+        print(f"encoder: {encoder}")
+        print(f"{'rows':>10} {'legacy':>10} {'fast':>10} {'speedup':>8} {'body':>10}")
+        for size in args.sizes:
+            slow_body, slow_s = timed(legacy_daily_data, "BENCH", size, repeat=args.repeat)
+            fast_body, fast_s = timed(fast_daily_data, "BENCH", size, repeat=args.repeat)
+            print(f"{size:>10,} {slow_s * 1000:>8.1f}ms {fast_s * 1000:>8.1f}ms {slow_s / fast_s:>7.1f}x "
+                  f"{len(fast_body) / 2**10:>8.0f}KB")
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    run()
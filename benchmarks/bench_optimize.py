@@ -0,0 +1,34 @@
+import argparse
+import logging
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+import optimize
+def daily_closes(n: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("1990-01-01", periods=n).strftime('%Y-%m-%d').tolist()
+    return dates, 4000.0 + np.cumsum(rng.normal(0, 10, n))
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward RSI sweep: wall time and speedup per worker count")
+    parser.add_argument("--bars", type=int, default=7_560, help="default: 30 years of trading days")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--train-years", type=int, default=5)
+    args = parser.parse_args()
+    dates, close = daily_closes(args.bars)
+    grid = {"period": list(range(2, 31)), "lower": [20, 25, 30, 35], "upper": [65, 70, 75, 80]}
+    print(f"{len(optimize.expand_grid('rsi', grid))} combinations, {args.bars:,} bars, "
+          f"{len(optimize.walk_forward_windows(dates, args.train_years, 1))} windows, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>8} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        optimize.sweep(lambda **progress: None, dates, close, "rsi", grid, args.train_years, 1, 5.0, workers=workers)
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds  # speedup relative to the first worker count
+        print(f"{workers:>8} {seconds:>8.2f} {baseline / seconds:>7.1f}x")
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    main()
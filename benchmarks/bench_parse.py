@@ -0,0 +1,90 @@
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import numpy as np
+import pandas as pd
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.join(ROOT, "api"))
+import main
+import index
+def legacy_normalize(csv: bytes) -> pd.DataFrame:
+    # Whole-file read, errors='ignore' epoch parse with an object re-parse, per-column
+    # to_numeric and strftime that normalize_ohlcv replaced; kept as the reference
+    df = pd.read_csv(io.BytesIO(csv))
+    df.columns = df.columns.str.lower().str.strip()
+    df = df[main.REQUIRED_COLUMNS].copy()
+    try:
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+    except (ValueError, TypeError):
+        df['time'] = pd.to_datetime(df['time'])
+    df = df.sort_values('time').reset_index(drop=True)
+    for col in main.PRICE_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df.dropna(subset=['time', 'open', 'high', 'low', 'close']).rename(columns={'time': 'date'})
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df
+def legacy_api_bars(rows):
+    # parse_time (float(), then fromisoformat, exception driven) on every row
+    parsed = []
+    for r in rows:
+        try:
+            t = index.parse_time(str(r.get("time", "")).strip())
+        except Exception:
+            continue
+        bar = (t, index.to_float(r.get("open")), index.to_float(r.get("high")), index.to_float(r.get("low")),
+               index.to_float(r.get("close")), index.to_float(r.get("volume")))
+        if None not in bar:
+            parsed.append(bar)
+    parsed.sort(key=lambda x: x[0])
+    return [t.strftime("%Y-%m-%d") for t, *_ in parsed]
+def make_csv(n: int, time_format: str) -> bytes:
+    rng = np.random.default_rng(42)
+    close = 4000.0 + np.cumsum(rng.normal(0, 10, n))
+    dates = pd.date_range("1800-01-01", periods=n) + pd.Timedelta(hours=12)
+    time = (dates - pd.Timestamp(0)) // pd.Timedelta(seconds=1) if time_format == "epoch" else dates.strftime('%Y-%m-%d')
+    return pd.DataFrame({
+        "time": time, "open": close, "high": close + 5, "low": close - 5, "close": close, "volume": 1e6,
+        # TradingView exports carry the chart's plots as extra columns
+        "RSI": close, "Histogram": close, "MACD": close, "Signal": close,
+    }).to_csv(index=False).encode()
+def timed(fn, *args, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+def run():
+    parser = argparse.ArgumentParser(description="Rows/s of the CSV parse + normalize stage of ingest")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(f"{'path':>8} {'time':>6} {'rows':>9} {'legacy rows/s':>14} {'fast rows/s':>12} {'speedup':>8}")
+    for time_format in ["epoch", "iso"]:
+        for size in args.sizes:
+            csv = make_csv(size, time_format)
+            slow, slow_s = timed(legacy_normalize, csv, repeat=args.repeat)
+            fast, fast_s = timed(main.parse_ohlcv_csv, csv, repeat=args.repeat)
+            assert slow['date'].tolist() == fast['date'].tolist()
+            # pyarrow rounds correctly, pandas' C parser can be one ulp off
+            np.testing.assert_allclose(slow['close'].to_numpy(), fast['close'].to_numpy(), rtol=1e-12, atol=1e-9)
+            print(f"{'backend':>8} {time_format:>6} {size:>9,} {size / slow_s:>14,.0f} {size / fast_s:>12,.0f} "
+                  f"{slow_s / fast_s:>7.1f}x")
+            streamed, stream_s = timed(lambda: pd.concat(main.iter_ohlcv_chunks(io.BytesIO(csv))), repeat=args.repeat)
+            assert streamed['date'].tolist() == fast['date'].tolist()
+            print(f"{'stream':>8} {time_format:>6} {size:>9,} {size / slow_s:>14,.0f} {size / stream_s:>12,.0f} "
+                  f"{slow_s / stream_s:>7.1f}x")
+            rows = index.read_csv_rows(csv)
+            slow, slow_s = timed(legacy_api_bars, rows, repeat=args.repeat)
+            fast, fast_s = timed(index.parse_bars, rows, repeat=args.repeat)
+            assert slow == [t.strftime("%Y-%m-%d") for t, *_ in fast]
+            print(f"{'api':>8} {time_format:>6} {size:>9,} {size / slow_s:>14,.0f} {size / fast_s:>12,.0f} "
+                  f"{slow_s / fast_s:>7.1f}x")
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    run()
@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from indicators import calculate_rsi
+def legacy_calculate_rsi(data: pd.Series, period: int = 14) -> pd.Series:
+    # Per-row .iloc implementation that calculate_rsi replaced; kept as the reference.
+    delta = data.diff()
+    gain = delta.where(delta > 0, 0.0)
+    loss = -delta.where(delta < 0, 0.0)
+    avg_gain = gain.rolling(window=period, min_periods=period).mean()
+    avg_loss = loss.rolling(window=period, min_periods=period).mean()
+    for i in range(period, len(data)):
+        avg_gain.iloc[i] = (avg_gain.iloc[i-1] * (period - 1) + gain.iloc[i]) / period
+        avg_loss.iloc[i] = (avg_loss.iloc[i-1] * (period - 1) + loss.iloc[i]) / period
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+def random_walk(n: int, seed: int = 42) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    return pd.Series(4000.0 + np.cumsum(rng.normal(0, 10, n)))
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized vs legacy Wilder RSI")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--legacy-max", type=int, default=1_000_000,
+                        help="largest size to run the legacy loop on; larger sizes are extrapolated")
+    args = parser.parse_args()
+    print(f"{'rows':>12} {'vectorized':>12} {'legacy':>14} {'speedup':>10} {'max abs diff':>14}")
+    legacy_rate = None
+    for n in args.sizes:
+        close = random_walk(n)
+        fast, fast_s = timed(calculate_rsi, close)
+        if n <= args.legacy_max:
+            slow, slow_s = timed(legacy_calculate_rsi, close)
+            legacy_rate = slow_s / n
+            diff = float(np.nanmax(np.abs(fast.to_numpy() - slow.to_numpy())))
+            assert np.array_equal(np.isnan(fast.to_numpy()), np.isnan(slow.to_numpy()))
+            assert diff < 1e-9, f"RSI mismatch: {diff}"
+            legacy_col, diff_col = f"{slow_s:.3f}s", f"{diff:.2e}"
+        elif legacy_rate is not None:
+            slow_s = legacy_rate * n
+            legacy_col, diff_col = f"~{slow_s:.1f}s (est)", "-"
+        else:
+            slow_s = None
+            legacy_col, diff_col = "skipped", "-"
+        speedup = f"{slow_s / fast_s:.0f}x" if slow_s else "-"
+        print(f"{n:>12,} {fast_s:>11.3f}s {legacy_col:>14} {speedup:>10} {diff_col:>14}")
+if __name__ == "__main__":
+    main()
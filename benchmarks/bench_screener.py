@@ -0,0 +1,58 @@
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+import main
+import db
+import screener
+SCREENS = [
+    ("rsi<30,macd_hist>0,prev_macd_hist<=0", None),
+    ("rsi<30", "rsi"),
+    (None, "-change"),
+    ("volume>5000000,change>0.02", "-volume"),
+]
+def run():
+    parser = argparse.ArgumentParser(description="Screen latency over the latest-bar snapshot")
+    parser.add_argument("--symbols", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+    n = args.symbols
+    close = rng.uniform(5, 500, n)
+    values = {
+        "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+        "volume": rng.integers(10_000, 10_000_000, n).astype(float), "high_prev_close_diff": close * 0.005,
+        "rsi": rng.uniform(5, 95, n), "macd_line": rng.normal(0, 1, n), "macd_signal": rng.normal(0, 1, n),
+        "macd_hist": rng.normal(0, 1, n),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        main.DB_PATH = os.path.join(tmp, "bench.db")
+        main.init_db()
+        with db.connection(main.DB_PATH) as conn:
+            conn.executemany(
+                f"""INSERT INTO latest_bars (symbol, ts, {', '.join(screener.BAR_COLUMNS)}, prev_close, prev_rsi,
+                prev_macd_hist, change) VALUES ({', '.join('?' * (len(screener.BAR_COLUMNS) + 6))})""",
+                ((f"SYM{i:05d}", "2024-12-31", *(float(values[c][i]) for c in screener.BAR_COLUMNS),
+                  float(close[i] * 0.99), float(rng.uniform(5, 95)), float(rng.normal(0, 1)), 0.01 * rng.normal())
+                 for i in range(n))
+            )
+            conn.commit()
+            print(f"{n:,} symbols")
+            print(f"{'filter':<40} {'sort':<8} {'rows':>5} {'median':>9}")
+            for conditions, sort in SCREENS:
+                query = screener.build_query(conditions, sort, 100)
+                times = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    rows = screener.screen(conn, *query)
+                    times.append(time.perf_counter() - start)
+                print(f"{conditions or '-':<40} {sort or '-':<8} {len(rows):>5} {statistics.median(times) * 1000:>7.2f}ms")
+        db.close_all()
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    run()
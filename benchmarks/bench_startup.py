@@ -0,0 +1,80 @@
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# name -> (directory on PYTHONPATH, module, path requested for the first response)
+TARGETS = {
+    "api": (os.path.join(ROOT, "api"), "index", "/api/stats"),
+    "backend": (os.path.join(ROOT, "backend"), "main", "/api/stats"),
+}
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+def import_profile(directory: str, module: str, cwd: str):
+    # Parses `python -X importtime` output into (total ms, direct imports of the module by cumulative ms)
+    env = dict(os.environ, PYTHONPATH=directory)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    children, total = [], None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            if name.strip() == module:
+                total = int(cumulative) / 1000
+                break
+            children = []
+        elif depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+    return total, sorted(children, key=lambda c: -c[1])
+def first_response(directory: str, module: str, path: str, cwd: str) -> float:
+    # Wall time from spawning the server process until the first successful response
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=directory)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", f"{module}:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=cwd, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as response:
+                    response.read()
+                return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                if proc.poll() is not None:
+                    raise RuntimeError(f"{module} exited with code {proc.returncode}")
+                time.sleep(0.005)
+    finally:
+        proc.terminate()
+        proc.wait()
+def run():
+    parser = argparse.ArgumentParser(description="Import time and time-to-first-response of both apps")
+    parser.add_argument("--target", choices=sorted(TARGETS), action="append")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+    for name in args.target or sorted(TARGETS):
+        directory, module, path = TARGETS[name]
+        with tempfile.TemporaryDirectory() as cwd:
+            import_profile(directory, module, cwd)  # warm the .pyc cache
+            profiles = [import_profile(directory, module, cwd) for _ in range(args.runs)]
+            ttfr = [first_response(directory, module, path, cwd) for _ in range(args.runs)]
+        print(f"{name} ({module}.py)")
+        print(f"  import {module}: {statistics.median(p[0] for p in profiles):.0f} ms (median of {args.runs})")
+        for child, ms in profiles[-1][1][:args.top]:
+            print(f"    {ms:8.1f} ms  {child}")
+        print(f"  time to first response (GET {path}): {statistics.median(ttfr):.0f} ms "
+              f"(min {min(ttfr):.0f}, max {max(ttfr):.0f})")
+if __name__ == "__main__":
+    run()
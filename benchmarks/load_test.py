@@ -0,0 +1,60 @@
+import argparse
+import threading
+import time
+import numpy as np
+import requests
+# Polls the read endpoints the way the dashboards do, optionally while a large upload is
+# being ingested, and reports the latency distribution.
+#   python benchmarks/load_test.py --url http://localhost:8000 --clients 16 --duration 20 --upload big.csv
+def poll(url: str, paths, deadline: float, latencies, errors):
+    session = requests.Session()
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.get(url + paths[i % len(paths)], timeout=60)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except requests.RequestException as e:
+            errors.append(str(e))
+        latencies.append(time.perf_counter() - start)
+        i += 1
+def upload(url: str, path: str, symbol: str, deadline: float, done):
+    # Keeps re-uploading until the read load stops, so every read overlaps a write
+    while time.perf_counter() < deadline:
+        with open(path, 'rb') as f:
+            response = requests.post(f"{url}/api/upload", params={"symbol": symbol},
+                                     files={"file": (path.rsplit('/', 1)[-1], f, "text/csv")})
+        status_url = response.json().get("status_url")
+        while status_url and time.perf_counter() < deadline:
+            if requests.get(url + status_url).json()["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.2)
+        done.append(1)
+def run():
+    parser = argparse.ArgumentParser(description="Read latency under concurrent polling")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--symbol", default="SPX")
+    parser.add_argument("--upload", help="CSV re-uploaded (to --upload-symbol) for the whole run")
+    parser.add_argument("--upload-symbol", default="LOADTEST")
+    args = parser.parse_args()
+    paths = [f"/api/daily-data?limit=60&symbol={args.symbol}", f"/api/stats?symbol={args.symbol}"]
+    deadline = time.perf_counter() + args.duration
+    latencies, errors, uploads = [], [], []
+    threads = [threading.Thread(target=poll, args=(args.url, paths, deadline, latencies, errors))
+               for _ in range(args.clients)]
+    if args.upload:
+        threads.append(threading.Thread(target=upload, args=(args.url, args.upload, args.upload_symbol, deadline, uploads)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ms = np.array(latencies) * 1000
+    print(f"{len(ms)} requests in {args.duration:.0f}s ({len(ms) / args.duration:.0f} req/s), "
+          f"{len(errors)} errors, {len(uploads)} uploads")
+    print(f"p50 {np.percentile(ms, 50):.1f} ms  p95 {np.percentile(ms, 95):.1f} ms  "
+          f"p99 {np.percentile(ms, 99):.1f} ms  max {ms.max():.1f} ms")
+if __name__ == "__main__":
+    run()
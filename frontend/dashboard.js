@@ -2,7 +2,10 @@ const API_BASE_URL = window.location.hostname === 'localhost' || window.location
     ? 'http://localhost:8000'
     : window.location.origin;
 let currentData = [];
-const SESSION_KEY_DAILY = 'dashboard_daily_data';
+// Optioneel ?symbol=XYZ in de pagina-URL; zonder gebruikt de API het standaardsymbool
+const SYMBOL = new URLSearchParams(window.location.search).get('symbol');
+const SYMBOL_PARAM = SYMBOL ? `symbol=${encodeURIComponent(SYMBOL)}` : '';
+const SESSION_KEY_DAILY = `dashboard_daily_data${SYMBOL ? `_${SYMBOL}` : ''}`;
 let sortColumn = 'date';
 let sortDirection = 'desc';
 const tableContainer = document.getElementById('tableContainer');
@@ -20,8 +23,8 @@ async function loadDashboardData() {
     showLoading();
     try {
         const [statsResponse, dataResponse] = await Promise.all([
-            fetch(`${API_BASE_URL}/api/stats`),
-            fetch(`${API_BASE_URL}/api/daily-data?limit=60`)
+            fetch(`${API_BASE_URL}/api/stats${SYMBOL_PARAM ? `?${SYMBOL_PARAM}` : ''}`),
+            fetch(`${API_BASE_URL}/api/daily-data?limit=60${SYMBOL_PARAM ? `&${SYMBOL_PARAM}` : ''}`)
         ]);
         let data = dataResponse.ok ? await dataResponse.json() : [];
         let stats = statsResponse.ok ? await statsResponse.json() : null;
@@ -4,7 +4,10 @@ const API_BASE_URL = window.location.hostname === 'localhost' || window.location
 let currentData = [];
 let sortColumn = 'date';
 let sortDirection = 'desc';
-const SESSION_KEY_MONTHLY = 'dashboard_monthly_data';
+// Optioneel ?symbol=XYZ in de pagina-URL; zonder gebruikt de API het standaardsymbool
+const SYMBOL = new URLSearchParams(window.location.search).get('symbol');
+const SYMBOL_PARAM = SYMBOL ? `symbol=${encodeURIComponent(SYMBOL)}` : '';
+const SESSION_KEY_MONTHLY = `dashboard_monthly_data${SYMBOL ? `_${SYMBOL}` : ''}`;
 const tableContainer = document.getElementById('tableContainer');
 const tableBody = document.getElementById('tableBody');
 const loadingState = document.getElementById('loadingState');
@@ -24,8 +27,8 @@ async function loadMonthlyData() {
     showLoading();
     try {
         const [statsResponse, dataResponse] = await Promise.all([
-            fetch(`${API_BASE_URL}/api/monthly-stats`),
-            fetch(`${API_BASE_URL}/api/monthly-data`)
+            fetch(`${API_BASE_URL}/api/monthly-stats${SYMBOL_PARAM ? `?${SYMBOL_PARAM}` : ''}`),
+            fetch(`${API_BASE_URL}/api/monthly-data${SYMBOL_PARAM ? `?${SYMBOL_PARAM}` : ''}`)
         ]);
 
         // Parse data first so we can derive stats if the stats endpoint returns empty
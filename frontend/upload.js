@@ -14,6 +14,9 @@ const successDetails = document.getElementById('successDetails');
 const errorMessage = document.getElementById('errorMessage');
 const errorDetails = document.getElementById('errorDetails');
 const retryBtn = document.getElementById('retryBtn');
+// Optioneel ?symbol=XYZ in de pagina-URL; zonder gebruikt de API het standaardsymbool
+const SYMBOL = new URLSearchParams(window.location.search).get('symbol');
+const SYMBOL_PARAM = SYMBOL ? `symbol=${encodeURIComponent(SYMBOL)}` : '';
 let selectedFile = null;
 selectFileBtn.addEventListener('click', () => {
     fileInput.click();
@@ -46,7 +49,7 @@ uploadArea.addEventListener('drop', (e) => {
 });
 function handleFileSelect(file) {
     if (!file) return;
-    if (!file.name.endsWith('.csv')) {
+    if (!/\.csv(\.gz|\.zst)?$/i.test(file.name)) {
         showError('Selecteer een geldig CSV-bestand');
         return;
     }
@@ -66,7 +69,7 @@ async function uploadFile(file) {
     successMessage.style.display = 'none';
     errorMessage.style.display = 'none';
     try {
-        const response = await fetch(`${API_BASE_URL}/api/upload`, {
+        const response = await fetch(`${API_BASE_URL}/api/upload${SYMBOL_PARAM ? `?${SYMBOL_PARAM}` : ''}`, {
             method: 'POST',
             body: formData
         });
@@ -88,10 +91,14 @@ async function uploadFile(file) {
             throw new Error(errorMessage);
         }
 
-        const result = tryParseJson(responseText);
+        let result = tryParseJson(responseText);
         if (!result) {
             throw new Error(`Response is not valid JSON (status ${response.status}): ${responseText.slice(0, 200)}`);
         }
+        // De lokale backend verwerkt uploads als achtergrondjob
+        if (result.job_id) {
+            result = await waitForJob(result.status_url);
+        }
 
         uploadProgress.style.display = 'none';
         successMessage.style.display = 'block';
@@ -106,6 +113,28 @@ async function uploadFile(file) {
         errorDetails.textContent = error.message || 'Er is een fout opgetreden bij het uploaden van het bestand';
     }
 }
+// Status van de achtergrondjob opvragen tot die klaar is; na JOB_TIMEOUT_MS stopt het wachten
+// (de job zelf kan nog afronden), zodat een vastgelopen job de pagina niet eindeloos laat pollen
+const JOB_POLL_MS = 1000;
+const JOB_TIMEOUT_MS = 10 * 60 * 1000;
+async function waitForJob(statusUrl) {
+    const deadline = Date.now() + JOB_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+        const response = await fetch(`${API_BASE_URL}${statusUrl}`);
+        if (!response.ok) {
+            throw new Error(`Job status request failed (status ${response.status})`);
+        }
+        const job = await response.json();
+        if (job.status === 'completed') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Verwerking van het bestand is mislukt');
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_MS));
+    }
+    throw new Error('De verwerking duurt langer dan verwacht; controleer de data later opnieuw');
+}
 function resetUploadState() {
     selectedFile = null;
     fileInput.value = '';
@@ -1,5 +1,6 @@
 import requests
 import sys
+import time
 from pathlib import Path
 API_BASE_URL = "http://localhost:8000"
 def test_health_check():
@@ -25,8 +26,13 @@ def test_upload_csv(csv_file_path):
         with open(csv_file_path, 'rb') as f:
             files = {'file': (csv_file_path.name, f, 'text/csv')}
             response = requests.post(f"{API_BASE_URL}/api/upload", files=files)
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             data = response.json()
+            # The backend processes uploads as a background job
+            if response.status_code == 202:
+                data = wait_for_job(data['status_url'])
+                if data is None:
+                    return False
             print(f" Upload successful!")
             print(f"   Records processed: {data['records_processed']}")
             print(f"   Date range: {data['date_range']['start']} to {data['date_range']['end']}")
@@ -38,6 +44,18 @@ def test_upload_csv(csv_file_path):
     except Exception as e:
         print(f" Upload error: {str(e)}")
         return False
+def wait_for_job(status_url, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = requests.get(f"{API_BASE_URL}{status_url}").json()
+        if job['status'] == 'completed':
+            return job['result']
+        if job['status'] == 'failed':
+            print(f" Upload job failed: {job.get('error')}")
+            return None
+        time.sleep(0.5)
+    print(f" Upload job did not finish within {timeout}s")
+    return None
 def test_get_stats():
     print("\n Testing stats endpoint...")
     try:
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import pytest
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.join(ROOT, "api"))
+import main
+import index
+import cache
+import registry
+import predict
+import jobs
+import metrics
+def make_prices(n: int, seed: int = 42, gaps: bool = False, flat: bool = False) -> pd.DataFrame:
+    # Random walk OHLCV. gaps adds overnight price jumps, flat holds the close constant for
+    # stretches longer than the RSI period so the average loss (and gain) drops to 0
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 10, n)
+    if gaps:
+        jumps = rng.random(n) < 0.02
+        steps[jumps] += rng.normal(0, 150, jumps.sum())
+    if flat:
+        for begin in range(50, n, 200):
+            steps[begin:begin + 40] = 0.0
+    close = 4000.0 + np.cumsum(steps)
+    return pd.DataFrame({
+        "open": close - rng.normal(0, 2, n),
+        "high": close + np.abs(rng.normal(0, 5, n)),
+        "low": close - np.abs(rng.normal(0, 5, n)),
+        "close": close,
+        "volume": rng.integers(1_000, 1_000_000, n).astype(float),
+    })
+def make_ohlcv(n: int, seed: int = 42, start: str = "1990-01-01", gaps: bool = False,
+               flat: bool = False) -> pd.DataFrame:
+    # TradingView's columns, with epoch seconds in 'time' at midday so the api's local-time
+    # parsing gives the same dates in any timezone; gaps also skips weekends
+    dates = pd.bdate_range(start, periods=n) if gaps else pd.date_range(start, periods=n)
+    df = make_prices(n, seed, gaps, flat)
+    df.insert(0, "time", (dates - pd.Timestamp(0)) // pd.Timedelta(seconds=1) + 12 * 3600)
+    return df
+FIXTURES = {
+    "random_walk": dict(n=2_000),
+    "gaps": dict(n=2_000, gaps=True),
+    "flat": dict(n=2_000, flat=True),
+    "short": dict(n=10),
+}
+@pytest.fixture(params=sorted(FIXTURES))
+def ohlcv(request) -> pd.DataFrame:
+    return make_ohlcv(**FIXTURES[request.param])
+def to_csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode()
+@pytest.fixture
+def backend_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "DB_PATH", str(tmp_path / "backend.db"))
+    main.init_db()
+    cache.clear()
+    registry.clear()
+    predict.clear()
+    yield main.DB_PATH
+    main.db.close_all()
+@pytest.fixture
+def api_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(index, "DB_PATH", str(tmp_path / "api.db"))
+    monkeypatch.setattr(index, "_conn", None)
+    index._response_cache.clear()
+    yield index.DB_PATH
+    if index._conn is not None:
+        index._conn.close()
+@pytest.fixture
+def thread_jobs(monkeypatch):
+    monkeypatch.setattr(jobs, "EXECUTOR_KIND", "thread")
+    monkeypatch.setattr(jobs, "_executor", None)
+    metrics.reset()
+    yield
+    jobs.shutdown()
+def wait_for(client, job_id: str) -> dict:
+    for _ in range(200):
+        status = client.get(f"/api/jobs/{job_id}").json()
+        if status["status"] in ("completed", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
@@ -0,0 +1,74 @@
+import io
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv
+import main
+import backtest
+def loop_backtest(bars: pd.DataFrame, lower: float, upper: float, cost: float):
+    # Per-bar reference of the rsi strategy
+    rsi, close = bars['rsi'].to_numpy(dtype=float), bars['close'].to_numpy(dtype=float)
+    equity, position, trades = [1.0], 0, []
+    for i in range(1, len(bars)):
+        value = equity[-1] * (1 + position * (close[i] / close[i - 1] - 1))
+        if position == 0 and rsi[i - 1] >= lower > rsi[i]:
+            position, entry = 1, (i, value)
+            value *= 1 - cost
+        elif position == 1 and rsi[i - 1] <= upper < rsi[i]:
+            position = 0
+            value *= 1 - cost
+            trades.append((entry[0], i, value / entry[1] - 1))
+        equity.append(value)
+    return np.array(equity), trades
+def test_hold_keeps_position_between_signals():
+    entries = np.array([0, 1, 0, 1, 0, 0, 1, 1, 0], dtype=bool)
+    exits = np.array([1, 0, 0, 0, 1, 0, 0, 1, 0], dtype=bool)
+    assert backtest.hold(entries, exits).tolist() == [0, 1, 1, 1, 0, 0, 1, 0, 0]
+def test_rsi_strategy_matches_loop():
+    bars = main.process_csv_data(to_csv(make_ohlcv(3_000, gaps=True)))
+    result = backtest.run(bars, "rsi", {"period": 14, "lower": 35.0, "upper": 65.0}, cost_bps=10.0)
+    equity, trades = loop_backtest(bars, 35.0, 65.0, 0.001)
+    np.testing.assert_allclose(result["equity_curve"]["equity"], np.round(equity * 10_000, 2))
+    closed = [trade for trade in result["trades"] if not trade["open"]]
+    assert [(bars['date'][a], bars['date'][b]) for a, b, _ in trades] == [(t["entry_date"], t["exit_date"]) for t in closed]
+    np.testing.assert_allclose([t["return"] for t in closed], [r for *_, r in trades], atol=1e-6)
+    assert len(trades) > 5
+def test_stats():
+    bars = pd.DataFrame({
+        "date": ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"],
+        "close": [100.0, 100.0, 110.0, 99.0, 99.0],
+        "rsi": np.nan,
+        "macd_hist": [-1.0, 1.0, 2.0, -1.0, -2.0],
+    })
+    result = backtest.run(bars, "macd", {"fast": 12, "slow": 26, "signal": 9})
+    stats = result["stats"]
+    assert result["equity_curve"]["equity"] == [10000.0, 10000.0, 11000.0, 9900.0, 9900.0]
+    assert result["trades"] == [{"entry_date": "2024-01-02", "entry_price": 100.0, "exit_date": "2024-01-04",
+                                 "exit_price": 99.0, "bars": 2, "return": -0.01, "open": False}]
+    assert stats["total_return"] == -0.01 and stats["buy_and_hold_return"] == -0.01
+    assert stats["max_drawdown"] == -0.1
+    assert result["equity_curve"]["drawdown"] == [0.0, 0.0, 0.0, -0.1, -0.1]
+    assert (stats["max_drawdown_start"], stats["max_drawdown_end"]) == ("2024-01-03", "2024-01-04")
+    assert stats["exposure"] == 0.4 and stats["win_rate"] == 0.0
+def test_computed_indicators_match_stored():
+    bars = main.process_csv_data(to_csv(make_ohlcv(2_000)))
+    stored = {column: bars[column].to_numpy(dtype=float) for column in backtest.COLUMNS}
+    computed = {'close': stored['close']}
+    np.testing.assert_allclose(backtest.rsi_values(computed, 14), stored['rsi'], equal_nan=True)
+    np.testing.assert_allclose(backtest.macd_hist_values(computed, 12, 26, 9), stored['macd_hist'], atol=1e-9)
+    assert ('rsi', 14) in computed and backtest.rsi_values(stored, 14) is stored['rsi']
+def test_backtest_endpoint(backend_db):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(2_000, gaps=True))), "replace", "SPX")
+    with TestClient(main.app) as client:
+        response = client.get("/api/backtest?strategy=rsi&lower=35&upper=65&cost_bps=5&start=1991-01-01")
+        unknown = client.get("/api/backtest?strategy=rsi&length=7")
+        inverted = client.get("/api/backtest?strategy=rsi&lower=70&upper=30")
+        strategies = client.get("/api/backtest/strategies").json()
+    body = response.json()
+    assert response.status_code == 200 and "ETag" in response.headers
+    assert body["symbol"] == "SPX" and body["params"] == {"period": 14, "lower": 35.0, "upper": 65.0}
+    assert body["equity_curve"]["date"][0] >= "1991-01-01"
+    assert body["stats"]["trades"] == len(body["trades"]) > 0
+    assert unknown.status_code == 400 and inverted.status_code == 400
+    assert strategies == {"macd": {"fast": 12, "slow": 26, "signal": 9},
+                          "rsi": {"period": 14, "lower": 30.0, "upper": 70.0}}
@@ -0,0 +1,61 @@
+import io
+import pytest
+from conftest import make_ohlcv, to_csv
+import main
+import index
+import columnar
+pytest.importorskip("pytest_benchmark")
+# Throughput of the ingest and query hot paths. Compare runs with
+#   pytest tests/test_benchmarks.py --benchmark-autosave
+#   pytest tests/test_benchmarks.py --benchmark-compare --benchmark-compare-fail=mean:20%
+INGEST_ROWS = 100_000
+QUERY_ROWS = 5_000
+@pytest.fixture(scope="module")
+def daily_csv() -> bytes:
+    return to_csv(make_ohlcv(INGEST_ROWS, start="1700-01-01"))
+def rows_per_second(benchmark, rows: int):
+    benchmark.extra_info["rows"] = rows
+    benchmark.extra_info["rows_per_s"] = round(rows / benchmark.stats.stats.mean)
+def test_backend_parse(benchmark, daily_csv):
+    df = benchmark(main.parse_ohlcv_csv, daily_csv)
+    assert len(df) == INGEST_ROWS
+    rows_per_second(benchmark, INGEST_ROWS)
+def test_api_parse(benchmark, daily_csv):
+    rows = index.read_csv_rows(daily_csv)
+    bars = benchmark(index.parse_bars, rows)
+    assert len(bars) == INGEST_ROWS
+    rows_per_second(benchmark, INGEST_ROWS)
+def test_backend_ingest(benchmark, backend_db, daily_csv):
+    summary = benchmark.pedantic(main.ingest_csv_stream, rounds=3, iterations=1,
+                                 setup=lambda: ((io.BytesIO(daily_csv), "replace", "BENCH"), {}))
+    assert summary["records_processed"] == INGEST_ROWS
+    rows_per_second(benchmark, INGEST_ROWS)
+def test_backend_query(benchmark, backend_db, daily_csv):
+    main.ingest_csv_stream(io.BytesIO(daily_csv), "replace", "BENCH")
+    body = benchmark(lambda: columnar.encode_json(main.daily_data("BENCH", QUERY_ROWS)))
+    assert body.startswith(b"[")
+    rows_per_second(benchmark, QUERY_ROWS)
+def test_backend_backtest(benchmark, backend_db, daily_csv):
+    main.ingest_csv_stream(io.BytesIO(daily_csv), "replace", "BENCH")
+    result = benchmark(main.backtest_data, "BENCH", "rsi", {"period": 14, "lower": 30.0, "upper": 70.0}, 10_000.0, 5.0)
+    assert result["stats"]["bars"] == INGEST_ROWS
+    rows_per_second(benchmark, INGEST_ROWS)
+def test_api_ingest(benchmark, api_db, daily_csv):
+    def ingest():
+        data = index.process_daily_data(index.iter_csv_rows(io.BytesIO(daily_csv)))
+        index.save_data("daily", "BENCH", data)
+        return data
+    data = benchmark.pedantic(ingest, rounds=3, iterations=1)
+    assert len(data) == INGEST_ROWS
+    rows_per_second(benchmark, INGEST_ROWS)
+def test_api_query(benchmark, api_db, daily_csv):
+    index.save_data("daily", "BENCH", index.process_daily_data(index.iter_csv_rows(io.BytesIO(daily_csv))))
+    body = benchmark(lambda: index.encode_json(index.daily_rows("BENCH", QUERY_ROWS, index.RESPONSE_FIELDS["daily"])))
+    assert body.startswith(b"[")
+    rows_per_second(benchmark, QUERY_ROWS)
+def test_backend_predict(benchmark, backend_db, daily_csv):
+    # A dashboard load after the first: the fitted model and its predictions come from the cache
+    main.ingest_csv_stream(io.BytesIO(daily_csv), "replace", "BENCH")
+    main.predict_data("BENCH", "logistic", 1, 20)
+    result = benchmark(main.predict_data, "BENCH", "logistic", 1, 20)
+    assert len(result["history"]) == 20
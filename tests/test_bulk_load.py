@@ -0,0 +1,43 @@
+import pytest
+from conftest import make_ohlcv, to_csv
+import main
+import bulk_load
+def write_exports(directory, names):
+    for seed, name in enumerate(names):
+        (directory / name).write_bytes(to_csv(make_ohlcv(300, seed=seed)))
+def test_symbol_from_filename():
+    assert bulk_load.symbol_from_filename("/data/SP_SPX, 1D_3f2b1.csv") == "SPX"
+    assert bulk_load.symbol_from_filename("CME_MINI_ES1!, 1D.csv") == "ES1!"
+    assert bulk_load.symbol_from_filename("aapl.csv") == "AAPL"
+    assert bulk_load.symbol_from_filename("TVC_NDX, 1D_9a.csv.gz") == "NDX"
+@pytest.mark.parametrize("workers", [0, 2])
+def test_load_directory_and_resume(backend_db, tmp_path, workers):
+    exports = tmp_path / "exports"
+    (exports / "more").mkdir(parents=True)
+    write_exports(exports, ["SP_SPX, 1D_a1.csv", "NASDAQ_NDX, 1D_b2.csv"])
+    write_exports(exports / "more", ["BATS_AAPL, 1D.csv"])
+    paths = bulk_load.find_csv_files([str(exports)])
+    summary = bulk_load.load(paths, workers=workers, batch_rows=500)
+    assert (summary["loaded"], summary["skipped"], summary["records"]) == (3, 0, 900)
+    versions = {symbol: main.dataset_version(symbol) for symbol in ["SPX", "NDX", "AAPL"]}
+    assert 0 not in versions.values()
+    expected = main.process_csv_data(to_csv(make_ohlcv(300, seed=1)))
+    stored = main.load_ohlcv("NDX", main.DAILY)
+    assert stored['date'].tolist() == expected['date'].tolist()
+    assert stored['close'].tolist() == expected['close'].tolist()
+    assert len(main.period_data("AAPL", "1W", None)) > 0
+    (exports / "more" / "BATS_AAPL, 1D.csv").write_bytes(to_csv(make_ohlcv(400, seed=7)))
+    summary = bulk_load.load(paths, workers=workers)
+    assert (summary["loaded"], summary["skipped"], summary["records"]) == (1, 2, 400)
+    assert len(main.load_ohlcv("AAPL", main.DAILY)) == 400
+    # only the reloaded symbol invalidates its cached responses
+    assert main.dataset_version("AAPL") != versions["AAPL"] and main.dataset_version("SPX") == versions["SPX"]
+def test_failed_file_is_not_recorded(backend_db, tmp_path):
+    (tmp_path / "SP_SPX, 1D.csv").write_bytes(b"time,open\n1,2\n")
+    paths = bulk_load.find_csv_files([str(tmp_path / "*.csv")])
+    assert bulk_load.load(paths, workers=0)["failed"] == paths
+    assert bulk_load.already_ingested([bulk_load.file_digest(paths[0])]) == set()
+def test_duplicate_symbols_are_rejected(backend_db, tmp_path):
+    write_exports(tmp_path, ["SP_SPX, 1D_a.csv", "TVC_SPX, 1D_b.csv"])
+    with pytest.raises(ValueError, match="SPX"):
+        bulk_load.load(bulk_load.find_csv_files([str(tmp_path)]), workers=0)
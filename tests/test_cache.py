@@ -0,0 +1,46 @@
+import io
+import pytest
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv, wait_for
+import main
+import cache
+import db
+def test_not_modified_until_upload(backend_db, thread_jobs):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(300))), "replace", "SPX")
+    with TestClient(main.app) as client:
+        first = client.get("/api/daily-data?limit=5")
+        etag = first.headers["ETag"]
+        again = client.get("/api/daily-data?limit=5", headers={"If-None-Match": etag})
+        other = client.get("/api/daily-data?limit=5&symbol=QQQ", headers={"If-None-Match": etag})
+        response = client.post("/api/upload", files={"file": ("spx.csv", to_csv(make_ohlcv(301)))})
+        assert wait_for(client, response.json()["job_id"])["status"] == "completed"
+        after = client.get("/api/daily-data?limit=5", headers={"If-None-Match": etag})
+    assert first.status_code == 200 and again.status_code == 304 and again.headers["ETag"] == etag
+    assert other.status_code == 200
+    assert after.status_code == 200 and after.headers["ETag"] != etag
+    assert after.json()[-1]["date"] > first.json()[-1]["date"]
+def test_version_is_shared_through_the_database(backend_db):
+    # A write from another process (an ingest worker, bulk_load.py) bumps the version every
+    # API process reads, and a restart keeps it
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(300))), "replace", "SPX")
+    version = main.dataset_version("SPX")
+    with TestClient(main.app) as client:
+        etag = client.get("/api/stats").headers["ETag"]
+        cache.clear()
+        assert client.get("/api/stats", headers={"If-None-Match": etag}).status_code == 304
+        conn = db.connect(main.DB_PATH)
+        with conn:
+            cache.bump_version(conn, "SPX")
+        conn.close()
+        assert client.get("/api/stats", headers={"If-None-Match": etag}).status_code == 200
+    assert version != 0 and main.dataset_version("SPX") not in (0, version)
+    assert main.dataset_version("QQQ") == 0
+def test_failed_write_keeps_version(backend_db, monkeypatch):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(300))), "replace", "SPX")
+    version = main.dataset_version("SPX")
+    def fail(conn, symbol):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(main.screener, "refresh", fail)
+    with pytest.raises(RuntimeError):
+        main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(400))), "replace", "SPX")
+    assert main.dataset_version("SPX") == version
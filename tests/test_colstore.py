@@ -0,0 +1,113 @@
+import io
+import os
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv
+import main
+import cache
+import colstore
+import columnar
+import predict
+import db
+@pytest.fixture
+def column_store(backend_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(colstore, "ROOT", str(tmp_path / "columns"))
+    colstore.clear()
+    yield colstore.ROOT
+    colstore.clear()
+def generations(symbol: str, timeframe: str):
+    return sorted(os.listdir(colstore.dataset_dir(symbol, timeframe)))
+def from_sqlite(monkeypatch, *args):
+    with monkeypatch.context() as m:
+        m.setattr(colstore, "ROOT", None)
+        return main.read_columns(*args)
+def test_reads_match_sqlite(column_store, monkeypatch):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(2_000, gaps=True))), "replace", "SPX")
+    for timeframe in [main.DAILY] + main.DERIVED_TIMEFRAMES:
+        for bounds in [(None, None), ("1991-03-04", "1993-12-31"), ("1991-03-02", None), ("2100-01-01", None)]:
+            dates, columns = main.read_columns("SPX", timeframe, list(colstore.COLUMNS), *bounds)
+            expected_dates, expected = from_sqlite(monkeypatch, "SPX", timeframe, list(colstore.COLUMNS), *bounds)
+            assert dates.tolist() == expected_dates.tolist()
+            for column in colstore.COLUMNS:
+                np.testing.assert_array_equal(columns[column], expected[column])
+    dates, columns = main.read_columns("SPX", main.DAILY, ['close'], "1991-03-04")
+    assert dates[0] == "1991-03-04" and isinstance(columns['close'], np.memmap)
+    assert not columns['close'].flags.writeable
+def test_generations_replace_atomically(column_store, monkeypatch):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(500))), "replace", "SPX")
+    first = generations("SPX", main.DAILY)
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(600))), "replace", "SPX")
+    second = generations("SPX", main.DAILY)
+    assert len(first) == 1 and len(second) == 2 and first[0] in second
+    dates, columns = main.read_columns("SPX", main.DAILY, ['close'])
+    assert len(dates) == 600
+    # an ingest failing after its export rolls back to the committed generation; the next
+    # export removes the orphaned files
+    def export_then_fail(*args, export=main._export_columns):
+        export(*args)
+        raise RuntimeError("disk full")
+    with monkeypatch.context() as m:
+        m.setattr(main, "_export_columns", export_then_fail)
+        with pytest.raises(RuntimeError):
+            main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(700))), "replace", "SPX")
+    orphaned = set(generations("SPX", main.DAILY)) - set(second)
+    assert len(main.read_columns("SPX", main.DAILY, ['close'])[0]) == 600
+    main.upsert_to_db(main.process_csv_data(to_csv(make_ohlcv(601)))[-1:], "SPX")
+    assert len(orphaned) == 1 and not orphaned & set(generations("SPX", main.DAILY))
+    assert len(main.read_columns("SPX", main.DAILY, ['close'])[0]) == 601
+def test_append_only_reads_changed_bars(column_store, monkeypatch):
+    df = make_ohlcv(1_000, gaps=True)
+    main.ingest_csv_stream(io.BytesIO(to_csv(df.iloc[:900])), "replace", "SPX")
+    # a change SQLite got behind the column store's back stays invisible to an append's export,
+    # which copies the unchanged bars from the current files
+    with db.connection(main.DB_PATH) as conn:
+        conn.execute("UPDATE bars SET volume = -1 WHERE symbol = 'SPX' AND ts < '1990-06-01'")
+        conn.commit()
+    revised = df.iloc[898:].copy()
+    revised.iloc[0, revised.columns.get_loc('close')] += 100
+    main.ingest_csv_stream(io.BytesIO(to_csv(revised)), "append", "SPX")
+    for timeframe in [main.DAILY] + main.DERIVED_TIMEFRAMES:
+        dates, columns = main.read_columns("SPX", timeframe, list(colstore.COLUMNS))
+        expected_dates, expected = from_sqlite(monkeypatch, "SPX", timeframe, list(colstore.COLUMNS))
+        assert dates.tolist() == expected_dates.tolist() and len(dates)
+        changed = expected['volume'] == -1
+        assert changed.any() and not (columns['volume'] == -1).any()
+        for column in colstore.COLUMNS:
+            if column != 'volume':
+                np.testing.assert_array_equal(columns[column], expected[column])
+        np.testing.assert_array_equal(columns['volume'][~changed], expected['volume'][~changed])
+def test_backfill_on_startup(backend_db, tmp_path, monkeypatch):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(300))), "replace", "SPX")
+    monkeypatch.setattr(colstore, "ROOT", str(tmp_path / "columns"))
+    main.init_db()
+    with db.connection(main.DB_PATH) as conn:
+        rows = conn.execute("SELECT timeframe, rows FROM column_store WHERE symbol = 'SPX' ORDER BY timeframe").fetchall()
+    assert dict(rows)[main.DAILY] == 300 and len(rows) == 1 + len(main.DERIVED_TIMEFRAMES)
+def test_endpoints_match_sqlite(column_store, monkeypatch):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(2_000, gaps=True))), "replace", "SPX")
+    urls = ["/api/backtest?strategy=rsi&start=1991-01-01&cost_bps=5", "/api/predict?model=ridge&limit=50"]
+    with TestClient(main.app) as client:
+        mapped = [client.get(url).json() for url in urls]
+        monkeypatch.setattr(colstore, "ROOT", None)
+        cache.clear()
+        predict.clear()
+        stored = [client.get(url).json() for url in urls]
+    assert mapped == stored
+def test_columnar_pages_match_sqlite(column_store, monkeypatch):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(500, gaps=True))), "replace", "SPX")
+    dates = main.read_columns("SPX", main.DAILY, [])[0]
+    queries = ["", "&limit=7", f"&limit=7&after={dates[100]}", f"&limit=7&before={dates[100]}",
+               f"&start={dates[10]}&end={dates[20]}&limit=3", f"&after={dates[-1]}", "&fields=rsi&limit=20"]
+    def fetch(query):
+        response = TestClient(main.app).get(f"/api/daily-data?symbol=SPX{query}", headers={"Accept": columnar.NPY})
+        return np.load(io.BytesIO(response.content))
+    mapped = [fetch(query) for query in queries]
+    monkeypatch.setattr(colstore, "ROOT", None)
+    cache.clear()
+    for query, bars in zip(queries, mapped):
+        expected = fetch(query)
+        assert bars.dtype == expected.dtype and len(bars) == len(expected), query
+        for name in bars.dtype.names:
+            np.testing.assert_array_equal(bars[name], expected[name])
+    assert len(mapped[2]) == 7 and str(mapped[2]['date'][0]) == dates[101]
@@ -0,0 +1,96 @@
+import io
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from conftest import make_ohlcv, to_csv
+import main
+import columnar
+def legacy_daily_data(symbol: str, limit: int) -> bytes:
+    # The per-row round()/int() loop that bar_rows replaced, encoded as FastAPI encodes a list
+    rows = main.query_bars(symbol, main.DAILY, main.BAR_COLUMNS[1:], limit)
+    def r(value):
+        return round(value, 2) if value is not None else None
+    result = [{
+        "date": row[0], "open": r(row[1]), "high": r(row[2]), "low": r(row[3]), "close": r(row[4]),
+        "volume": int(row[5]) if row[5] is not None else None, "high_prev_close_diff": r(row[6]),
+        "rsi": r(row[7]), "macd": {"line": r(row[8]), "signal": r(row[9]), "hist": r(row[10])},
+    } for row in rows]
+    return JSONResponse(jsonable_encoder(result)).body
+def test_sql_rounding_matches_round(backend_db):
+    # Prices quoted in eighths put every price (and every high - previous close) exactly on a
+    # half cent, where rounding half away from zero and round() disagree
+    df = make_ohlcv(2_000, gaps=True)
+    for name in ['open', 'high', 'low', 'close']:
+        df[name] = np.round(df[name] * 8) / 8
+    main.ingest_csv_stream(io.BytesIO(to_csv(df)), "replace", "SPX")
+    assert (main.load_ohlcv("SPX", main.DAILY)['close'] * 100 % 1 == 0.5).any()
+    assert columnar.encode_json(main.daily_data("SPX", 2_000)) == legacy_daily_data("SPX", 2_000)
+@pytest.mark.parametrize("accept,expected", [
+    (None, columnar.JSON),
+    ("text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8", columnar.JSON),
+    ("*/*", columnar.JSON),
+    ("application/json", columnar.JSON),
+    (columnar.NPY, columnar.NPY),
+    (f"application/json, {columnar.NPY};q=0.5", columnar.NPY),
+    (f"{columnar.NPY};q=0", columnar.JSON),
+    (f"{columnar.NPY};q=abc", columnar.JSON),
+    (f"{columnar.NPY};q=0.5, {columnar.ARROW_STREAM}", columnar.ARROW_STREAM),
+    (f"{columnar.NPY}, {columnar.ARROW_STREAM};q=0.9", columnar.NPY),
+])
+def test_negotiate(accept, expected):
+    assert columnar.negotiate(accept) == expected
+def test_arrow_is_only_offered_with_pyarrow(monkeypatch):
+    monkeypatch.setattr(columnar, "MEDIA_TYPES", [columnar.NPY])
+    assert columnar.negotiate(columnar.ARROW_STREAM) == columnar.JSON
+    assert columnar.negotiate(f"{columnar.ARROW_STREAM}, {columnar.NPY};q=0.1") == columnar.NPY
+@pytest.fixture
+def client(backend_db):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(300))), "replace", "SPX")
+    with TestClient(main.app) as client:
+        yield client
+def stored(columns, limit=None):
+    rows = main.query_bars("SPX", main.DAILY, columns, limit)
+    return [row[0] for row in rows], np.array([row[1:] for row in rows], dtype=float).reshape(len(rows), len(columns))
+def test_npy_response(client):
+    response = client.get("/api/daily-data?symbol=SPX", headers={"Accept": columnar.NPY})
+    assert response.status_code == 200 and response.headers["content-type"] == columnar.NPY
+    bars = np.load(io.BytesIO(response.content), allow_pickle=False)
+    # without limit the whole history, unrounded, with NULL as NaN
+    dates, values = stored(main.BAR_COLUMNS[1:])
+    assert bars.dtype.names == ('date', *main.BAR_COLUMNS[1:])
+    assert bars['date'].dtype == np.dtype('<M8[D]') and bars['date'].astype(str).tolist() == dates
+    for i, name in enumerate(main.BAR_COLUMNS[1:]):
+        np.testing.assert_array_equal(bars[name], values[:, i])
+    assert np.isnan(bars['rsi'][0])
+    projected = np.load(io.BytesIO(client.get("/api/daily-data?symbol=SPX&limit=5&fields=close,macd",
+                                              headers={"Accept": columnar.NPY}).content))
+    assert projected.dtype.names == ('date', 'close', 'macd_line', 'macd_signal', 'macd_hist')
+    np.testing.assert_array_equal(projected['close'], stored(['close'], 5)[1][:, 0])
+def test_arrow_response(client):
+    pa = pytest.importorskip("pyarrow")
+    response = client.get("/api/daily-data?symbol=SPX&fields=close,rsi", headers={"Accept": columnar.ARROW_STREAM})
+    assert response.status_code == 200 and response.headers["content-type"] == columnar.ARROW_STREAM
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == ['date', 'close', 'rsi']
+    assert table.schema.field('date').type == pa.date32() and table.schema.field('rsi').type == pa.float64()
+    dates, values = stored(['close', 'rsi'])
+    assert [d.isoformat() for d in table['date'].to_pylist()] == dates
+    assert table['close'].to_pylist() == values[:, 0].tolist()
+    # NaN is sent as null
+    rsi = table['rsi'].to_pylist()
+    assert rsi[0] is None and table['rsi'].null_count == np.isnan(values[:, 1]).sum()
+    assert rsi[-1] == values[-1, 1]
+def test_media_types_vary_on_accept(client):
+    json_response = client.get("/api/daily-data?symbol=SPX&limit=5")
+    npy = client.get("/api/daily-data?symbol=SPX&limit=5", headers={"Accept": columnar.NPY})
+    browser = client.get("/api/daily-data?symbol=SPX&limit=5", headers={"Accept": "text/html,*/*;q=0.8"})
+    assert json_response.headers["Vary"] == npy.headers["Vary"] == "Accept"
+    assert json_response.headers["content-type"] == browser.headers["content-type"] == columnar.JSON
+    assert browser.content == json_response.content and len(browser.json()) == 5
+    # a representation's ETag never validates another one
+    assert npy.headers["ETag"] != json_response.headers["ETag"]
+    revalidated = client.get("/api/daily-data?symbol=SPX&limit=5",
+                             headers={"Accept": columnar.NPY, "If-None-Match": json_response.headers["ETag"]})
+    assert revalidated.status_code == 200 and revalidated.content == npy.content
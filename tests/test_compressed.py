@@ -0,0 +1,79 @@
+import gzip
+import pytest
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv, wait_for
+import main
+import compressed
+CODECS = {"gz": gzip.compress}
+if compressed.HAS_ZSTD:
+    import zstandard
+    CODECS["zst"] = zstandard.ZstdCompressor().compress
+def test_stream_rewinds_and_matches(tmp_path):
+    csv = to_csv(make_ohlcv(5_000))
+    for suffix, compress in CODECS.items():
+        path = tmp_path / f"spx.csv.{suffix}"
+        path.write_bytes(compress(csv[:1000]) + compress(csv[1000:]))  # two members / frames
+        with compressed.open_file(str(path)) as f:
+            assert f.readline() == csv.split(b"\n", 1)[0] + b"\n"
+            f.seek(0)
+            assert f.read() == csv
+def test_open_file_closes_the_source_on_errors(tmp_path, monkeypatch):
+    opened = []
+    def tracked(*args):
+        opened.append(open(*args))
+        return opened[-1]
+    monkeypatch.setattr(compressed, "open", tracked, raising=False)
+    (tmp_path / "spx.txt").write_bytes(b"time,open\n")
+    with pytest.raises(ValueError):
+        compressed.open_file(str(tmp_path / "spx.txt"))
+    (tmp_path / "spx.csv.gz").write_bytes(gzip.compress(b"time,open\n"))
+    monkeypatch.setattr(compressed, "DecompressingReader", lambda *args: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        compressed.open_file(str(tmp_path / "spx.csv.gz"))
+    assert opened and all(f.closed for f in opened)
+@pytest.mark.parametrize("suffix", sorted(CODECS))
+def test_compressed_upload(backend_db, thread_jobs, suffix):
+    csv = to_csv(make_ohlcv(3_000))
+    with TestClient(main.app) as client:
+        response = client.post("/api/upload?symbol=SPX",
+                               files={"file": (f"spx.csv.{suffix}", CODECS[suffix](csv), "application/octet-stream")})
+        assert response.status_code == 202
+        status = wait_for(client, response.json()["job_id"])
+    assert status["status"] == "completed"
+    assert status["result"]["records_processed"] == 3_000
+    expected = main.process_csv_data(csv)
+    assert main.load_ohlcv("SPX", main.DAILY)['close'].tolist() == expected['close'].tolist()
+def test_compressed_monthly_upload_is_parsed_in_chunks(backend_db, thread_jobs, monkeypatch):
+    # Rows out of order across chunks still give the same bars as parsing the whole file
+    monkeypatch.setattr(main, "CSV_CHUNK_ROWS", 37)
+    df = make_ohlcv(300, seed=3)
+    csv = to_csv(df.sample(frac=1, random_state=1))
+    read = []
+    monkeypatch.setattr(main, "iter_ohlcv_chunks", lambda f, iterate=main.iter_ohlcv_chunks: read.append(f) or iterate(f))
+    with TestClient(main.app) as client:
+        response = client.post("/api/upload-monthly?symbol=SPX", files={"file": ("spx.csv.gz", gzip.compress(csv))})
+        status = wait_for(client, response.json()["job_id"])
+    assert status["status"] == "completed" and status["result"]["records_processed"] == 300
+    assert len(read) == 1
+    stored = main.load_ohlcv("SPX", main.MONTHLY)
+    expected = main.process_monthly_csv_data(csv)
+    assert stored['date'].tolist() == expected['date'].tolist()
+    assert stored['close'].tolist() == expected['close'].tolist()
+def test_rejected_uploads(backend_db, thread_jobs):
+    with TestClient(main.app) as client:
+        wrong_type = client.post("/api/upload", files={"file": ("spx.txt", b"time,open\n", "text/plain")})
+        corrupt = client.post("/api/upload", files={"file": ("spx.csv.gz", b"not gzip at all", "application/gzip")})
+    assert wrong_type.status_code == 400 and ".csv.gz" in wrong_type.json()["detail"]
+    assert corrupt.status_code == 400 and "decompress" in corrupt.json()["detail"]
+def test_response_compression(backend_db, thread_jobs):
+    with TestClient(main.app) as client:
+        response = client.post("/api/upload", files={"file": ("spx.csv", to_csv(make_ohlcv(2_000)), "text/csv")})
+        wait_for(client, response.json()["job_id"])
+        large = client.get("/api/daily-data", headers={"Accept-Encoding": "gzip"})
+        small = client.get("/api/daily-data?limit=1", headers={"Accept-Encoding": "gzip"})
+        plain = client.get("/api/daily-data", headers={"Accept-Encoding": "identity"})
+    assert large.headers["content-encoding"] == "gzip"
+    assert {"Accept", "Accept-Encoding"} <= {value.strip() for value in large.headers["vary"].split(",")}
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in plain.headers
+    assert large.json() == plain.json()
@@ -0,0 +1,46 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv, wait_for
+import main
+import jobs
+def test_full_queue_is_rejected_with_429(backend_db, thread_jobs, monkeypatch, tmp_path):
+    monkeypatch.setattr(jobs, "MAX_PENDING", 2)
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    os.mkdir(main.UPLOAD_DIR)
+    release = threading.Event()
+    def blocked(path, mode, symbol):
+        release.wait(10)
+        return {"records_processed": 0}
+    monkeypatch.setattr(main, "ingest_daily_file", blocked)
+    csv = to_csv(make_ohlcv(50))
+    with TestClient(main.app) as client:
+        upload = lambda: client.post("/api/upload", files={"file": ("export.csv", csv)})
+        accepted = [upload(), upload()]
+        rejected = upload()
+        spooled = len(os.listdir(main.UPLOAD_DIR))
+        release.set()
+        for response in accepted:
+            assert wait_for(client, response.json()["job_id"])["status"] == "completed"
+        after = upload()
+    assert [response.status_code for response in accepted] == [202, 202]
+    assert rejected.status_code == 429 and "Too many pending jobs" in rejected.json()["detail"]
+    # the rejected upload's spooled file is removed, and the queue accepts work again once drained
+    assert spooled == 2 and after.status_code == 202
+def test_concurrent_submits_respect_max_pending(thread_jobs, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_PENDING", 3)
+    release = threading.Event()
+    def submit(_):
+        try:
+            return jobs.submit_job("test", release.wait, 10)['id']
+        except jobs.JobQueueFull:
+            return None
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        submitted = list(pool.map(submit, range(64)))
+    accepted = [job_id for job_id in submitted if job_id]
+    assert len(accepted) == 3 and jobs.pending_jobs() == 3
+    release.set()
+    for job_id in accepted:
+        jobs._jobs[job_id]['future'].result(10)
+    assert jobs.pending_jobs() == 0 and all(jobs.get_job(job_id)["status"] == "completed" for job_id in accepted)
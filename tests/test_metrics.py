@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv, wait_for
+import main
+import metrics
+def test_histogram_and_counter_rendering():
+    histogram = metrics.Histogram("test_seconds", "test", ("op",), buckets=(0.1, 1.0))
+    counter = metrics.Counter("test_total", "test", ("op",))
+    try:
+        for value in [0.05, 0.5, 5.0]:
+            histogram.observe(value, op="a")
+        counter.inc(3, op='q"uote')
+        text = metrics.render()
+    finally:
+        metrics._registry.remove(histogram)
+        metrics._registry.remove(counter)
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{op="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{op="a",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{op="a",le="+Inf"} 3' in text
+    assert 'test_seconds_sum{op="a"} 5.55' in text
+    assert 'test_seconds_count{op="a"} 3' in text
+    assert 'test_total{op="q\\"uote"} 3' in text
+def test_worker_metrics_are_merged():
+    metrics.reset()
+    metrics.ROWS_PARSED.inc(10, kind="stream")
+    metrics.PARSE_SECONDS.observe(0.2, kind="stream")
+    result = {"status": "success", "metrics": metrics.snapshot()}
+    metrics.merge_result(result)
+    assert "metrics" not in result
+    assert metrics.ROWS_PARSED.values[("stream",)] == 20
+    counts, total = metrics.PARSE_SECONDS.values[("stream",)]
+    assert sum(counts) == 2 and total == pytest.approx(0.4)
+def test_upload_profile_and_metrics_endpoint(backend_db, thread_jobs):
+    with TestClient(main.app) as client:
+        response = client.post("/api/upload?symbol=SPX&profile=true",
+                               files={"file": ("spx.csv", to_csv(make_ohlcv(500)), "text/csv")})
+        status = wait_for(client, response.json()["job_id"])
+        client.get("/api/daily-data?limit=5")
+        text = client.get("/api/metrics").text
+    assert status["status"] == "completed"
+    profile = status["result"]["profile"]
+    assert profile["total_seconds"] > 0
+    assert any("ingest_csv_stream" in entry["function"] for entry in profile["functions"])
+    assert 'csv_rows_parsed_total{kind="stream"} 500' in text
+    assert 'indicator_compute_seconds_count{indicator="kernel"} 1' in text
+    assert 'db_seconds_count{op="write"} 1' in text
+    assert 'http_request_duration_seconds_count{method="GET",endpoint="/api/jobs/{job_id}",status="200"}' in text
+    assert 'response_serialized_bytes_total{endpoint="daily-data",media_type="application/json"}' in text
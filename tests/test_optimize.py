@@ -0,0 +1,65 @@
+import io
+import pytest
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv, wait_for
+import main
+import backtest
+import optimize
+GRID = {"period": [7, 14, 21], "lower": [25, 30, 35], "upper": [65, 75]}
+@pytest.fixture
+def bars():
+    return main.process_csv_data(to_csv(make_ohlcv(3_000, gaps=True)))
+def test_expand_grid():
+    combos = optimize.expand_grid("rsi", {"period": [7, 14, 7], "upper": [80]})
+    assert combos == [{"period": 7, "lower": 30.0, "upper": 80.0}, {"period": 14, "lower": 30.0, "upper": 80.0}]
+    for grid in [{"period": [7.5]}, {"period": [0]}, {"length": [7]}, {"period": []}]:
+        with pytest.raises(ValueError):
+            optimize.expand_grid("rsi", grid)
+def test_walk_forward_windows():
+    dates = [f"{year}-{month:02d}-01" for year in range(2000, 2006) for month in range(1, 13)]
+    windows = optimize.walk_forward_windows(dates, train_years=2, test_years=1)
+    assert [(dates[a], dates[b - 1], dates[c], dates[d - 1]) for a, b, c, d in windows] == [
+        ("2000-01-01", "2001-12-01", "2002-01-01", "2002-12-01"),
+        ("2001-01-01", "2002-12-01", "2003-01-01", "2003-12-01"),
+        ("2002-01-01", "2003-12-01", "2004-01-01", "2004-12-01"),
+        ("2003-01-01", "2004-12-01", "2005-01-01", "2005-12-01"),
+    ]
+def test_sweep_matches_backtests(bars):
+    progress = []
+    result = optimize.sweep(lambda **p: progress.append(p), bars['date'].tolist(), bars['close'].to_numpy(float),
+                            "rsi", GRID, train_years=2, test_years=1, cost_bps=5.0, workers=2)
+    assert result["combinations"] == result["evaluated"] == 18
+    assert progress[-1]["combinations_done"] == 18 and len(progress) > 1
+    top = result["top"][0]
+    expected = backtest.run(bars, "rsi", top["params"], cost_bps=5.0)["stats"]
+    assert top["total_return"] == pytest.approx(expected["total_return"], abs=1e-6)
+    assert top["sharpe"] == pytest.approx(expected["sharpe"], abs=1e-4)
+    assert [entry["sharpe"] for entry in result["top"]] == sorted((entry["sharpe"] for entry in result["top"]), reverse=True)
+    # the first window's winner, from backtests of its train years with the full-history RSI
+    window = result["walk_forward"][0]
+    rows = bars.index[(bars['date'] >= window["train_start"]) & (bars['date'] <= window["train_end"])]
+    closes = {'close': bars['close'].to_numpy(dtype=float)}
+    sharpes = {}
+    for params in optimize.expand_grid("rsi", GRID):
+        train = bars.loc[rows].assign(rsi=backtest.rsi_values(closes, params["period"])[rows])
+        stats = backtest.run(train, "rsi", {**params, "period": 14}, cost_bps=5.0)["stats"]
+        sharpes[tuple(params.values())] = stats["sharpe"] if stats["sharpe"] is not None else -1e9
+    assert tuple(window["params"].values()) == max(sharpes, key=sharpes.get)
+    assert len(result["walk_forward"]) == 10 and result["out_of_sample_return"] is not None
+def test_optimize_endpoint(backend_db, thread_jobs, monkeypatch):
+    monkeypatch.setattr(optimize, "WORKERS", 2)
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(1_500, gaps=True))), "replace", "SPX")
+    with TestClient(main.app) as client:
+        response = client.post("/api/optimize", json={"strategy": "macd", "grid": {"fast": [8, 12], "slow": [21, 26]},
+                                                      "metric": "total_return"})
+        assert response.status_code == 202
+        status = wait_for(client, response.json()["job_id"])
+        invalid = client.post("/api/optimize", json={"strategy": "macd", "metric": "profit"})
+        too_big = client.post("/api/optimize", json={"strategy": "rsi", "grid": {"period": list(range(1, 1001)),
+                                                                                 "lower": list(range(1, 200))}})
+    assert status["status"] == "completed", status
+    assert status["progress"]["combinations_done"] == 4
+    result = status["result"]
+    assert result["symbol"] == "SPX" and result["evaluated"] == 4 and result["walk_forward"] == []
+    assert result["top"][0]["total_return"] >= result["top"][-1]["total_return"]
+    assert invalid.status_code == 400 and too_big.status_code == 400
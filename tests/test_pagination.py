@@ -0,0 +1,81 @@
+import io
+import re
+import pytest
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv
+import main
+import index
+DAILY_BARS = 500
+MONTHLY_BARS = 300
+@pytest.fixture(params=["backend", "api"])
+def client(request, backend_db, api_db):
+    # Same bars in both stores; every test runs against both implementations
+    daily, monthly = to_csv(make_ohlcv(DAILY_BARS, gaps=True)), to_csv(make_ohlcv(MONTHLY_BARS, seed=3))
+    if request.param == "backend":
+        main.ingest_csv_stream(io.BytesIO(daily), "replace", "SPX")
+        main.save_monthly_to_db(main.process_monthly_csv_data(monthly), "SPX")
+        with TestClient(main.app) as client:
+            yield client
+    else:
+        index.save_data("daily", "SPX", index.process_daily_data(index.read_csv_rows(daily)))
+        index.save_data("monthly", "SPX", index.process_monthly_data(index.read_csv_rows(monthly)))
+        yield TestClient(index.app)
+def all_dates(client, path: str):
+    return [row['date'] for row in client.get(f"{path}?symbol=SPX&limit=100000").json()]
+def next_link(response):
+    link = response.headers.get("Link")
+    if link is None:
+        return None
+    return re.fullmatch(r'<(.+)>; rel="next"', link).group(1)
+def walk(client, url: str):
+    # Follows rel="next" links until a page comes back without one
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append([row['date'] for row in response.json()])
+        url = next_link(response)
+    return pages
+@pytest.mark.parametrize("path,total", [("/api/daily-data", DAILY_BARS), ("/api/monthly-data", MONTHLY_BARS)])
+def test_link_walks_back_through_history(client, path, total):
+    dates = all_dates(client, path)
+    assert len(dates) == total
+    pages = walk(client, f"{path}?symbol=SPX&limit=60&fields=close")
+    # newest page first, each page oldest first; a short last page has no Link
+    assert [len(page) for page in pages] == [60] * (total // 60) + [total % 60]
+    assert [date for page in reversed(pages) for date in page] == dates
+@pytest.mark.parametrize("path,total", [("/api/daily-data", DAILY_BARS), ("/api/monthly-data", MONTHLY_BARS)])
+def test_after_walks_forward(client, path, total):
+    dates = all_dates(client, path)
+    pages = walk(client, f"{path}?symbol=SPX&limit=50&after=1900-01-01")
+    # a full last page links to an empty one
+    assert [len(page) for page in pages] == [50] * (total // 50) + [0]
+    assert [date for page in pages for date in page] == dates
+def test_cursors_are_exclusive(client):
+    dates = all_dates(client, "/api/daily-data")
+    after = client.get(f"/api/daily-data?symbol=SPX&limit=3&after={dates[100]}").json()
+    before = client.get(f"/api/daily-data?symbol=SPX&limit=3&before={dates[100]}").json()
+    assert [row['date'] for row in after] == dates[101:104]
+    assert [row['date'] for row in before] == dates[97:100]
+def test_start_and_end_are_inclusive(client):
+    dates = all_dates(client, "/api/daily-data")
+    start, end = dates[200], dates[259]
+    window = client.get(f"/api/daily-data?symbol=SPX&limit=1000&start={start}&end={end}")
+    assert [row['date'] for row in window.json()] == dates[200:260]
+    assert "Link" not in window.headers
+    # limit keeps the newest bars in the window, after= the oldest; both stay inside it
+    newest = client.get(f"/api/daily-data?symbol=SPX&limit=10&start={start}&end={end}").json()
+    assert [row['date'] for row in newest] == dates[250:260]
+    pages = walk(client, f"/api/daily-data?symbol=SPX&limit=25&start={start}&end={end}&after={dates[180]}")
+    assert [date for page in pages for date in page] == dates[200:260]
+    monthly = all_dates(client, "/api/monthly-data")
+    response = client.get(f"/api/monthly-data?symbol=SPX&start={monthly[10]}&end={monthly[19]}")
+    assert [row['date'] for row in response.json()] == monthly[10:20]
+def test_link_keeps_other_parameters(client):
+    middle = all_dates(client, "/api/daily-data")[250]
+    response = client.get(f"/api/daily-data?symbol=spx&limit=5&fields=close,rsi&before={middle}")
+    url = next_link(response)
+    assert "symbol=spx" in url and "limit=5" in url and "fields=close%2Crsi" in url
+    assert url.count("before=") == 1 and f"before={response.json()[0]['date']}" in url
+    forward = next_link(client.get(url.replace("before=", "after=")))
+    assert "before=" not in forward and "after=" in forward
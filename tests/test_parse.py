@@ -0,0 +1,36 @@
+import io
+import pytest
+import main
+import index
+import columnar
+HEADER = b"Time,Open,HIGH,low,close,Volume,Plot\n"
+CASES = {
+    "epoch": (b"1704283200,1,2,0.5,1.5,10,x\n1704196800,1,2,0.5,1.4,3,x\n", ["2024-01-02", "2024-01-03"]),
+    "iso": (b"2024-01-03,1,2,0.5,1.5,10,x\n2024-01-02,1,2,0.5,1.4,3,x\n", ["2024-01-02", "2024-01-03"]),
+    # the local date is kept, not the UTC one
+    "offset": (b"2024-01-03T00:30:00+01:00,1,2,0.5,1.5,10,x\n2024-01-02T00:30:00+01:00,1,2,0.5,1.4,3,x\n",
+               ["2024-01-02", "2024-01-03"]),
+    "us": (b"01/03/2024,1,2,0.5,1.5,10,x\n01/02/2024,1,2,0.5,1.4,3,x\n", ["2024-01-02", "2024-01-03"]),
+    "missing": (b"2024-01-03,1,2,0.5,1.5,10,x\nbad,1,2,0.5,1.4,3,x\n2024-01-04,,2,0.5,1.4,3,x\n", ["2024-01-03"]),
+}
+@pytest.fixture(params=[True, False], ids=["arrow", "pandas"])
+def engine(request, monkeypatch):
+    if request.param and not columnar.HAS_ARROW:
+        pytest.skip("pyarrow not installed")
+    monkeypatch.setattr(columnar, "HAS_ARROW", request.param)
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_time_formats(engine, case):
+    rows, dates = CASES[case]
+    df = main.parse_ohlcv_csv(HEADER + rows)
+    assert df['date'].tolist() == dates
+    assert list(df.columns) == ['date', 'open', 'high', 'low', 'close', 'volume']
+    streamed = list(main.iter_ohlcv_chunks(io.BytesIO(HEADER + rows)))
+    assert [date for chunk in streamed for date in chunk['date']] == dates
+def test_non_numeric_prices_fall_back_to_in_memory(engine):
+    csv = HEADER + b"2024-01-02,1,2,0.5,1.4,3,x\n2024-01-03,abc,2,0.5,1.5,10,x\n2024-01-04,1,2,0.5,1.6,10,x\n"
+    with pytest.raises(main.StreamingFallback):
+        list(main.iter_ohlcv_chunks(io.BytesIO(csv)))
+    assert main.parse_ohlcv_csv(csv)['date'].tolist() == ["2024-01-02", "2024-01-04"]
+def test_api_sniffs_once_and_falls_back_per_row():
+    csv = b"time,open,high,low,close,volume\n2024-01-03,1,2,0.5,1.5,10\n2024-01-02T09:30:00,1,2,0.5,1.4,3\nbad,1,2,1,1,1\n"
+    assert [bar[0].date().isoformat() for bar in index.parse_bars(index.read_csv_rows(csv))] == ["2024-01-02", "2024-01-03"]
@@ -0,0 +1,99 @@
+import io
+import time
+import numpy as np
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv
+import main
+import predict
+import columnar
+def synthetic(n: int, seed: int = 7):
+    # Bars whose next return is driven by the RSI, so a fitted model must find the signal
+    rng = np.random.default_rng(seed)
+    rsi = rng.uniform(10, 90, n)
+    returns = np.zeros(n)
+    returns[1:] = (50 - rsi[:-1]) / 5_000 + rng.normal(0, 0.002, n - 1)
+    close = 100 * np.cumprod(1 + returns)
+    zeros = np.zeros(n)
+    return {"close": close, "rsi": rsi, "macd_line": zeros, "macd_signal": zeros, "macd_hist": zeros,
+            "high_prev_close_diff": rng.uniform(0, 1, n)}
+def test_features_lag_returns():
+    bars = synthetic(10)
+    X = predict.features(bars)
+    returns = bars["close"][1:] / bars["close"][:-1] - 1
+    assert X.shape == (10, len(predict.FEATURES))
+    np.testing.assert_allclose(X[6, 5:], returns[5:0:-1])
+    assert np.isnan(X[:predict.LAGS, 5:]).any(axis=1).all() and not np.isnan(X[predict.LAGS:]).any()
+def test_models_find_signal():
+    bars = synthetic(3_000)
+    logistic = predict.train(bars, "logistic", 1)
+    ridge = predict.train(bars, "ridge", 1)
+    assert logistic["holdout"]["hit_rate"] > 0.8 and ridge["holdout"]["hit_rate"] > 0.8
+    assert ridge["holdout"]["correlation"] > 0.8
+    # high RSI predicts a fall
+    assert logistic["coefficients"]["rsi"] < 0 and ridge["coefficients"]["rsi"] < 0
+    assert 0 < np.nanmin(logistic["predictions"]) and np.nanmax(logistic["predictions"]) < 1
+def test_ridge_matches_closed_form():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(500, 3))
+    y = X @ [1.0, -2.0, 0.5] + 3.0
+    model = predict.fit("ridge", X, y, alpha=0.0)
+    np.testing.assert_allclose(predict.predict(model, X), y)
+def test_train_rejects_short_history():
+    bars = synthetic(40)
+    try:
+        predict.train(bars, "ridge", 1)
+    except ValueError as e:
+        assert "at least 50" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+def test_predict_endpoint(backend_db, monkeypatch):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(2_000, gaps=True))), "replace", "SPX")
+    trained = []
+    monkeypatch.setattr(predict, "train", lambda *args, train=predict.train: trained.append(args) or train(*args))
+    with TestClient(main.app) as client:
+        first = client.get("/api/predict?limit=5")
+        again = client.get("/api/predict?limit=10")
+        ridge = client.get("/api/predict?model=ridge&horizon=5")
+        unknown = client.get("/api/predict?model=forest")
+        start = time.perf_counter()
+        client.get("/api/predict?limit=11")
+        cached = time.perf_counter() - start
+        main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(2_001, gaps=True))), "replace", "SPX")
+        after_upload = client.get("/api/predict?limit=5").json()
+    body = first.json()
+    assert first.status_code == 200 and "ETag" in first.headers
+    assert body["target"] == "probability_up" and len(body["history"]) == 5
+    assert body["latest"] == body["history"][-1] and body["latest"]["actual"] is None
+    assert body["history"][0]["actual"] is not None and 0 < body["latest"]["prediction"] < 1
+    assert set(body["coefficients"]) == set(predict.FEATURES)
+    assert len(again.json()["history"]) == 10
+    assert ridge.json()["target"] == "expected_return" and "rmse" in ridge.json()["holdout"]
+    assert [h["actual"] for h in ridge.json()["history"][-5:]] == [None] * 5
+    assert unknown.status_code == 422
+    # one fit per model until an upload bumps the dataset version
+    assert len(trained) == 3 and cached < 0.05
+    assert after_upload["latest"]["date"] > body["latest"]["date"]
+def test_undefined_metrics_are_null(backend_db, monkeypatch):
+    # A flat close makes every prediction and every forward return constant, so the holdout
+    # correlation is undefined; the stdlib encoder (allow_nan=False) must still encode it
+    monkeypatch.setattr(columnar, "orjson", None)
+    df = make_ohlcv(300)
+    df[['open', 'high', 'low', 'close']] = 4000.0
+    main.ingest_csv_stream(io.BytesIO(to_csv(df)), "replace", "SPX")
+    with TestClient(main.app) as client:
+        response = client.get("/api/predict?model=ridge")
+    assert response.status_code == 200
+    assert response.json()["holdout"]["correlation"] is None
+    assert predict.quality("ridge", np.zeros(60), np.full(60, np.inf))["rmse"] is None
+def test_holdout_needs_enough_training_bars(backend_db):
+    # Of 140 bars, the holdout model trains on about 100 at horizon 1 but on none at horizon
+    # 60; then the holdout metrics are null instead of those of a model fitted on one row
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(140))), "replace", "SPX")
+    with TestClient(main.app) as client:
+        short = client.get("/api/predict?horizon=1").json()
+        long = client.get("/api/predict?horizon=60").json()
+        ridge = client.get("/api/predict?model=ridge&horizon=60").json()
+    assert short["holdout"]["hit_rate"] is not None
+    assert long["holdout"]["hit_rate"] is None and long["holdout"]["log_loss"] is None
+    assert long["holdout"]["bars"] > 0 and long["history"][-1]["prediction"] is not None
+    assert ridge["holdout"]["rmse"] is None and ridge["holdout"]["correlation"] is None
@@ -0,0 +1,91 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from conftest import make_prices, make_ohlcv, to_csv
+import main
+import registry
+def wilder(values: pd.Series, period: int) -> pd.Series:
+    # Seeded with the mean of the first `period` values, then alpha = 1/period
+    seeded = values.iloc[period - 1:].copy()
+    seeded.iloc[0] = values.iloc[:period].mean()
+    return seeded.ewm(alpha=1 / period, adjust=False).mean().reindex(values.index)
+def reference(name: str, bars: pd.DataFrame, params) -> dict:
+    close, high, low = bars['close'], bars['high'], bars['low']
+    if name == "sma":
+        return {'sma': close.rolling(params['period']).mean()}
+    if name == "ema":
+        return {'ema': close.ewm(span=params['period'], adjust=False).mean()}
+    if name == "rsi":
+        delta = close.diff().fillna(0.0)
+        gain, loss = wilder(delta.clip(lower=0), params['period']), wilder((-delta).clip(lower=0), params['period'])
+        return {'rsi': (100 - 100 / (1 + gain / loss)).where(loss != 0, 100.0).where(gain.notna())}
+    if name == "macd":
+        line = (close.ewm(span=params['fast'], adjust=False).mean()
+                - close.ewm(span=params['slow'], adjust=False).mean())
+        signal = line.ewm(span=params['signal'], adjust=False).mean()
+        return {'line': line, 'signal': signal, 'hist': line - signal}
+    if name == "bollinger":
+        middle = close.rolling(params['period']).mean()
+        spread = close.rolling(params['period']).apply(np.std, raw=True) * params['stddev']
+        return {'middle': middle, 'upper': middle + spread, 'lower': middle - spread}
+    if name == "atr":
+        prev = close.shift(1)
+        true_range = np.maximum(high - low, np.maximum((high - prev).abs(), (low - prev).abs())).fillna(high - low)
+        return {'atr': wilder(true_range, params['period'])}
+    if name == "stochastic":
+        lowest, highest = low.rolling(params['k']).min(), high.rolling(params['k']).max()
+        k = 100 * (close - lowest) / (highest - lowest)
+        return {'k': k, 'd': k.rolling(params['d']).mean()}
+    if name == "obv":
+        change = close.diff()
+        return {'obv': bars['volume'].where(change > 0, 0.0).sub(bars['volume'].where(change < 0, 0.0)).cumsum()}
+CASES = [
+    ("sma", {}), ("sma", {"period": "5"}),
+    ("ema", {}), ("ema", {"period": "50"}),
+    ("rsi", {}), ("rsi", {"period": "7"}),
+    ("macd", {}), ("macd", {"fast": "5", "slow": "35", "signal": "5"}),
+    ("bollinger", {}), ("bollinger", {"period": "10", "stddev": "1.5"}),
+    ("atr", {}), ("atr", {"period": "5"}),
+    ("stochastic", {}), ("stochastic", {"k": "5", "d": "5"}),
+    ("obv", {}),
+]
+def test_every_indicator_has_a_case():
+    assert {name for name, _ in CASES} == set(registry.INDICATORS)
+@pytest.mark.parametrize("name,raw", CASES)
+def test_indicator_matches_pandas(name, raw):
+    bars = make_prices(1_000, seed=3, gaps=True, flat=True)
+    bars.insert(0, 'date', pd.bdate_range("2000-01-03", periods=len(bars)).strftime("%Y-%m-%d"))
+    params = registry.parse_params(name, raw)
+    result = registry.compute(name, params, ("TEST", main.DAILY, 0), lambda: bars)
+    expected = reference(name, bars, params)
+    assert list(result.columns) == ['date'] + list(expected)
+    # rtol allows for the rounding of pandas' online rolling variance (bollinger)
+    for output, values in expected.items():
+        np.testing.assert_allclose(result[output], values, rtol=1e-7, atol=1e-9, equal_nan=True)
+@pytest.mark.parametrize("name,raw,message", [
+    ("foo", {}, "Unknown indicator"),
+    ("sma", {"window": "5"}, "Unknown parameters"),
+    ("sma", {"period": "5.5"}, "must be int"),
+    ("rsi", {"period": "0"}, "must be positive"),
+    ("bollinger", {"stddev": "-1"}, "must be positive"),
+    ("macd", {"fast": "26"}, "fast must be below"),
+    ("macd", {"fast": "30", "slow": "20"}, "fast must be below"),
+])
+def test_invalid_params(name, raw, message):
+    with pytest.raises(ValueError, match=message):
+        registry.parse_params(name, raw)
+def test_parse_params_casts_to_defaults():
+    assert registry.parse_params("bollinger", {"period": "10", "stddev": "3"}) == {"period": 10, "stddev": 3.0}
+    assert registry.parse_params("macd", {"slow": "13", "fast": "12"}) == {"fast": 12, "slow": 13, "signal": 9}
+def test_indicator_endpoint_rejects_invalid_params(backend_db):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(100))), "replace", "SPX")
+    with TestClient(main.app) as client:
+        ok = client.get("/api/indicators?name=macd&fast=5&slow=10&limit=3")
+        swapped = client.get("/api/indicators?name=macd&fast=26&slow=12")
+        equal = client.get("/api/indicators?name=macd&fast=12&slow=12")
+        strategy = client.get("/api/backtest?strategy=macd&fast=26&slow=12")
+    assert ok.status_code == 200 and len(ok.json()) == 3
+    assert swapped.status_code == equal.status_code == strategy.status_code == 400
+    assert "fast must be below" in swapped.json()["detail"]
@@ -0,0 +1,82 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv
+import main
+import db
+import resample
+def expected_bars(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    # Reference aggregation with pandas' own calendar resampling
+    rule = {"1W": "W-SUN", "1M": "MS", "3M": "QS", "12M": "YS"}[timeframe]
+    dates = pd.to_datetime(df['time'], unit='s').dt.normalize()
+    bars = df.set_index(dates).resample(rule).agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    ).dropna(subset=['close'])
+    if timeframe == "1W":
+        bars.index = bars.index - pd.Timedelta(days=6)
+    return bars
+def stored_bars(symbol: str, timeframe: str) -> pd.DataFrame:
+    with db.connection(main.DB_PATH) as conn:
+        return pd.read_sql_query(
+            "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol = ? AND timeframe = ? ORDER BY ts",
+            conn, params=(symbol, timeframe)
+        )
+def assert_bars(stored: pd.DataFrame, expected: pd.DataFrame):
+    assert stored['ts'].tolist() == expected.index.strftime('%Y-%m-%d').tolist()
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        np.testing.assert_allclose(stored[col].to_numpy(), expected[col].to_numpy(), rtol=1e-12)
+@pytest.mark.parametrize("timeframe", main.DERIVED_TIMEFRAMES)
+def test_derived_bars_after_streamed_and_appended_ingest(backend_db, monkeypatch, timeframe):
+    df = make_ohlcv(1_500, gaps=True)
+    monkeypatch.setattr(main, "CSV_CHUNK_ROWS", 211)
+    main.ingest_csv_stream(io.BytesIO(to_csv(df)), "replace", "FULL")
+    main.ingest_csv_stream(io.BytesIO(to_csv(df.iloc[:900])), "replace", "APPEND")
+    revised = df.iloc[880:].copy()
+    revised.iloc[0, revised.columns.get_loc('high')] += 500
+    main.ingest_csv_stream(io.BytesIO(to_csv(revised)), "append", "APPEND")
+    assert_bars(stored_bars("FULL", timeframe), expected_bars(df, timeframe))
+    assert_bars(stored_bars("APPEND", timeframe), expected_bars(pd.concat([df.iloc[:880], revised]), timeframe))
+def test_backfill_existing_database(backend_db):
+    df = make_ohlcv(400)
+    main.ingest_csv_stream(io.BytesIO(to_csv(df)), "replace", "OLD")
+    with db.connection(main.DB_PATH) as conn:
+        conn.execute("DELETE FROM bars WHERE timeframe != ?", (main.DAILY,))
+        conn.commit()
+    main.init_db()
+    for timeframe in main.DERIVED_TIMEFRAMES:
+        assert_bars(stored_bars("OLD", timeframe), expected_bars(df, timeframe))
+def test_bars_endpoint(backend_db):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(200, start="2024-01-01"))), "replace", "SPX")
+    with TestClient(main.app) as client:
+        weeks = client.get("/api/bars?timeframe=1W&limit=3&fields=close").json()
+        months = client.get("/api/monthly-data?fields=open").json()
+        assert client.get("/api/bars?timeframe=1D").status_code == 422
+    assert [row['date'] for row in weeks] == ["2024-07-01", "2024-07-08", "2024-07-15"]
+    assert list(weeks[0]) == ['date', 'close']
+    assert months[0]['date'] == "2024-01-01" and len(months) == 7
+    assert resample.period_start("2024-07-18", "3M") == "2024-07-01"
+def test_replace_drops_earlier_derived_bars(backend_db):
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(3_000))), "replace", "SPX")
+    shorter = make_ohlcv(1_000, start="1995-06-01")
+    main.ingest_csv_stream(io.BytesIO(to_csv(shorter)), "replace", "SPX")
+    for timeframe in main.DERIVED_TIMEFRAMES:
+        assert_bars(stored_bars("SPX", timeframe), expected_bars(shorter, timeframe))
+    main.save_to_db(main.process_csv_data(to_csv(shorter.iloc[:0])), "SPX")
+    for timeframe in main.DERIVED_TIMEFRAMES:
+        assert stored_bars("SPX", timeframe).empty
+def test_daily_replace_keeps_uploaded_months_outside_daily_range(backend_db):
+    monthly = make_ohlcv(360, start="1980-01-01")
+    months = pd.date_range("1980-01-01", periods=360, freq="MS")
+    monthly['time'] = (months - pd.Timestamp(0)) // pd.Timedelta(seconds=1) + 12 * 3600
+    main.save_monthly_to_db(main.process_monthly_csv_data(to_csv(monthly)), "SPX")
+    daily = make_ohlcv(500, start="2005-01-03")
+    # the second replace clears the periods the first one derived
+    for _ in range(2):
+        main.ingest_csv_stream(io.BytesIO(to_csv(daily)), "replace", "SPX")
+    months = stored_bars("SPX", "1M")
+    derived = expected_bars(daily, "1M")
+    # uploaded months outside the daily range survive, the covered ones are derived
+    assert len(months) == 360 and months['ts'].iloc[0] == "1980-01-01" and months['ts'].iloc[-1] == "2009-12-01"
+    assert_bars(months[months['ts'].isin(derived.index.strftime('%Y-%m-%d'))], derived)
@@ -0,0 +1,68 @@
+import io
+import pytest
+from fastapi.testclient import TestClient
+from conftest import make_ohlcv, to_csv
+import main
+import db
+import screener
+SYMBOLS = ["AAA", "BBB", "CCC", "DDD"]
+def load(symbols, n: int = 300):
+    for seed, symbol in enumerate(symbols):
+        main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(n + seed, seed=seed))), "replace", symbol)
+def history(symbol: str):
+    rows = main.query_bars(symbol, main.DAILY, ['close', 'rsi', 'macd_hist'], 2)
+    return rows[-1], rows[0]
+def test_snapshot_follows_ingest(backend_db):
+    load(SYMBOLS)
+    with db.connection(main.DB_PATH) as conn:
+        snapshot = {row["symbol"]: row for row in screener.screen(conn, *screener.build_query(None, None))}
+    assert sorted(snapshot) == SYMBOLS
+    for symbol in SYMBOLS:
+        (date, close, rsi, hist), (_, prev_close, prev_rsi, prev_hist) = history(symbol)
+        row = snapshot[symbol]
+        assert (row["date"], row["close"], row["rsi"]) == (date, round(close, 2), round(rsi, 2))
+        assert row["prev_macd_hist"] == round(prev_hist, 2)
+        assert row["change"] == round(close / prev_close - 1, 6)
+    # append mode moves the snapshot to the new last bar
+    main.ingest_csv_stream(io.BytesIO(to_csv(make_ohlcv(310))), "append", "AAA")
+    with db.connection(main.DB_PATH) as conn:
+        assert conn.execute("SELECT ts FROM latest_bars WHERE symbol = 'AAA'").fetchone()[0] == history("AAA")[0][0]
+def test_filters_match_history(backend_db):
+    load(SYMBOLS)
+    latest = {symbol: history(symbol) for symbol in SYMBOLS}
+    def matches(conditions):
+        with db.connection(main.DB_PATH) as conn:
+            return [row["symbol"] for row in screener.screen(conn, *screener.build_query(conditions, None))]
+    median = sorted(rsi for (_, _, rsi, _), _ in latest.values())[2]
+    assert matches(f"rsi<{median}") == sorted(s for s, ((_, _, rsi, _), _) in latest.items() if rsi < median)
+    turned = sorted(s for s, ((_, _, _, hist), (_, _, _, prev)) in latest.items() if hist > 0 >= prev)
+    assert matches("macd_hist>0,prev_macd_hist<=0") == turned
+    assert matches("symbol=bbb") == ["BBB"] and matches("close>close") == []
+    assert matches(f"date>={latest['CCC'][0][0]}") == [s for s in SYMBOLS if latest[s][0][0] >= latest['CCC'][0][0]]
+    with db.connection(main.DB_PATH) as conn:
+        ranked = screener.screen(conn, *screener.build_query(None, "-rsi", limit=2))
+    assert [row["rsi"] for row in ranked] == sorted((round(v[0][2], 2) for v in latest.values()), reverse=True)[:2]
+@pytest.mark.parametrize("conditions", ["rsi<<30", "foo>1", "rsi<abc", "date>2024", "rsi<30;DROP TABLE bars"])
+def test_rejects_invalid_filters(conditions):
+    with pytest.raises(ValueError):
+        screener.build_query(conditions, None)
+def test_screen_endpoint(backend_db):
+    load(SYMBOLS[:2])
+    with TestClient(main.app) as client:
+        first = client.get("/api/screen?sort=-change&limit=1")
+        bad = client.get("/api/screen?filter=volume>>1")
+        before = client.get("/api/screen")
+        load(SYMBOLS[2:])
+        fresh = client.get("/api/screen", headers={"If-None-Match": before.headers["ETag"]})
+    assert first.status_code == 200 and "ETag" in first.headers and first.json()["count"] == 1
+    assert bad.status_code == 400
+    # an upload of any symbol invalidates the cross-symbol screen
+    assert before.json()["count"] == 2 and fresh.status_code == 200 and fresh.json()["count"] == 4
+def test_backfill_on_startup(backend_db):
+    load(SYMBOLS[:2])
+    with db.connection(main.DB_PATH) as conn:
+        conn.execute("DELETE FROM latest_bars")
+        conn.commit()
+    main.init_db()
+    with db.connection(main.DB_PATH) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM latest_bars").fetchone()[0] == 2